@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# run_benchmarks.py - Offline benchmark suite for the CyberNewsBot pipeline
+# ==================================================================================================
+# Runs every stage against recorded fixtures and a local stub server (no live feeds, sites or
+# Telegram), and reports throughput, latency percentiles and peak memory per stage at several
+# posted-history sizes.
+#
+#   python benchmarks/run_benchmarks.py                       # 1k, 10k and 100k posted records
+#   python benchmarks/run_benchmarks.py --sizes 1000 --iterations 3 --json bench.json
+#   python benchmarks/run_benchmarks.py --skip-model          # skip the BART benchmarks
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, SRC_DIR)
+
+from stub_server import StubServer
+
+WORDS = ("attack breach ransomware vulnerability patch exploit phishing malware network data hospital "
+         "retailer government agency researchers credentials cloud server advisory critical update").split()
+
+
+#1
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the pipeline's per-item prints so they don't dominate the measurement."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+#2
+def measure(name, func, iterations, items=1, setup=None, **params):
+    """
+    Times `func` for `iterations` runs (stdout silenced), then runs it once more under tracemalloc
+    for the peak Python allocation and what its return value still holds (retained).
+    `items` is how many records one call processes (for throughput).
+    """
+    latencies = []
+    with quiet():
+        for _ in range(iterations):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - start)
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        value = func()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del value
+
+    total = sum(latencies)
+    result = {
+        "benchmark": name,
+        **params,
+        "iterations": iterations,
+        "items_per_call": items,
+        "throughput_items_per_s": round(items * iterations / total, 2) if total else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+        "retained_memory_mb": round(retained / 1024 / 1024, 2),
+    }
+    print_result(result)
+    return result
+
+
+def print_result(result):
+    params = " ".join(f"{k}={v}" for k, v in result.items()
+                      if k not in ("benchmark", "iterations", "items_per_call", "throughput_items_per_s",
+                                   "latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "peak_memory_mb",
+                                   "retained_memory_mb"))
+    print(f"{result['benchmark']:<22} {params:<16} {result['throughput_items_per_s']:>12} items/s  "
+          f"p50={result['latency_p50_ms']:>10}ms  p95={result['latency_p95_ms']:>10}ms  "
+          f"p99={result['latency_p99_ms']:>10}ms  peak={result['peak_memory_mb']:>8}MB  "
+          f"retained={result['retained_memory_mb']:>8}MB")
+
+
+#3
+def make_posted_history(size, seed_articles=()):
+    """Synthetic posted_news records shaped like the real ones, plus the given real articles."""
+    rng = random.Random(size)
+    today = datetime.today()
+    history = []
+
+    for i in range(size - len(seed_articles)):
+        title = " ".join(rng.choice(WORDS) for _ in range(8)).capitalize() + f" {i}"
+        summary = " ".join(rng.choice(WORDS) for _ in range(60))
+        published = today - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86399))
+        history.append({
+            "title": title,
+            "url": f"https://news{i % 500}.example.com/{published:%Y/%m}/article-{i}",
+            "text_hash": hashlib.sha256(summary.encode("utf-8")).hexdigest(),
+            "summary": summary,
+            "source": f"news{i % 500}.example.com",
+            "keywords": rng.sample(WORDS, 5),
+            "published_date": published.strftime("%Y-%m-%d"),
+            "published_time": published.strftime("%H:%M:%S"),
+            "rss_source": rng.choice(["Israel", "USA", "UK", "Unknown"]),
+        })
+
+    for article in seed_articles:
+        history.append(article.posted_entry())
+    return history
+
+
+#4
+def make_skipped_articles(size):
+    rng = random.Random(size + 1)
+    return [{
+        "id": f"tag:google.com,2013:googlealerts/feed:bench{i}",
+        "title": " ".join(rng.choice(WORDS) for _ in range(8)),
+        "url": f"https://skip{i % 300}.example.com/item-{i}",
+        "reason": rng.choice(["Duplicate by url", "Duplicate by title", "Article text is empty or too short"]),
+        "summary": " ".join(rng.choice(WORDS) for _ in range(40)),
+    } for i in range(size)]
+
+
+def write_json(path, data):
+    clear_store(path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+def clear_store(path):
+    """Removes a state store with its checksum sidecar and snapshot."""
+    for suffix in ("", ".sha256", ".bak"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+#5
+def run(args):
+    results = []
+    server = StubServer(latency_ms=args.stub_latency_ms).start()
+
+    # The pipeline modules read their configuration at import time
+    os.environ["RSS_FEED_URL"] = ",".join(server.feed_urls())
+    os.environ["TELEGRAM_API_URL"] = server.base_url
+    os.environ["TELEGRAM_BOT_TOKEN"] = "0000000000:BENCHMARK"
+    os.environ["TELEGRAM_CHAT_ID"] = "-1000000000000"
+    os.environ["TEAMS_WEBHOOK_URL"] = f"{server.base_url}/teams"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")  # Production log level; DEBUG would measure logging instead
+    os.environ["SEARCH_INDEX_ENABLED"] = "false"  # Store saves are measured without it; the index is measured on its own
+
+    import json_handler
+    import messaging
+    import news_retrieval
+    import summarizer
+    import archive
+    import serialization
+    import search_index
+    from article import ArticleRecord
+    from config import POSTED_NEWS_FILE, SKIPPED_NEWS_FILE
+
+    print(f"🧪 Stub server: {server.base_url} | {len(server.feed_urls())} recorded feeds")
+
+    # --- Feed retrieval and per-batch filtering -------------------------------------------------
+    with quiet():
+        articles = news_retrieval.get_google_alerts()
+    results.append(measure("get_google_alerts", news_retrieval.get_google_alerts, args.iterations,
+                           items=max(1, len(articles))))
+
+    # --- Full-text extraction ---------------------------------------------------------------------
+    urls = sorted({article.url for article in articles})
+    results.append(measure("fetch_full_text", lambda: [news_retrieval.fetch_full_text(url) for url in urls],
+                           args.iterations, items=len(urls)))
+
+    # --- History-size dependent stages -------------------------------------------------------------
+    for size in args.sizes:
+        history = make_posted_history(size, seed_articles=articles)
+        skipped = make_skipped_articles(min(size, args.max_skipped))
+
+        def reset_state():
+            write_json(POSTED_NEWS_FILE, history)
+            clear_store(SKIPPED_NEWS_FILE)
+
+        results.append(measure("filter_new_articles", lambda: news_retrieval.filter_new_articles(list(articles)),
+                               args.iterations, items=len(articles), setup=reset_state, history=size))
+
+        # Every fixture article is already in the history, so this exercises load + dedup only
+        results.append(measure("dedup", lambda: messaging.post_articles_to_telegram([copy.copy(a) for a in articles]),
+                               args.iterations, items=len(articles), setup=reset_state, history=size))
+
+        # Memory of the posted history as the dedup step holds it: plain dicts vs dedup-view ArticleRecords
+        # parsed without the other fields (load_posted_records())
+        history_json = json.dumps(history).encode("utf-8")
+        results.append(measure("history_as_dicts", lambda: json.loads(history_json),
+                               args.iterations, items=size, history=size))
+        results.append(measure("history_as_records",
+                               lambda: [ArticleRecord.dedup_view(*row)
+                                        for row in serialization.decode_fields(history_json, json_handler.DEDUP_FIELDS)],
+                               args.iterations, items=size, history=size))
+        del history_json
+
+        results.append(measure("save_posted_news", lambda: json_handler.save_posted_news(history),
+                               args.iterations, items=size, history=size))
+        results.append(measure("load_posted_news", json_handler.load_posted_news,
+                               args.iterations, items=size, history=size))
+
+        def reset_skipped():
+            clear_store(SKIPPED_NEWS_FILE)
+            json_handler.save_skipped_news(skipped)
+
+        results.append(measure("save_skipped_news", lambda: json_handler.save_skipped_news(skipped),
+                               args.iterations, items=len(skipped), setup=reset_skipped, history=size))
+        results.append(measure("load_skipped_news", json_handler.load_skipped_news,
+                               args.iterations, items=len(skipped), setup=reset_skipped, history=size))
+
+        # After compaction only the hot window is loaded, whatever the total history size
+        json_handler.save_posted_news(history)
+        with quiet():
+            archive.compact_posted_news(force=True)
+        hot_size = len(json_handler.load_posted_news())
+        results.append(measure("load_posted_news_hot", json_handler.load_posted_news,
+                               args.iterations, items=hot_size, history=size))
+
+        # Full-text search: building the index from scratch, then analyst queries. The synthetic
+        # history has a 20-word vocabulary, so the term queries match nearly every record (worst case)
+        def clear_index():
+            search_index.get_connection().close()
+            search_index.thread_state.connection = None
+            clear_store(search_index.SEARCH_INDEX_DB)
+            for suffix in ("-wal", "-shm"):
+                clear_store(search_index.SEARCH_INDEX_DB + suffix)
+
+        results.append(measure("search_index_build", lambda: search_index.index_records("posted", history),
+                               1, items=size, setup=clear_index, history=size))
+        queries = [f'"{history[size // 2]["title"]}"', "ransomware AND hospital", "rss_source:Israel AND phish*"]
+        results.append(measure("search_query", lambda: [search_index.search(query) for query in queries],
+                               args.iterations, items=len(queries), history=size))
+        clear_index()
+
+    # --- State file codecs ------------------------------------------------------------------------
+    # A posted history about the size of our production file (~1.3 MB as indented JSON)
+    codec_history = make_posted_history(args.codec_records)
+    print(f"📦 Codec benchmark: {args.codec_records} records, "
+          f"{len(json.dumps(codec_history, ensure_ascii=False, indent=4).encode('utf-8')) / 1e6:.2f} MB as indented JSON")
+    codec_file = "codec_bench.json"
+    for state_format, available in sorted(serialization.AVAILABLE_FORMATS.items()):
+        for compression in ("none", "zstd"):
+            if not available or (compression == "zstd" and serialization.zstandard is None):
+                print(f"⏭️ {state_format}/{compression}: library not installed")
+                continue
+
+            def save():
+                with json_handler.state_lock(codec_file):
+                    json_handler.write_json_atomic(codec_file, codec_history, state_format=state_format, compression=compression)
+
+            save()
+            results.append(measure("codec_save", save, args.iterations, items=len(codec_history),
+                                   format=f"{state_format}/{compression}"))
+            results.append(measure("codec_load", lambda: json_handler.safe_load_json(codec_file, []), args.iterations,
+                                   items=len(codec_history), format=f"{state_format}/{compression}",
+                                   file_kb=round(os.path.getsize(codec_file) / 1024, 1)))
+            clear_store(codec_file)
+
+    # --- Summarization (needs the model weights) -------------------------------------------------
+    if args.skip_model:
+        print("⏭️ Skipping summarization benchmarks (--skip-model).")
+    else:
+        with quiet():
+            texts = [(news_retrieval.fetch_full_text(url), "") for url in urls]
+        texts = [(text, title) for text, title in texts if len(text.split()) >= 30]
+        try:
+            with quiet():
+                summarizer.load_summarizer()  # Fail fast if the weights aren't available
+                summarizer.summarize_text(texts[0][0])  # Loads the model outside the measurement
+        except Exception as e:
+            print(f"⏭️ Summarization model unavailable – skipping: {e}")
+        else:
+            results.append(measure("summarize_text", lambda: [summarizer.summarize_text(t, title) for t, title in texts],
+                                   args.model_iterations, items=len(texts)))
+            results.append(measure("summarize_batch", lambda: summarizer.summarize_batch(texts),
+                                   args.model_iterations, items=len(texts)))
+
+    server.shutdown()
+    print(f"📈 Max RSS of the benchmark process: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+    print(f"🌐 Stub requests: {server.requests}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the CyberNewsBot pipeline against recorded fixtures.")
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in v.split(",")], default=[1000, 10000, 100000],
+                        help="Comma-separated posted-history sizes (default: 1000,10000,100000)")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--model-iterations", type=int, default=1)
+    parser.add_argument("--max-skipped", type=int, default=5000, help="Cap on synthetic skipped records per size")
+    parser.add_argument("--codec-records", type=int, default=1200, help="Records in the codec benchmark file (~1.3 MB)")
+    parser.add_argument("--stub-latency-ms", type=int, default=0, help="Simulated network latency per request")
+    parser.add_argument("--skip-model", action="store_true", help="Don't run the summarization benchmarks")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the temporary state directory")
+    args = parser.parse_args()
+
+    # All state files are relative to the working directory – keep them away from real data
+    output_path = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="cybernewsbot-bench-")
+    os.chdir(workdir)
+
+    try:
+        results = run(args)
+        if output_path:
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump({"run_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "results": results}, f, indent=4)
+            print(f"💾 Results written to {output_path}")
+    finally:
+        if args.keep_workdir:
+            print(f"📁 Work directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# stub_hub.py - Local WebSub hub for trying push ingestion (push_receiver.py) without a public hub
+# ==================================================================================================
+# Verifies (un)subscribe requests by calling the subscriber back with a challenge, like a real hub,
+# and on a publish ping fetches the feed and POSTs it to every subscriber of its topic, signed with the
+# subscriber's secret (X-Hub-Signature: sha256=...).
+#
+#   python stub_hub.py --port 8901
+#   # PUSH_HUB_URL=http://127.0.0.1:8901/  PUSH_CALLBACK_URL=http://127.0.0.1:8780  python push_receiver.py serve
+#   curl -d hub.mode=publish -d hub.url=<feed url> http://127.0.0.1:8901/
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import hashlib
+import hmac
+import html
+import re
+import secrets
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SELF_LINK = re.compile(r'<(?:atom:)?link[^>]*rel="self"[^>]*href="([^"]+)"|<(?:atom:)?link[^>]*href="([^"]+)"[^>]*rel="self"')
+
+
+#1
+class StubHubHandler(BaseHTTPRequestHandler):
+    """
+    POST / (form-encoded):
+    - hub.mode=subscribe|unsubscribe, hub.topic, hub.callback, hub.secret, hub.lease_seconds -> 202, then verified
+    - hub.mode=publish, hub.url=<feed url>                                                    -> 204, then delivered
+    """
+
+    def _send(self, status, body=""):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {key: values[0] for key, values in urllib.parse.parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+        mode = form.get("hub.mode")
+
+        if mode in ("subscribe", "unsubscribe") and form.get("hub.topic") and form.get("hub.callback"):
+            self._send(202)
+            threading.Thread(target=self.server.verify, args=(mode, form), daemon=True).start()
+        elif mode == "publish" and (form.get("hub.url") or form.get("hub.topic")):
+            self._send(204)
+            topic = form.get("hub.url") or form.get("hub.topic")
+            threading.Thread(target=self.server.publish, args=(topic,), daemon=True).start()
+        else:
+            self._send(400, "bad request")
+
+    def log_message(self, format, *args):
+        pass
+
+
+#2
+class StubHub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), StubHubHandler)
+        self.url = f"http://{host}:{self.server_address[1]}/"
+        self.subscriptions = {}  # topic -> {callback: secret}
+        self.deliveries = []     # (topic, callback, HTTP status)
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="stub-hub", daemon=True).start()
+        return self
+
+    def verify(self, mode, form):
+        """Calls the subscriber back with a challenge; the (un)subscription only counts if it is echoed."""
+        challenge = secrets.token_hex(8)
+        query = urllib.parse.urlencode({"hub.mode": mode, "hub.topic": form["hub.topic"], "hub.challenge": challenge,
+                                        "hub.lease_seconds": form.get("hub.lease_seconds", "86400")})
+        callback = form["hub.callback"]
+        try:
+            with urllib.request.urlopen(f"{callback}{'&' if '?' in callback else '?'}{query}", timeout=10) as response:
+                confirmed = response.status == 200 and response.read().decode("utf-8") == challenge
+        except urllib.error.URLError:
+            confirmed = False
+
+        if confirmed:
+            with self._lock:
+                topic_subscribers = self.subscriptions.setdefault(form["hub.topic"], {})
+                if mode == "subscribe":
+                    topic_subscribers[callback] = form.get("hub.secret", "")
+                else:
+                    topic_subscribers.pop(callback, None)
+        return confirmed
+
+    def publish(self, url, content=None, content_type="application/atom+xml"):
+        """
+        Delivers `content` (fetched from `url` if not given) to every subscriber of the topic. The topic is
+        the feed's <link rel="self"> if it has one (the recorded fixtures point at Google Alerts), else `url`.
+        """
+        if content is None:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                content = response.read()
+                content_type = response.headers.get("Content-Type", content_type)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        self_link = SELF_LINK.search(content.decode("utf-8", "replace"))
+        topic = html.unescape(self_link.group(1) or self_link.group(2)) if self_link else url
+
+        with self._lock:
+            subscribers = dict(self.subscriptions.get(topic, {}))
+        for callback, secret in subscribers.items():
+            headers = {"Content-Type": content_type, "Link": f'<{self.url}>; rel="hub", <{topic}>; rel="self"'}
+            if secret:
+                headers["X-Hub-Signature"] = "sha256=" + hmac.new(secret.encode("utf-8"), content, hashlib.sha256).hexdigest()
+            try:
+                request = urllib.request.Request(callback, data=content, headers=headers, method="POST")
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except urllib.error.URLError:
+                status = None
+            with self._lock:
+                self.deliveries.append((topic, callback, status))
+        return len(subscribers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local WebSub hub for testing push_receiver.py.")
+    parser.add_argument("--port", type=int, default=8901)
+    args = parser.parse_args()
+
+    hub = StubHub(port=args.port)
+    print(f"🧪 Stub hub on {hub.url}")
+    print(f"   PUSH_HUB_URL={hub.url}")
+    try:
+        hub.serve_forever()
+    except KeyboardInterrupt:
+        pass
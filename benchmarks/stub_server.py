@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# stub_server.py - Local stand-in for RSS feeds, article sites, Telegram and Teams
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+#1
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Routes:
+    - GET  /feeds/<name>.xml        recorded feed; {{BASE_URL}} and {{PUBLISHED}} are filled in when served
+    - GET  /articles/<name>.html    recorded article page (404 if missing)
+    - POST /bot<token>/sendMessage  Telegram Bot API stub
+    - POST /teams                   Teams incoming-webhook stub
+    """
+
+    server_version = "CyberNewsBotStub/1.0"
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_fixture(self, kind, name):
+        path = os.path.join(FIXTURES_DIR, kind, os.path.basename(name))
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def do_GET(self):
+        self.server.count("GET " + self.path.split("?")[0].rsplit("/", 1)[0])
+        time.sleep(self.server.latency)
+        path = self.path.split("?")[0]
+
+        if path.startswith("/feeds/"):
+            content = self._read_fixture("feeds", path[len("/feeds/"):])
+            if content is None:
+                return self._send(404, "not found", "text/plain")
+            published = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            content = content.replace("{{BASE_URL}}", self.server.base_url).replace("{{PUBLISHED}}", published)
+            return self._send(200, content, "application/atom+xml; charset=utf-8")
+
+        if path.startswith("/articles/"):
+            content = self._read_fixture("articles", path[len("/articles/"):])
+            if content is None:
+                return self._send(404, "<html><body>Not found</body></html>", "text/html")
+            return self._send(200, content, "text/html; charset=utf-8")
+
+        self._send(404, "not found", "text/plain")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        time.sleep(self.server.latency)
+
+        if self.path.startswith("/bot") and self.path.endswith("/sendMessage"):
+            self.server.count("telegram")
+            return self._send(200, json.dumps({"ok": True, "result": {"message_id": 1}}), "application/json")
+
+        if self.path == "/teams":
+            self.server.count("teams")
+            return self._send(200, "1", "text/plain")
+
+        self._send(404, "not found", "text/plain")
+
+    def log_message(self, format, *args):
+        pass
+
+
+#2
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency_ms / 1000.0
+        self.base_url = f"http://{host}:{self.server_address[1]}"
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def count(self, route):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def feed_urls(self):
+        feeds_dir = os.path.join(FIXTURES_DIR, "feeds")
+        return [f"{self.base_url}/feeds/{name}" for name in sorted(os.listdir(feeds_dir)) if name.endswith(".xml")]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="stub-server", daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded feeds/articles and fake Telegram/Teams endpoints.")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every response")
+    args = parser.parse_args()
+
+    server = StubServer(port=args.port, latency_ms=args.latency_ms)
+    print(f"🧪 Stub server on {server.base_url}")
+    print(f"   RSS_FEED_URL={','.join(server.feed_urls())}")
+    print(f"   TELEGRAM_API_URL={server.base_url}")
+    print(f"   TEAMS_WEBHOOK_URL={server.base_url}/teams")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
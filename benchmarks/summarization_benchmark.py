@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# summarization_benchmark.py - Speed/quality comparison of summarization models and decoding settings
+# ==================================================================================================
+# Summarizes the recorded fixture articles with each variant, one article at a time (as the pipeline
+# does), and reports per-article latency, generated tokens/sec and ROUGE-1/2/L F1 against the
+# reference variant's output (by default the current production setup: bart-large-cnn with its own
+# decoding defaults). Model inputs and lengths come from summarizer.prepare_summary_input().
+#
+# A variant is MODEL[:option,option...] – MODEL is a tier from SUMMARIZER_TIERS or a model id/path;
+# options are beams=N, greedy, length_penalty=F, early_stopping=true|false:
+#
+#   python benchmarks/summarization_benchmark.py
+#   python benchmarks/summarization_benchmark.py --variants bart:beams=2 bart:greedy distilbart distilbart:greedy
+#   python benchmarks/summarization_benchmark.py --reference distilbart --json summarizers.json
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+
+from stub_server import StubServer
+from run_benchmarks import percentile, quiet
+
+DEFAULT_VARIANTS = ["bart", "bart:beams=2", "bart:greedy", "distilbart", "distilbart:greedy"]
+
+
+#1
+def parse_variant(spec, tiers):
+    """'distilbart:beams=2,length_penalty=1.0' -> (label, model, generation options)"""
+    name, _, option_text = spec.partition(":")
+    options = {}
+    for option in filter(None, option_text.split(",")):
+        key, _, value = option.partition("=")
+        if key == "greedy":
+            options["greedy"] = True
+        elif key == "beams":
+            options["num_beams"] = int(value)
+        elif key == "length_penalty":
+            options["length_penalty"] = float(value)
+        elif key == "early_stopping":
+            options["early_stopping"] = value.lower() in ("1", "true", "yes")
+        else:
+            raise ValueError(f"Unknown option '{key}' in variant '{spec}'")
+    return spec, tiers.get(name, name), options
+
+
+#2
+def words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def f1(overlap, candidate_total, reference_total):
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / candidate_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    candidate_grams = Counter(tuple(candidate[i:i + n]) for i in range(len(candidate) - n + 1))
+    reference_grams = Counter(tuple(reference[i:i + n]) for i in range(len(reference) - n + 1))
+    overlap = sum((candidate_grams & reference_grams).values())
+    return f1(overlap, sum(candidate_grams.values()), sum(reference_grams.values()))
+
+
+def rouge_l(candidate, reference):
+    previous = [0] * (len(reference) + 1)
+    for token in candidate:
+        current = [0]
+        for j, reference_token in enumerate(reference):
+            current.append(previous[j] + 1 if token == reference_token else max(previous[j + 1], current[j]))
+        previous = current
+    return f1(previous[-1], len(candidate), len(reference))
+
+
+def rouge_scores(candidates, references):
+    """Mean ROUGE-1/2/L F1 of candidate summaries against reference summaries."""
+    totals = [0.0, 0.0, 0.0]
+    for candidate, reference in zip(candidates, references):
+        candidate, reference = words(candidate), words(reference)
+        if not candidate and not reference:
+            totals = [total + 1.0 for total in totals]  # Both empty – identical
+            continue
+        totals[0] += rouge_n(candidate, reference, 1)
+        totals[1] += rouge_n(candidate, reference, 2)
+        totals[2] += rouge_l(candidate, reference)
+    return [round(total / max(1, len(candidates)), 4) for total in totals]
+
+
+#3
+def run_variant(pipe, corpus, options, iterations):
+    """Summarizes the corpus `iterations` times; returns (summaries, per-article latencies, generated tokens)."""
+    import summarizer
+
+    kwargs = summarizer.generation_kwargs(**{"num_beams": None, "greedy": False, "length_penalty": None,
+                                             "early_stopping": None, **options})
+    text, max_length, min_length = corpus[0]
+    with quiet():
+        pipe(text, max_length=max_length, min_length=min_length, **kwargs)  # Warm-up
+
+    latencies, tokens, summaries = [], 0, []
+    for iteration in range(iterations):
+        for text, max_length, min_length in corpus:
+            start = time.perf_counter()
+            result = pipe(text, max_length=max_length, min_length=min_length, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            summary = result[0]["summary_text"] if result else ""
+            tokens += len(pipe.tokenizer(summary, add_special_tokens=False)["input_ids"])
+            if iteration == 0:
+                summaries.append(summary)
+    return summaries, latencies, tokens
+
+
+def run(args):
+    server = StubServer().start()
+    os.environ["RSS_FEED_URL"] = ",".join(server.feed_urls())
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import news_retrieval
+    import summarizer
+    from transformers import pipeline
+    from config import SUMMARIZER_TIERS
+
+    # Fixed corpus: the recorded fixture articles, prepared exactly as summarize_text() prepares them
+    corpus = []
+    with quiet():
+        for name in sorted(os.listdir(os.path.join(BENCH_DIR, "fixtures", "articles"))):
+            text = news_retrieval.fetch_full_text(f"{server.base_url}/articles/{name}")
+            if len(text.split()) >= 30:  # Shorter texts are returned as-is, without the model
+                corpus.append(summarizer.prepare_summary_input(text)[:3])
+    server.shutdown()
+    print(f"📚 Corpus: {len(corpus)} articles, {sum(len(text.split()) for text, _, _ in corpus)} words")
+
+    variants = [parse_variant(spec, SUMMARIZER_TIERS) for spec in [args.reference] + args.variants]
+    pipelines = {}
+    results = []
+    reference_summaries = None
+    for label, model, options in variants:
+        if model not in pipelines:
+            with quiet():
+                pipelines[model] = pipeline("summarization", model=model, device=-1)
+        summaries, latencies, tokens = run_variant(pipelines[model], corpus, options, args.iterations)
+        if reference_summaries is None:
+            reference_summaries = summaries
+
+        rouge1, rouge2, rougel = rouge_scores(summaries, reference_summaries)
+        result = {
+            "variant": label,
+            "model": model,
+            "articles": len(latencies),
+            "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "tokens_per_s": round(tokens / sum(latencies), 1),
+            "avg_summary_words": round(sum(len(s.split()) for s in summaries) / max(1, len(summaries)), 1),
+            "rouge1": rouge1,
+            "rouge2": rouge2,
+            "rougeL": rougel,
+        }
+        results.append(result)
+        print(f"{label:<32} p50={result['latency_p50_ms']:>8}ms  p95={result['latency_p95_ms']:>8}ms  "
+              f"{result['tokens_per_s']:>7} tok/s  {result['avg_summary_words']:>6} words  "
+              f"ROUGE-1/2/L={rouge1:.3f}/{rouge2:.3f}/{rougel:.3f}")
+
+    print(f"(ROUGE is measured against the reference variant: {args.reference})")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare summarization models and decoding settings.")
+    parser.add_argument("--reference", default="bart", help="Variant whose output the others are scored against")
+    parser.add_argument("--variants", nargs="*", default=DEFAULT_VARIANTS[1:])
+    parser.add_argument("--iterations", type=int, default=1, help="Passes over the corpus (latency only)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"reference": args.reference, "results": results}, f, indent=4)
+        print(f"💾 Results written to {args.json}")
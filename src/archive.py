@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# archive.py - Retention for posted history: hot window + monthly gzip'd JSONL archive segments
+# ==================================================================================================
+# posted_news_ud.json keeps only the last POSTED_HOT_DAYS days, so every run loads a bounded file.
+# Older records move to ARCHIVE_DIR/posted_<YYYY-MM>.jsonl.gz, which is only read on demand.
+#
+#   python archive.py compact                    # move old records out of the hot file now
+#   python archive.py rebuild-index              # rescan segments, drop duplicates, rewrite the index
+#   python archive.py search ransomware --since 2025-01
+#   python archive.py stats
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import glob
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from config import logger, POSTED_NEWS_FILE, POSTED_HOT_DAYS, ARCHIVE_DIR
+from json_handler import state_lock, read_json_checked, write_json_atomic
+from metrics import timed, increment
+
+INDEX_FILE = os.path.join(ARCHIVE_DIR, "index.json")
+
+
+#1
+def segment_path(month):
+    return os.path.join(ARCHIVE_DIR, f"posted_{month}.jsonl.gz")
+
+
+def record_month(record):
+    return record.get("published_date", "")[:7]
+
+
+#2
+def load_index():
+    """The index maps each month to its segment's record count and date range."""
+    index = read_json_checked(INDEX_FILE, {})
+    index.setdefault("segments", {})
+    return index
+
+
+def save_index(index):
+    # Always plain JSON, whatever STATE_FORMAT is – the file is named .json and meant to be inspectable
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    write_json_atomic(INDEX_FILE, index, state_format="json", compression="none")
+
+
+def segment_stats(path):
+    """(record count, first date, last date) of a segment file."""
+    dates = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                dates.append(json.loads(line).get("published_date", ""))
+    return len(dates), min(dates, default=""), max(dates, default="")
+
+
+#3
+def append_to_segments(records, index):
+    """Appends records to their monthly segments (each append is a new gzip member) and updates the index."""
+    by_month = defaultdict(list)
+    for record in records:
+        by_month[record_month(record)].append(record)
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    for month, month_records in sorted(by_month.items()):
+        with gzip.open(segment_path(month), "at", encoding="utf-8") as f:
+            for record in month_records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        dates = [record.get("published_date", "") for record in month_records]
+        entry = index["segments"].setdefault(month, {"file": os.path.basename(segment_path(month)), "records": 0,
+                                                     "first_date": min(dates), "last_date": max(dates)})
+        entry["records"] += len(month_records)
+        entry["first_date"] = min(entry["first_date"], min(dates))
+        entry["last_date"] = max(entry["last_date"], max(dates))
+
+
+#4
+def is_cold(record, cutoff):
+    # Records without a date stay hot – we can't tell how old they are
+    return bool(record.get("published_date")) and record["published_date"] < cutoff
+
+
+def recover_compaction(index, posted):
+    """
+    Finishes a compaction that crashed, using the marker it left in the index (segment sizes before it
+    appended, and its cutoff):
+    - The hot file still holds records older than the cutoff: it was never replaced, so the segments are
+      truncated back to their old sizes and the compaction simply runs again.
+    - Otherwise the hot file was replaced: the appended records are kept and their months recounted.
+    Caller holds state_lock(POSTED_NEWS_FILE).
+    """
+    pending = index.pop("pending")
+    rolled_back = any(is_cold(record, pending["cutoff"]) for record in posted)
+
+    for month, size in pending["sizes"].items():
+        path = segment_path(month)
+        if rolled_back:
+            if size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+            elif os.path.exists(path):
+                os.remove(path)
+        elif os.path.exists(path):
+            count, first_date, last_date = segment_stats(path)
+            index["segments"][month] = {"file": os.path.basename(path), "records": count,
+                                        "first_date": first_date, "last_date": last_date}
+
+    save_index(index)
+    increment("compactions_recovered", outcome="rolled_back" if rolled_back else "completed")
+    logger.warning("♻️ Interrupted compaction %s.", "rolled back" if rolled_back else "completed")
+
+
+@timed("compaction")
+def compact_posted_news(hot_days=POSTED_HOT_DAYS, force=False):
+    """
+    Moves posted records older than `hot_days` into the archive. Runs at most once a day unless forced.
+    Segments are written before the hot file, so a crash never loses a record. The index gets a
+    "pending" marker first, so the next run can undo or finish an interrupted compaction
+    (recover_compaction()) instead of appending the same records again.
+
+    :return: Number of records archived.
+    """
+    if hot_days <= 0:
+        return 0
+
+    today = datetime.today().strftime("%Y-%m-%d")
+    with state_lock(POSTED_NEWS_FILE):
+        index = load_index()
+        due = force or index.get("last_compacted") != today
+        if not due and "pending" not in index:
+            return 0
+
+        posted = read_json_checked(POSTED_NEWS_FILE, [])
+        if "pending" in index:
+            recover_compaction(index, posted)
+        if not due:
+            return 0
+
+        cutoff = (datetime.today() - timedelta(days=hot_days)).strftime("%Y-%m-%d")
+        cold = [record for record in posted if is_cold(record, cutoff)]
+
+        if cold:
+            months = {record_month(record) for record in cold}
+            index["pending"] = {"cutoff": cutoff, "sizes": {month: os.path.getsize(segment_path(month))
+                                                            if os.path.exists(segment_path(month)) else 0
+                                                            for month in months}}
+            save_index(index)
+
+            append_to_segments(cold, index)
+            hot = [record for record in posted if not is_cold(record, cutoff)]
+            write_json_atomic(POSTED_NEWS_FILE, hot)
+            index.pop("pending")
+            increment("records_archived", len(cold))
+            logger.info("🗄️ Archived %d posted records older than %s (%d remain hot).", len(cold), cutoff, len(hot))
+
+        index["last_compacted"] = today
+        save_index(index)
+    return len(cold)
+
+
+#5
+def iter_archived(since=None, until=None):
+    """
+    Yields archived records, reading only the segments whose date range overlaps [since, until].
+    Dates are "YYYY-MM-DD" (or a "YYYY-MM" prefix).
+    """
+    for month, entry in sorted(load_index()["segments"].items()):
+        if since and entry["last_date"] < since:
+            continue
+        if until and entry["first_date"][:len(until)] > until:
+            continue
+        with gzip.open(os.path.join(ARCHIVE_DIR, entry["file"]), "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+#6
+def rebuild_index():
+    """
+    Rebuilds the index from the segment files, dropping duplicate records (same URL and hash)
+    that an interrupted compaction may have left behind.
+    """
+    with state_lock(POSTED_NEWS_FILE):
+        index = load_index()
+        index["segments"] = {}
+        removed = 0
+
+        for path in sorted(glob.glob(os.path.join(ARCHIVE_DIR, "posted_*.jsonl.gz"))):
+            month = os.path.basename(path)[len("posted_"):-len(".jsonl.gz")]
+            seen = set()
+            records = []
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    key = (record.get("url"), record.get("text_hash"))
+                    if key in seen:
+                        removed += 1
+                        continue
+                    seen.add(key)
+                    records.append(record)
+
+            temp_path = path + ".tmp"
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(temp_path, path)
+
+            dates = [record.get("published_date", "") for record in records] or [""]
+            index["segments"][month] = {"file": os.path.basename(path), "records": len(records),
+                                        "first_date": min(dates), "last_date": max(dates)}
+
+        save_index(index)
+
+    logger.info("🗂️ Index rebuilt: %d segments, %d records (%d duplicates removed).",
+                len(index["segments"]), sum(entry["records"] for entry in index["segments"].values()), removed)
+    return index
+
+
+#7
+def search_archive(term, since=None, until=None):
+    term = term.lower()
+    return [record for record in iter_archived(since, until)
+            if term in record.get("title", "").lower() or term in record.get("summary", "").lower()
+            or term in record.get("url", "").lower()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the posted-news archive.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact_parser = commands.add_parser("compact", help="Move records older than the hot window into the archive")
+    compact_parser.add_argument("--hot-days", type=int, default=POSTED_HOT_DAYS)
+    commands.add_parser("rebuild-index", help="Rescan segments, drop duplicates and rewrite the index")
+    search_parser = commands.add_parser("search", help="Search archived titles, summaries and URLs")
+    search_parser.add_argument("term")
+    search_parser.add_argument("--since", help="YYYY-MM or YYYY-MM-DD")
+    search_parser.add_argument("--until", help="YYYY-MM or YYYY-MM-DD")
+    commands.add_parser("stats", help="Show archive segments")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        print(f"🗄️ Archived {compact_posted_news(args.hot_days, force=True)} records.")
+    elif args.command == "rebuild-index":
+        rebuild_index()
+    elif args.command == "search":
+        for record in search_archive(args.term, args.since, args.until):
+            print(f"{record.get('published_date', '')}  {record.get('title', '')}\n            {record.get('url', '')}")
+    elif args.command == "stats":
+        index = load_index()
+        for month, entry in sorted(index["segments"].items()):
+            print(f"{month}  {entry['records']:>8} records  {entry['first_date']} – {entry['last_date']}  {entry['file']}")
+        print(f"Last compaction: {index.get('last_compacted', 'never')}")
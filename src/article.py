@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# article.py - Compact article record shared by retrieval, filtering, messaging and the stores
+# ==================================================================================================
+# 📦 Built-in libraries
+import sys
+from datetime import datetime
+from urllib.parse import urlparse
+
+
+#1
+class ArticleRecord:
+    """
+    One article, as a slotted object instead of a dict (no per-instance __dict__).
+    - source, rss_source and published_date repeat across thousands of records and are interned.
+    - The summary is optional: posted history is loaded as dedup_view() records (title, URL and hash
+      only – the parser skips the rest), which leaves the bulk of the text on disk. Reading `summary`
+      on such a record returns "", and posted_entry() refuses to write it back.
+    The JSON stores keep their dict format: use from_dict() / to_dict() / posted_entry() / skip_entry().
+    """
+
+    __slots__ = ("id", "title", "url", "text_hash", "published_date", "published_time", "_summary",
+                 "source", "keywords", "rss_source", "relevance_score", "priority", "deferred_at")
+
+    def __init__(self, id="", title="", url="", text_hash=None, published_date="", published_time="", summary="",
+                 source="", keywords=(), rss_source="Unknown", relevance_score=None, priority=None, deferred_at=None):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.text_hash = text_hash
+        self.published_date = sys.intern(published_date or "")
+        self.published_time = published_time or ""
+        self._summary = summary
+        self.source = sys.intern(source or (urlparse(url).netloc if url else ""))
+        self.keywords = list(keywords or ())
+        self.rss_source = sys.intern(rss_source or "Unknown")
+        self.relevance_score = relevance_score
+        self.priority = priority
+        self.deferred_at = deferred_at
+
+    @property
+    def summary(self):
+        return self._summary or ""
+
+    @summary.setter
+    def summary(self, value):
+        self._summary = value or ""
+
+    @property
+    def summary_loaded(self):
+        return self._summary is not None
+
+    def __repr__(self):
+        return f"ArticleRecord(id={self.id!r}, title={self.title!r}, url={self.url!r})"
+
+    #2
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a record from a stored dict. Assigns slots directly – this runs once per history record."""
+        record = cls.__new__(cls)
+        get = data.get
+        record.id = get("id", "")
+        record.title = get("title", "")
+        record.url = get("url", "")
+        record.text_hash = get("text_hash")
+        record.published_date = sys.intern(get("published_date") or "")
+        record.published_time = get("published_time") or ""
+        record._summary = get("summary", "")
+        record.source = sys.intern(get("source") or (urlparse(record.url).netloc if record.url else ""))
+        record.keywords = get("keywords") or []
+        record.rss_source = sys.intern(get("rss_source") or "Unknown")
+        record.relevance_score = get("relevance_score")
+        record.priority = get("priority")
+        record.deferred_at = get("deferred_at")
+        return record
+
+    @classmethod
+    def dedup_view(cls, title, url, text_hash):
+        """A history record as load_posted_records() reads it: title, URL and hash only, summary not loaded."""
+        record = cls.__new__(cls)
+        record.id = ""
+        record.title = title or ""
+        record.url = url or ""
+        record.text_hash = text_hash
+        record.published_date = record.published_time = record.source = ""
+        record._summary = None
+        record.keywords = []
+        record.rss_source = "Unknown"
+        record.relevance_score = record.priority = record.deferred_at = None
+        return record
+
+    def to_dict(self):
+        """Candidate form, as produced by get_google_alerts() (used for the backlog)."""
+        data = {
+            "id": self.id,
+            "title": self.title,
+            "url": self.url,
+            "text_hash": self.text_hash,
+            "published_date": self.published_date,
+            "published_time": self.published_time,
+            "summary": self.summary,
+            "source": self.source,
+            "keywords": self.keywords,
+            "rss_source": self.rss_source,
+        }
+        for field in ("relevance_score", "priority", "deferred_at"):
+            if getattr(self, field) is not None:
+                data[field] = getattr(self, field)
+        return data
+
+    #3
+    def posted_entry(self):
+        """The record as stored in posted_news_ud.json."""
+        if not self.summary_loaded:
+            raise ValueError(f"Summary of {self.url} was not loaded – refusing to overwrite it with an empty one.")
+        return {
+            "title": self.title,
+            "url": self.url,
+            "text_hash": self.text_hash or "",
+            "summary": self.summary,
+            "source": self.source,
+            "keywords": self.keywords,
+            "published_date": self.published_date or datetime.today().strftime("%Y-%m-%d"),
+            "published_time": self.published_time or datetime.today().strftime("%H:%M:%S"),
+            "rss_source": self.rss_source,
+        }
+
+    def skip_entry(self, reason, title=None, url=None):
+        """
+        The record as passed to save_skipped_news(). `title`/`url` override the raw feed values
+        with their cleaned display forms.
+        """
+        return {
+            "id": self.id,
+            "title": title if title is not None else self.title,
+            "url": url if url is not None else self.url,
+            "reason": reason,
+            "summary": self.summary,
+            "text_hash": self.text_hash or "",
+            "source": self.source,
+            "published_date": self.published_date or datetime.today().strftime("%Y-%m-%d"),
+            "published_time": self.published_time or datetime.today().strftime("%H:%M:%S"),
+            "rss_source": self.rss_source,
+        }
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# backfill.py - Checkpointed multi-day catch-up after an outage
+# ==================================================================================================
+# Reads every feed entry of the last --days days (ignoring the poll schedule and feed checkpoints),
+# removes duplicates across the whole window, splits it into one slice per published day and runs
+# the slices, oldest first and one at a time, through the normal dedup/fetch/summarize/send path –
+# which downloads EXTRACTION_WORKERS pages at once and summarizes in batches.
+# Each finished day is recorded in BACKFILL_STATE_FILE, so a rerun resumes with the days still open.
+# Throughput (articles/minute) is logged after every slice.
+#
+#   python backfill.py --days 7                  # Catch up on the last week (resumes if interrupted)
+#   python backfill.py --days 7 --restart        # Forget finished days and start over
+#   python backfill.py --status
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import sys
+import time
+from datetime import datetime
+from config import logger, BACKFILL_STATE_FILE, shutdown_logging
+from json_handler import state_lock, read_json_checked, write_json_atomic
+from news_retrieval import get_google_alerts, filter_new_articles
+from messaging import post_articles_to_telegram
+from summarizer import shutdown_summarizer_pool
+from text_processing import clean_title_for_matching, clean_url
+from lock_manager import create_lock, remove_lock, is_script_running
+from metrics import timed, increment, set_gauge, write_run_report
+from resource_governor import governor
+import http_client
+
+
+#1
+def load_state():
+    with state_lock(BACKFILL_STATE_FILE, exclusive=False):
+        return read_json_checked(BACKFILL_STATE_FILE, {"completed": {}})
+
+
+def mark_day_completed(day, articles, sent):
+    with state_lock(BACKFILL_STATE_FILE):
+        state = read_json_checked(BACKFILL_STATE_FILE, {"completed": {}})
+        state.setdefault("completed", {})[day] = {
+            "articles": articles,
+            "sent": sent,
+            "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        write_json_atomic(BACKFILL_STATE_FILE, state)
+
+
+def reset_state():
+    with state_lock(BACKFILL_STATE_FILE):
+        write_json_atomic(BACKFILL_STATE_FILE, {"completed": {}})
+
+
+#2
+def dedupe_window(articles):
+    """
+    Keeps the earliest copy of each story across the whole window, matched by title, URL or text hash.
+    A later slice would also catch a repeat against the posted history – but only once the earlier
+    copy was sent, so a copy that was skipped or deferred would otherwise be tried again.
+    """
+    seen_titles, seen_urls, seen_hashes = set(), set(), set()
+    unique = []
+    for article in sorted(articles, key=lambda a: (a.published_date, a.published_time)):
+        title = clean_title_for_matching(article.title)
+        url = clean_url(article.url)
+        if title in seen_titles or url in seen_urls or (article.text_hash and article.text_hash in seen_hashes):
+            increment("backfill_window_duplicates")
+            continue
+        seen_titles.add(title)
+        seen_urls.add(url)
+        if article.text_hash:
+            seen_hashes.add(article.text_hash)
+        unique.append(article)
+    return unique
+
+
+def split_by_day(articles):
+    slices = {}
+    for article in articles:
+        slices.setdefault(article.published_date, []).append(article)
+    return dict(sorted(slices.items()))
+
+
+#3
+def process_slice(articles):
+    with timed("backfill_slice"):
+        # Checked against the history per slice, so it includes what the previous days just posted
+        articles = filter_new_articles(articles)
+        sent, deferred = post_articles_to_telegram(articles, shutdown_pool=False, defer_to_backlog=False)
+    return len(articles), len(sent), len(deferred)
+
+
+def run_backfill(days):
+    """
+    Backfills the last `days` days. Returns the number of days still open (0 when done).
+    Slices run one at a time, so each day is checked against what the earlier days posted. The
+    concurrency is bounded inside a slice: EXTRACTION_WORKERS pages are downloaded and parsed at once,
+    and the summaries are batched across the summarizer's workers (SUMMARIZER_BATCH_SIZE).
+    """
+    # One read of the feeds covers the window – an RSS feed can't be asked for a single day. This is
+    # only the entries' metadata; pages are fetched and summarized slice by slice.
+    with timed("backfill_retrieval"):
+        articles = get_google_alerts(time_range=days, incremental=False)
+    articles = dedupe_window(articles)
+
+    completed = load_state().get("completed", {})
+    all_slices = split_by_day(articles)
+    slices = {day: items for day, items in all_slices.items() if day not in completed}
+    if len(slices) < len(all_slices):
+        logger.info("⏭️ Resuming backfill – %d days already done.", len(all_slices) - len(slices))
+    total_articles = sum(len(items) for items in slices.values())
+    logger.info("🧺 Backfilling %d articles in %d day slices.", total_articles, len(slices))
+
+    start = time.perf_counter()
+    done_articles = done_sent = 0
+    open_days = 0
+    for position, (day, items) in enumerate(slices.items()):
+        try:
+            count, sent, deferred = process_slice(items)
+        except Exception as e:
+            logger.error("❌ Backfill of %s failed – it will be retried on the next run: %s", day, e)
+            open_days += 1
+            continue
+
+        done_articles += len(items)
+        done_sent += sent
+        if deferred:
+            # Cut off by the run budget – this day and the later ones stay open for the next run
+            # (dedup skips what was already sent)
+            remaining = len(slices) - position
+            logger.warning("⏳ %s: %d articles deferred – %d days left open.", day, deferred, remaining)
+            open_days += remaining
+            break
+        mark_day_completed(day, count, sent)
+        increment("backfill_days_processed")
+
+        minutes = max((time.perf_counter() - start) / 60, 1e-6)
+        set_gauge("backfill_articles_per_minute", round(done_articles / minutes, 2))
+        logger.info("📈 Backfill %s done: %d/%d articles in %.1f min – %.1f articles/min, %d sent (%.1f/min)",
+                    day, done_articles, total_articles, minutes, done_articles / minutes, done_sent, done_sent / minutes)
+
+    shutdown_summarizer_pool()
+    return open_days
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Catch up on several days of news, one checkpointed day at a time.")
+    parser.add_argument("--days", type=int, default=7, help="How many days back to backfill (default 7)")
+    parser.add_argument("--restart", action="store_true", help="Forget finished days and start over")
+    parser.add_argument("--status", action="store_true", help="Show the finished days and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        for day, info in sorted(load_state().get("completed", {}).items()):
+            print(f"{day}: {info['articles']} articles, {info['sent']} sent (finished {info['finished_at']})")
+        sys.exit(0)
+
+    if is_script_running() or not create_lock():
+        logger.info("Another run is in progress. Exiting.")
+        sys.exit(0)
+
+    exit_code = 0
+    try:
+        if args.restart:
+            reset_state()
+        governor.start()
+        open_days = run_backfill(args.days)
+        if open_days:
+            logger.warning("⚠️ %d days left open – run again to resume.", open_days)
+        else:
+            logger.info("✅ Backfill complete.")
+        exit_code = 1 if open_days else 0
+    finally:
+        remove_lock()
+        http_client.close()
+        governor.stop()
+        write_run_report()
+        shutdown_logging()
+    sys.exit(exit_code)
@@ -6,19 +6,36 @@
 # ==================================================================================================
 import os
 import sys
+import socket
+import atexit
+import queue
 import logging
-from logging.handlers import RotatingFileHandler
+import multiprocessing
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from dotenv import load_dotenv
 
+# Load environment variables (LOG_LEVEL must be known before logging is set up)
+load_dotenv()
+
+log_listener = None
+
 # Set up logging first before it's used
 def setup_logging():
-    """Initialize the logging system with console and file handlers"""
+    """
+    Initialize the logging system with console and file handlers.
+    Records go through a QueueHandler and are written by a background QueueListener thread,
+    so hot loops never block on console or file I/O. Summarization worker processes (and the
+    forkserver they are forked from) log directly: they must stay free of threads to fork safely.
+    """
+    global log_listener
+
+    level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
     logger = logging.getLogger('news_aggregator')
-    logger.setLevel(logging.INFO)
+    logger.setLevel(level)
     
     # Create console handler with formatting
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
+    console_handler.setLevel(level)
     
     # Create file handler with rotation (10 MB per file, keep 5 backup files)
     file_handler = RotatingFileHandler('app.log', maxBytes=10*1024*1024, backupCount=5)
@@ -29,21 +46,73 @@ def setup_logging():
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
     
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    if multiprocessing.parent_process() is not None:
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+        return logger
+
+    # Hand records to a queue; the listener thread does the actual writing
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    log_listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(shutdown_logging)
     
     return logger
 
+
+def shutdown_logging():
+    """Flushes queued log records. Call before os._exit(), which skips atexit handlers."""
+    global log_listener
+
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
 # Initialize logger before using it
 logger = setup_logging()
 
-# Load environment variables
-load_dotenv()
-
 # Global constants
 LOCK_FILE = "script_running.lock"
 POSTED_NEWS_FILE = "posted_news_ud.json"
+SKIPPED_NEWS_FILE = "skipped_news_ud.json"
+
+# Retention: posted records older than the hot window move to monthly archive segments (0 = keep all)
+POSTED_HOT_DAYS = int(os.getenv("POSTED_HOT_DAYS", "30"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+
+# Per-feed checkpoints: entries a feed already delivered are dropped right after parsing. Ids are
+# kept for entries within the grace window of the feed's newest timestamp; older entries are skipped outright
+FEED_CHECKPOINTS_ENABLED = os.getenv("FEED_CHECKPOINTS_ENABLED", "true").lower() in ("1", "true", "yes")
+FEED_CHECKPOINT_FILE = os.getenv("FEED_CHECKPOINT_FILE", "feed_checkpoints_ud.json")
+FEED_CHECKPOINT_GRACE_HOURS = float(os.getenv("FEED_CHECKPOINT_GRACE_HOURS", "48"))
+
+# Adaptive polling: each feed is fetched when ~1 new entry is expected from its observed rate,
+# within these bounds; failing feeds back off exponentially. FEED_RATE_SMOOTHING is the EWMA weight of the latest poll
+FEED_SCHEDULE_ENABLED = os.getenv("FEED_SCHEDULE_ENABLED", "true").lower() in ("1", "true", "yes")
+FEED_SCHEDULE_FILE = os.getenv("FEED_SCHEDULE_FILE", "feed_schedule_ud.json")
+FEED_POLL_MIN_MINUTES = float(os.getenv("FEED_POLL_MIN_MINUTES", "15"))
+FEED_POLL_MAX_HOURS = float(os.getenv("FEED_POLL_MAX_HOURS", "24"))
+FEED_RATE_SMOOTHING = float(os.getenv("FEED_RATE_SMOOTHING", "0.3"))
+
+# State stores: fsync before the atomic replace (crash-safe), and the JSON indent (compact by
+# default – encoding with indent is about twice as slow; set e.g. 4 for human-readable files)
+STATE_FSYNC = os.getenv("STATE_FSYNC", "true").lower() in ("1", "true", "yes")
+STATE_JSON_INDENT = int(os.getenv("STATE_JSON_INDENT")) if os.getenv("STATE_JSON_INDENT") else None
+# On-disk format of the stores: json | orjson | msgspec | msgpack, optionally zstd-compressed (see serialization.py)
+STATE_FORMAT = os.getenv("STATE_FORMAT", "json").lower()
+STATE_COMPRESSION = os.getenv("STATE_COMPRESSION", "none").lower()
+STATE_ZSTD_LEVEL = int(os.getenv("STATE_ZSTD_LEVEL", "3"))
+
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")  # Per-run JSON reports
+METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE", os.path.join(METRICS_DIR, "cybernewsbot.prom"))
+
+# Profiling (main.py --profile): sampling interval, functions listed per stage, and the stages that
+# get tracemalloc allocation snapshots
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "20"))
+PROFILE_ALLOC_STAGES = [stage.strip() for stage in os.getenv("PROFILE_ALLOC_STAGES", "history_load,dedup_index,json_load").split(",") if stage.strip()]
 
 # Load RSS feed URLs from environment variables or a secure configuration file
 RSS_FEED_URL = os.getenv("RSS_FEED_URL", "").split(",")
@@ -77,8 +146,139 @@ API_KEY = os.getenv("API_KEY")
 SEARCH_ENGINE_ID = os.getenv("SEARCH_ENGINE_ID")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
 TEAMS_WEBHOOK_URL = os.getenv("TEAMS_WEBHOOK_URL")
 
+# Shared HTTP client (http_client.py): timeouts in seconds, retries with exponential backoff + jitter,
+# keep-alive pool size per host, HTTP/2 when httpx[http2] is installed, per-host circuit breakers
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "Mozilla/5.0 (compatible; CyberNewsBot/1.0)")
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "60"))
+
+# Tokenizer for keywords/relevance: "regex" (fast, no NLTK data needed) or "nltk" (word_tokenize + punkt)
+KEYWORD_TOKENIZER = os.getenv("KEYWORD_TOKENIZER", "regex").lower()
+
+# Pre-fetch relevance filter: scores alert hits before their full text is downloaded.
+# RELEVANCE_FILTER_MODE: "off" (default), "log" (logs and counts what would be dropped, drops nothing) or
+# "drop" (drops them – dropped alerts are never retried). RELEVANCE_FILTER_ENABLED=true still means "drop"
+RELEVANCE_FILTER_MODE = os.getenv("RELEVANCE_FILTER_MODE", "drop" if os.getenv("RELEVANCE_FILTER_ENABLED", "").lower()
+                                  in ("1", "true", "yes") else "off").lower()
+RELEVANCE_MIN_SCORE = float(os.getenv("RELEVANCE_MIN_SCORE", "1"))
+RELEVANCE_LANGUAGES = [lang.strip().lower() for lang in os.getenv("RELEVANCE_LANGUAGES", "en").split(",") if lang.strip()]
+BLOCKED_DOMAINS = [domain.strip().lower() for domain in os.getenv("BLOCKED_DOMAINS", "").split(",") if domain.strip()]
+CYBER_KEYWORDS = [word.strip().lower() for word in os.getenv("CYBER_KEYWORDS", "").split(",") if word.strip()]  # Replaces the built-in lexicon if set
+
+# Full-text search index over posted and skipped articles (search_index.py), updated on every save
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+SEARCH_INDEX_DB = os.getenv("SEARCH_INDEX_DB", "search_index.db")
+
+# Backfill (backfill.py): finished day slices are checkpointed here
+BACKFILL_STATE_FILE = os.getenv("BACKFILL_STATE_FILE", "backfill_ud.json")
+
+# Retry scheduling for skipped articles (retry_scheduler.py). Network/send errors back off exponentially
+# from RETRY_BASE_MINUTES up to RETRY_MAX_HOURS; pages with too little text wait RETRY_SHORT_TEXT_HOURS
+# (doubling), and are never retried on NON_ARTICLE_DOMAINS (video/social/podcast sites with no article text)
+RETRY_BASE_MINUTES = float(os.getenv("RETRY_BASE_MINUTES", "30"))
+RETRY_MAX_HOURS = float(os.getenv("RETRY_MAX_HOURS", "24"))
+RETRY_SHORT_TEXT_HOURS = float(os.getenv("RETRY_SHORT_TEXT_HOURS", "6"))
+NON_ARTICLE_DOMAINS = [domain.strip().lower() for domain in os.getenv(
+    "NON_ARTICLE_DOMAINS", "youtube.com,youtu.be,vimeo.com,tiktok.com,twitter.com,x.com,facebook.com,instagram.com,"
+                           "linkedin.com,reddit.com,t.me,open.spotify.com,podcasts.apple.com").split(",") if domain.strip()]
+RETRY_INDEX_FILE = os.getenv("RETRY_INDEX_FILE", "retry_index_ud.json")
+
+# Article pages downloaded and parsed at once per run (or backfill slice); the memory governor lets only
+# one through at a time under pressure
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "4"))
+
+# Memory governor (resource_governor.py): watches the RSS of this process and its workers and the available
+# system memory during a run. Under pressure (less than MEMORY_LOW_AVAILABLE_MB available, or RSS above 80% of
+# MEMORY_RSS_LIMIT_MB; 0 = no RSS limit) summarization batches shrink and pages are extracted one at a time;
+# when critical (MEMORY_CRITICAL_AVAILABLE_MB / the RSS limit) the model is unloaded between phases
+MEMORY_GOVERNOR_ENABLED = os.getenv("MEMORY_GOVERNOR_ENABLED", "true").lower() in ("1", "true", "yes")
+MEMORY_SAMPLE_INTERVAL_MS = float(os.getenv("MEMORY_SAMPLE_INTERVAL_MS", "250"))
+MEMORY_LOW_AVAILABLE_MB = int(os.getenv("MEMORY_LOW_AVAILABLE_MB", "1024"))
+MEMORY_CRITICAL_AVAILABLE_MB = int(os.getenv("MEMORY_CRITICAL_AVAILABLE_MB", "400"))
+MEMORY_RSS_LIMIT_MB = int(os.getenv("MEMORY_RSS_LIMIT_MB", "0"))
+
+# Push ingestion (push_receiver.py): WebSub callback and generic webhook receiver; polling stays the fallback.
+# PUSH_CALLBACK_URL is the receiver's public address given to hubs; PUSH_SECRET signs WebSub deliveries
+# (X-Hub-Signature) and is the webhook token. PUSH_HUB_URL is used for feeds that don't advertise a hub
+PUSH_RECEIVER_HOST = os.getenv("PUSH_RECEIVER_HOST", "0.0.0.0")
+PUSH_RECEIVER_PORT = int(os.getenv("PUSH_RECEIVER_PORT", "8780"))
+PUSH_CALLBACK_URL = os.getenv("PUSH_CALLBACK_URL", "").rstrip("/")
+PUSH_HUB_URL = os.getenv("PUSH_HUB_URL", "https://pubsubhubbub.appspot.com/")
+PUSH_SECRET = os.getenv("PUSH_SECRET", "")
+PUSH_LEASE_SECONDS = int(os.getenv("PUSH_LEASE_SECONDS", "864000"))  # 10 days; renewed a day before expiry
+PUSH_BATCH_SECONDS = float(os.getenv("PUSH_BATCH_SECONDS", "10"))  # Deliveries collected into one processing pass
+PUSH_SUBSCRIPTIONS_FILE = os.getenv("PUSH_SUBSCRIPTIONS_FILE", "push_subscriptions_ud.json")
+
+# Priority scheduling and per-run budgets (0 = no limit); unprocessed articles go to the backlog
+RUN_WALL_BUDGET_SECONDS = float(os.getenv("RUN_WALL_BUDGET_SECONDS", "0"))
+RUN_CPU_BUDGET_SECONDS = float(os.getenv("RUN_CPU_BUDGET_SECONDS", "0"))
+BACKLOG_FILE = os.getenv("BACKLOG_FILE", "backlog_ud.json")
+BACKLOG_MAX_AGE_DAYS = int(os.getenv("BACKLOG_MAX_AGE_DAYS", "3"))
+RECENCY_HALF_LIFE_HOURS = float(os.getenv("RECENCY_HALF_LIFE_HOURS", "12"))
+# Priority weight per country (the values of RSS_COUNTRY_MAPPINGS), e.g. "Israel:2,USA:1.5"; default 1
+FEED_WEIGHTS = {}
+for pair in os.getenv("FEED_WEIGHTS", "").split(","):
+    if ":" in pair:
+        country, weight = pair.rsplit(":", 1)
+        try:
+            FEED_WEIGHTS[country.strip()] = float(weight)
+        except ValueError:
+            logger.error(f"Invalid FEED_WEIGHTS entry: {pair}")
+
+# Multi-node coordination – off unless COORDINATION_DB points at a SQLite file every node can reach.
+# "wal" journaling for nodes on one host; use "delete" when the file is on a network file system.
+COORDINATION_DB = os.getenv("COORDINATION_DB", "")
+COORDINATION_JOURNAL_MODE = os.getenv("COORDINATION_JOURNAL_MODE", "wal").lower()
+NODE_ID = os.getenv("NODE_ID", socket.gethostname())
+CLUSTER_NODES = [node.strip() for node in os.getenv("CLUSTER_NODES", "").split(",") if node.strip()]  # Empty = nodes with a live lease
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "120"))
+CLAIM_RETENTION_DAYS = int(os.getenv("CLAIM_RETENTION_DAYS", "30"))
+
+# Summarization model and the optional shared summarization server. SUMMARIZER_TIER picks a model
+# by speed/quality point; SUMMARIZER_MODEL (a model id or local path) overrides it
+SUMMARIZER_TIERS = {
+    "bart": "facebook/bart-large-cnn",               # Best quality, slowest (12 encoder + 12 decoder layers)
+    "distilbart": "sshleifer/distilbart-cnn-12-6",   # 6 decoder layers – roughly 2x faster generation
+    "distilbart-6-6": "sshleifer/distilbart-cnn-6-6",  # 6 + 6 layers – fastest, lowest quality
+}
+SUMMARIZER_TIER = os.getenv("SUMMARIZER_TIER", "bart").lower()
+SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL") or SUMMARIZER_TIERS.get(SUMMARIZER_TIER, SUMMARIZER_TIERS["bart"])
+# Decoding – unset values keep the model's own defaults (bart-large-cnn: 4 beams, length penalty 2.0,
+# early stopping). SUMMARIZER_GREEDY=true forces a single beam, the fastest setting
+SUMMARIZER_NUM_BEAMS = int(os.getenv("SUMMARIZER_NUM_BEAMS")) if os.getenv("SUMMARIZER_NUM_BEAMS") else None
+SUMMARIZER_GREEDY = os.getenv("SUMMARIZER_GREEDY", "false").lower() in ("1", "true", "yes")
+SUMMARIZER_LENGTH_PENALTY = float(os.getenv("SUMMARIZER_LENGTH_PENALTY")) if os.getenv("SUMMARIZER_LENGTH_PENALTY") else None
+SUMMARIZER_EARLY_STOPPING = os.getenv("SUMMARIZER_EARLY_STOPPING", "").lower() in ("1", "true", "yes") if os.getenv("SUMMARIZER_EARLY_STOPPING") else None
+SUMMARIZER_SERVER_ENABLED = os.getenv("SUMMARIZER_SERVER_ENABLED", "true").lower() in ("1", "true", "yes")
+SUMMARIZER_SERVER_HOST = os.getenv("SUMMARIZER_SERVER_HOST", "127.0.0.1")
+SUMMARIZER_SERVER_PORT = int(os.getenv("SUMMARIZER_SERVER_PORT", "8765"))
+SUMMARIZER_SERVER_TIMEOUT = float(os.getenv("SUMMARIZER_SERVER_TIMEOUT", "120"))
+SUMMARIZER_BATCH_SIZE = int(os.getenv("SUMMARIZER_BATCH_SIZE", "8"))
+SUMMARIZER_BATCH_WAIT_MS = int(os.getenv("SUMMARIZER_BATCH_WAIT_MS", "50"))
+
+# Multi-process summarization (each worker holds its own model replica)
+SUMMARIZER_POOL_ENABLED = os.getenv("SUMMARIZER_POOL_ENABLED", "false").lower() in ("1", "true", "yes")
+SUMMARIZER_WORKERS = os.getenv("SUMMARIZER_WORKERS", "auto")  # "auto" or a fixed number of workers
+SUMMARIZER_THREADS_PER_WORKER = int(os.getenv("SUMMARIZER_THREADS_PER_WORKER", "2"))
+SUMMARIZER_WORKER_MEMORY_MB = int(os.getenv("SUMMARIZER_WORKER_MEMORY_MB", "2500"))  # Budget per model replica
+SUMMARIZER_RESERVED_CORES = int(os.getenv("SUMMARIZER_RESERVED_CORES", "1"))  # Left free for network work
+
+# How model weights are loaded: "default" (private copy per process), "mmap" (memory-mapped weights file
+# shared through the page cache) or "fork" (workers come from a forkserver that loads the model once on
+# start via summarizer_preload.py and share its pages copy-on-write; the bot process itself is never forked)
+SUMMARIZER_LOAD_MODE = os.getenv("SUMMARIZER_LOAD_MODE", "default").lower()
+SUMMARIZER_MMAP_DIR = os.getenv("SUMMARIZER_MMAP_DIR", "model_cache")
+
 # Add validation after all environment variables are loaded
 def validate_env_vars():
     """Validate all required environment variables"""
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# coordination.py - Multi-node runs: feed sharding, leases with heartbeat and the shared claim store
+# ==================================================================================================
+# All state lives in one SQLite database (COORDINATION_DB) that every node can reach. Without it,
+# every function here is a no-op and the bot behaves like a single instance.
+# 📦 Built-in libraries
+import bisect
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from config import (logger, COORDINATION_DB, COORDINATION_JOURNAL_MODE, NODE_ID, CLUSTER_NODES,
+                    LEASE_TTL_SECONDS, CLAIM_RETENTION_DAYS)
+from metrics import increment
+
+coordination_enabled = bool(COORDINATION_DB)
+OWNER_ID = f"{NODE_ID}:{os.getpid()}"  # Same node name restarted = different owner
+
+thread_state = threading.local()  # One SQLite connection per thread
+held_leases = set()
+heartbeat_stop = threading.Event()
+heartbeat_thread = None
+
+
+#1
+def get_connection():
+    """Opens (once per thread) the coordination database and creates its tables."""
+    connection = getattr(thread_state, "connection", None)
+    if connection is None:
+        connection = sqlite3.connect(COORDINATION_DB, timeout=30, isolation_level=None)
+        connection.execute(f"PRAGMA journal_mode={COORDINATION_JOURNAL_MODE}")
+        connection.execute("PRAGMA synchronous=NORMAL" if COORDINATION_JOURNAL_MODE == "wal" else "PRAGMA synchronous=FULL")
+        connection.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+        connection.execute("CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, owner TEXT NOT NULL, "
+                           "status TEXT NOT NULL, claimed_at REAL NOT NULL)")
+        thread_state.connection = connection
+    return connection
+
+
+def rollback(connection):
+    # A failed BEGIN (e.g. "database is locked" after the busy timeout) or a COMMIT that SQLite already
+    # rolled back leaves no transaction – a ROLLBACK then would raise and hide the original error
+    if connection.in_transaction:
+        connection.execute("ROLLBACK")
+
+
+#2
+class HashRing:
+    """Consistent-hash ring: adding or removing a node only moves the feeds that node owned."""
+
+    def __init__(self, nodes, replicas=64):
+        self.ring = sorted((self.hash_key(f"{node}#{i}"), node) for node in set(nodes) for i in range(replicas))
+        self.positions = [position for position, _ in self.ring]
+
+    @staticmethod
+    def hash_key(key):
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def node_for(self, key):
+        index = bisect.bisect(self.positions, self.hash_key(key)) % len(self.ring)
+        return self.ring[index][1]
+
+
+#3
+def acquire_lease(name, ttl=LEASE_TTL_SECONDS):
+    """
+    Takes (or extends) a named lease. Fails if another owner holds it and it has not expired,
+    so a crashed node's leases are taken over once its heartbeat stops.
+    """
+    if not coordination_enabled:
+        return True
+
+    connection = get_connection()
+    now = time.time()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+        if row and row[0] != OWNER_ID and row[1] > now:
+            rollback(connection)
+            return False
+        connection.execute("INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                           (name, OWNER_ID, now + ttl))
+        connection.execute("COMMIT")
+    except Exception:
+        rollback(connection)
+        raise
+
+    held_leases.add(name)
+    return True
+
+
+#4
+def release_leases():
+    """Releases every lease this process holds and stops the heartbeat."""
+    heartbeat_stop.set()
+    if not coordination_enabled or not held_leases:
+        return
+
+    connection = get_connection()
+    for name in list(held_leases):
+        connection.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, OWNER_ID))
+    held_leases.clear()
+
+
+#5
+def heartbeat_loop():
+    """Renews held leases every third of their TTL; a lease taken over by someone else is dropped."""
+    while not heartbeat_stop.wait(LEASE_TTL_SECONDS / 3):
+        try:
+            connection = get_connection()
+            expires_at = time.time() + LEASE_TTL_SECONDS
+            for name in list(held_leases):
+                renewed = connection.execute("UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                                             (expires_at, name, OWNER_ID)).rowcount
+                if not renewed:
+                    held_leases.discard(name)
+                    increment("lease_lost")
+                    logger.error("❌ Lease '%s' was lost to another node.", name)
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Lease heartbeat failed: %s", e)
+
+
+def start_heartbeat():
+    global heartbeat_thread
+
+    if not coordination_enabled or (heartbeat_thread and heartbeat_thread.is_alive()):
+        return
+    heartbeat_stop.clear()
+    heartbeat_thread = threading.Thread(target=heartbeat_loop, name="lease-heartbeat", daemon=True)
+    heartbeat_thread.start()
+
+
+#6
+def lease_holder(name):
+    """Returns the owner of a live lease, or None."""
+    if not coordination_enabled:
+        return None
+    row = get_connection().execute("SELECT owner FROM leases WHERE name = ? AND expires_at > ?",
+                                   (name, time.time())).fetchone()
+    return row[0] if row else None
+
+
+#7
+def live_nodes():
+    """CLUSTER_NODES if configured, otherwise every node currently holding its node lease."""
+    if CLUSTER_NODES:
+        return list(CLUSTER_NODES)
+    rows = get_connection().execute("SELECT name FROM leases WHERE name LIKE 'node:%' AND expires_at > ?",
+                                    (time.time(),)).fetchall()
+    return sorted({row[0][len("node:"):] for row in rows} | {NODE_ID})
+
+
+#8
+def shard_feeds(feed_urls):
+    """
+    Returns the feeds this node should read: the ones the hash ring assigns to it, each guarded by a
+    feed lease so two nodes never read the same feed while the membership is changing.
+    """
+    if not coordination_enabled:
+        return list(feed_urls)
+
+    ring = HashRing(live_nodes())
+    assigned = [url for url in feed_urls if ring.node_for(url) == NODE_ID]
+
+    leased = []
+    for url in assigned:
+        if acquire_lease(f"feed:{url}"):
+            leased.append(url)
+        else:
+            increment("feed_lease_busy")
+            logger.info("🔒 Feed is being read by another node – skipping: %s", url)
+
+    logger.info("🧩 Node %s reads %d of %d feeds.", NODE_ID, len(leased), len(feed_urls))
+    return leased
+
+
+#9
+def article_claim_keys(url, match_title, text_hash=None):
+    keys = [f"url:{url}", f"title:{match_title}"]
+    if text_hash:
+        keys.append(f"hash:{text_hash}")
+    return keys
+
+
+#10
+def is_claimed_elsewhere(keys):
+    """Read-only check (no lock) used before fetching: already posted, or being posted by another node."""
+    if not coordination_enabled:
+        return False
+
+    placeholders = ",".join("?" * len(keys))
+    row = get_connection().execute(
+        f"SELECT 1 FROM claims WHERE key IN ({placeholders}) AND owner != ? AND (status = 'posted' OR claimed_at > ?) LIMIT 1",
+        (*keys, OWNER_ID, time.time() - LEASE_TTL_SECONDS)).fetchone()
+    return row is not None
+
+
+#11
+def claim_article(keys):
+    """
+    Atomically claims all keys of an article before it is posted. Fails if any key was already
+    posted, or is claimed by another node whose claim has not expired.
+    """
+    if not coordination_enabled:
+        return True
+
+    connection = get_connection()
+    now = time.time()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        for key in keys:
+            row = connection.execute("SELECT owner, status, claimed_at FROM claims WHERE key = ?", (key,)).fetchone()
+            if row and (row[1] == "posted" or (row[0] != OWNER_ID and row[2] > now - LEASE_TTL_SECONDS)):
+                rollback(connection)
+                increment("claims_conflicted")
+                return False
+        connection.executemany("INSERT OR REPLACE INTO claims (key, owner, status, claimed_at) VALUES (?, ?, 'claimed', ?)",
+                               [(key, OWNER_ID, now) for key in keys])
+        connection.execute("COMMIT")
+    except Exception:
+        rollback(connection)
+        raise
+    return True
+
+
+#12
+def mark_posted(keys):
+    if coordination_enabled:
+        get_connection().executemany("UPDATE claims SET status = 'posted', claimed_at = ? WHERE key = ? AND owner = ?",
+                                     [(time.time(), key, OWNER_ID) for key in keys])
+
+
+def release_claims(keys):
+    """Gives up claims after a failed send so another node (or the next run) can retry."""
+    if coordination_enabled:
+        get_connection().executemany("DELETE FROM claims WHERE key = ? AND owner = ? AND status = 'claimed'",
+                                     [(key, OWNER_ID) for key in keys])
+
+
+#13
+def purge_old_claims():
+    """Drops posted claims older than CLAIM_RETENTION_DAYS and expired leases."""
+    if not coordination_enabled:
+        return
+    now = time.time()
+    connection = get_connection()
+    purged = connection.execute("DELETE FROM claims WHERE claimed_at < ?", (now - CLAIM_RETENTION_DAYS * 86400,)).rowcount
+    connection.execute("DELETE FROM leases WHERE expires_at < ?", (now - LEASE_TTL_SECONDS,))
+    if purged:
+        logger.info("🧹 Purged %d old claims from the coordination store.", purged)
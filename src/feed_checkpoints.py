@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# feed_checkpoints.py - Per-feed high-water marks: drop already-seen entries right after parsing
+# ==================================================================================================
+# For each feed we persist the newest published timestamp seen (the high-water mark) and the ids of
+# entries published within FEED_CHECKPOINT_GRACE_HOURS of it. On the next run an entry is dropped
+# before any cleaning, hashing or tokenizing if its id was seen, or if it is older than the mark minus
+# the grace period. Checkpoints are only committed once the run has handled the entries.
+# ==================================================================================================
+# 📦 Built-in libraries
+from datetime import datetime, timedelta
+from config import logger, FEED_CHECKPOINTS_ENABLED, FEED_CHECKPOINT_FILE, FEED_CHECKPOINT_GRACE_HOURS
+from json_handler import state_lock, read_json_checked, write_json_atomic
+from retry_scheduler import due_ids
+from metrics import increment
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+checkpoints = None  # Loaded once per run
+retryable_ids = None
+pending_checkpoints = {}  # Updated marks, written by commit_feed_checkpoints()
+
+
+#1
+def load_checkpoints():
+    global checkpoints
+
+    if checkpoints is None:
+        with state_lock(FEED_CHECKPOINT_FILE, exclusive=False):
+            checkpoints = read_json_checked(FEED_CHECKPOINT_FILE, {})
+    return checkpoints
+
+
+def load_retryable_ids():
+    """
+    Ids of skipped entries whose retry is due (retry_scheduler.py – only the sorted index is read).
+    They bypass the checkpoint, so the feed's fresh copy is retried; entries still backing off are dropped.
+    """
+    global retryable_ids
+
+    if retryable_ids is None:
+        retryable_ids = set(due_ids())
+    return retryable_ids
+
+
+def reset_checkpoint_cache():
+    """Makes the next call re-read the stores – for long-lived processes (push_receiver.py) between passes."""
+    global checkpoints, retryable_ids
+
+    checkpoints = None
+    retryable_ids = None
+
+
+def entry_published(entry):
+    if hasattr(entry, "published_parsed") and entry.published_parsed:
+        return datetime(*entry.published_parsed[:6]).strftime(TIMESTAMP_FORMAT)
+    return ""
+
+
+def shift(timestamp, hours):
+    return (datetime.strptime(timestamp, TIMESTAMP_FORMAT) + timedelta(hours=hours)).strftime(TIMESTAMP_FORMAT)
+
+
+#2
+def filter_unseen_entries(rss_url, entries):
+    """
+    Drops entries this feed already delivered and records the feed's new checkpoint as pending.
+
+    :return: The entries still to be processed.
+    """
+    if not FEED_CHECKPOINTS_ENABLED:
+        return entries
+
+    checkpoint = load_checkpoints().get(rss_url, {})
+    seen = checkpoint.get("seen", {})
+    high_water = checkpoint.get("high_water", "")
+    floor = shift(high_water, -FEED_CHECKPOINT_GRACE_HOURS) if high_water else ""
+    retry = load_retryable_ids()
+
+    fresh = []
+    new_high_water = high_water
+    current_ids = {}
+    for entry in entries:
+        entry_id = getattr(entry, "id", None)
+        published = entry_published(entry)
+        new_high_water = max(new_high_water, published)
+        if entry_id:
+            current_ids[entry_id] = published
+
+        if entry_id in retry:
+            fresh.append(entry)
+        elif (entry_id and entry_id in seen) or (published and floor and published < floor):
+            continue
+        else:
+            fresh.append(entry)
+
+    # Ids older than the grace window are covered by the high-water mark alone
+    new_floor = shift(new_high_water, -FEED_CHECKPOINT_GRACE_HOURS) if new_high_water else ""
+    merged = {**seen, **current_ids}
+    pending_checkpoints[rss_url] = {
+        "high_water": new_high_water,
+        "seen": {entry_id: published for entry_id, published in merged.items() if not published or published >= new_floor},
+    }
+
+    short_circuited = len(entries) - len(fresh)
+    if short_circuited:
+        increment("feed_entries_short_circuited", short_circuited, feed=rss_url)
+        logger.info("⏩ %s: %d of %d entries already seen – skipped before processing.", rss_url, short_circuited, len(entries))
+    return fresh
+
+
+#3
+def commit_feed_checkpoints():
+    """Persists the pending marks. Called once the run has handled the entries, so a crash only means re-reading them."""
+    global checkpoints
+
+    if not pending_checkpoints:
+        return
+
+    with state_lock(FEED_CHECKPOINT_FILE):
+        stored = read_json_checked(FEED_CHECKPOINT_FILE, {})
+        stored.update(pending_checkpoints)
+        write_json_atomic(FEED_CHECKPOINT_FILE, stored)
+    checkpoints = stored
+    logger.debug("📌 Saved checkpoints for %d feeds.", len(pending_checkpoints))
+    pending_checkpoints.clear()
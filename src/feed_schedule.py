@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# feed_schedule.py - Adaptive polling: fetch each feed only when it is likely to have something new
+# ==================================================================================================
+# Per feed we keep a smoothed new-entry rate (entries/hour) and a smoothed error rate. New entries are
+# counted against the entry ids the feed showed before (kept here, independent of feed checkpoints and
+# of retries), so the rate is right whether or not FEED_CHECKPOINTS_ENABLED is set. After each poll
+# the next poll time is set to when about one new entry is expected, bounded by FEED_POLL_MIN_MINUTES
+# and FEED_POLL_MAX_HOURS. Failing feeds back off exponentially from the minimum interval.
+# The schedule is stored in FEED_SCHEDULE_FILE, so it survives restarts.
+#
+#   python feed_schedule.py      # Prints each feed's rate, interval and next poll time
+# ==================================================================================================
+# 📦 Built-in libraries
+from datetime import datetime, timedelta
+from config import (logger, FEED_SCHEDULE_ENABLED, FEED_SCHEDULE_FILE, FEED_POLL_MIN_MINUTES, FEED_POLL_MAX_HOURS,
+                    FEED_RATE_SMOOTHING)
+from json_handler import state_lock, read_json_checked, write_json_atomic
+from metrics import increment
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DUE_SLACK = 0.1  # Poll a feed that is due within 10% of its interval, rather than a whole run later
+MAX_TRACKED_IDS = 500  # Entry ids remembered per feed for counting new entries – well above a feed's length
+
+pending_results = {}  # Feed states updated this run, written by commit_feed_schedule()
+
+
+#1
+def load_schedule():
+    with state_lock(FEED_SCHEDULE_FILE, exclusive=False):
+        return read_json_checked(FEED_SCHEDULE_FILE, {})
+
+
+def due_feeds(feed_urls, now=None):
+    """Returns the feeds whose next poll time has come. Feeds without a schedule yet are always due."""
+    if not FEED_SCHEDULE_ENABLED:
+        return list(feed_urls)
+
+    now = now or datetime.now()
+    schedule = load_schedule()
+    due = []
+    for url in feed_urls:
+        state = schedule.get(url)
+        if not state or not state.get("next_poll"):
+            due.append(url)
+            continue
+        slack = timedelta(seconds=state.get("interval_seconds", 0) * DUE_SLACK)
+        if datetime.strptime(state["next_poll"], TIMESTAMP_FORMAT) - slack <= now:
+            due.append(url)
+        else:
+            increment("feeds_not_due")
+            logger.debug("💤 Feed not due until %s: %s", state["next_poll"], url)
+
+    if len(due) < len(feed_urls):
+        logger.info("🗓️ %d of %d feeds are due for polling.", len(due), len(feed_urls))
+    return due
+
+
+#2
+def next_interval(rate, errors, previous=None):
+    """
+    Seconds until the next poll: ~1 expected new entry, within the bounds; exponential backoff on errors.
+    The interval at most doubles per poll, so one quiet stretch doesn't push a feed straight to the maximum.
+    """
+    min_seconds = FEED_POLL_MIN_MINUTES * 60
+    max_seconds = FEED_POLL_MAX_HOURS * 3600
+    if errors:
+        return min(max_seconds, min_seconds * (2 ** errors))
+    if rate is None:
+        return min_seconds  # No history yet
+    target = max_seconds if rate <= 0 else max(min_seconds, min(max_seconds, 3600 / rate))
+    return min(target, max(previous or min_seconds, min_seconds) * 2)
+
+
+def entry_key(entry):
+    return getattr(entry, "id", None) or getattr(entry, "link", None)
+
+
+def count_new_entries(state, entries):
+    """
+    Counts the entries whose id the feed hasn't shown before and remembers the ids (current ones first).
+    Pushes only carry the new entries, so the earlier ids are kept rather than replaced.
+
+    :return: The number of new entries, or None on the first count for this feed (no baseline yet).
+    """
+    known = state.get("entry_ids")
+    current = list(dict.fromkeys(key for key in map(entry_key, entries) if key))
+    state["entry_ids"] = list(dict.fromkeys(current + (known or [])))[:MAX_TRACKED_IDS]
+    if known is None:
+        return None
+    known = set(known)
+    return sum(1 for key in current if key not in known)
+
+
+def record_poll(url, entries=(), error=False, now=None):
+    """
+    Updates a feed's rates and next poll time after a fetch (kept pending until the run commits).
+    `entries` are all the entries the fetch returned – before checkpoint filtering.
+    """
+    if not FEED_SCHEDULE_ENABLED:
+        return
+
+    now = now or datetime.now()
+    state = dict(pending_results.get(url) or load_schedule().get(url) or {})
+    alpha = FEED_RATE_SMOOTHING
+    state["error_rate"] = round(alpha * (1 if error else 0) + (1 - alpha) * state.get("error_rate", 0), 4)
+
+    if error:
+        state["errors"] = state.get("errors", 0) + 1
+    else:
+        state["errors"] = 0
+        # The first poll only sets the baseline: all its entries look new
+        new_entries = count_new_entries(state, entries)
+        if state.get("last_success") and new_entries is not None:
+            hours = (now - datetime.strptime(state["last_success"], TIMESTAMP_FORMAT)).total_seconds() / 3600
+            observed = new_entries / max(hours, 1 / 60)
+            rate = state.get("rate")
+            state["rate"] = round(observed if rate is None else alpha * observed + (1 - alpha) * rate, 4)
+        else:
+            state.setdefault("rate", None)
+        state["last_success"] = now.strftime(TIMESTAMP_FORMAT)
+
+    interval = next_interval(state.get("rate"), state["errors"], state.get("interval_seconds"))
+    state["interval_seconds"] = int(interval)
+    state["last_polled"] = now.strftime(TIMESTAMP_FORMAT)
+    state["next_poll"] = (now + timedelta(seconds=interval)).strftime(TIMESTAMP_FORMAT)
+    pending_results[url] = state
+
+
+#3
+def commit_feed_schedule():
+    if not pending_results:
+        return
+
+    with state_lock(FEED_SCHEDULE_FILE):
+        stored = read_json_checked(FEED_SCHEDULE_FILE, {})
+        stored.update(pending_results)
+        write_json_atomic(FEED_SCHEDULE_FILE, stored)
+    logger.debug("🗓️ Saved poll schedule for %d feeds.", len(pending_results))
+    pending_results.clear()
+
+
+if __name__ == "__main__":
+    for url, state in sorted(load_schedule().items(), key=lambda item: item[1].get("next_poll", "")):
+        rate = state.get("rate")
+        print(f"{state.get('next_poll', '-'):19}  every {state.get('interval_seconds', 0) / 3600:6.2f} h  "
+              f"rate {'-' if rate is None else f'{rate:.3f}'}/h  errors {state.get('errors', 0)}  {url}")
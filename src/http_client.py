@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# http_client.py - Shared HTTP client: pooled keep-alive connections, timeouts, retries, circuit breakers
+# ==================================================================================================
+# Every network call (feeds, article pages, Telegram, Teams) goes through request()/get()/post(), so:
+# - connections to a host are reused (one keep-alive pool per host; HTTP/2 via httpx if installed)
+# - every call has a connect and a read timeout – nothing can hang a run
+# - transient failures are retried with exponential backoff and full jitter
+# - a host that keeps failing is cut off for a while (circuit breaker) instead of costing a timeout per call
+# Responses are always requests.Response objects and errors requests exceptions, whatever the transport.
+# ==================================================================================================
+# 📦 Built-in libraries
+import random
+import threading
+import time
+from urllib.parse import urlparse
+# 🌐 Third-party libraries
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from config import (logger, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX,
+                    HTTP_POOL_SIZE, HTTP2_ENABLED, HTTP_USER_AGENT, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+from metrics import increment
+
+# 🌐 Optional: httpx with the h2 package gives HTTP/2 (one multiplexed connection per host)
+try:
+    import httpx
+    import h2  # noqa: F401 – only needed so httpx can negotiate HTTP/2
+except ImportError:
+    httpx = None
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without a network call while a host's circuit breaker is open."""
+
+
+#1
+class CircuitBreaker:
+    """
+    Per-host breaker: opens after CIRCUIT_FAILURE_THRESHOLD consecutive failures, rejects calls for
+    CIRCUIT_RESET_SECONDS, then lets one trial call through (half-open) – success closes it again.
+    """
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_seconds and not self.trial_running:
+                self.trial_running = True  # Half-open: exactly one trial call
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release_trial(self):
+        """
+        Ends a half-open trial that was neither a success nor a failure (a 429): the circuit stays open,
+        with its failure count, for another CIRCUIT_RESET_SECONDS before the next trial.
+        """
+        with self.lock:
+            if self.trial_running:
+                self.trial_running = False
+                self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.failures >= self.threshold:
+                reopened = self.opened_at is not None
+                self.opened_at = time.monotonic()
+                return not reopened
+            return False
+
+
+breakers = {}
+breakers_lock = threading.Lock()
+session = None
+http2_client = None
+client_lock = threading.Lock()
+
+
+def get_breaker(host):
+    with breakers_lock:
+        if host not in breakers:
+            breakers[host] = CircuitBreaker()
+        return breakers[host]
+
+
+#2
+def get_session():
+    """The shared requests session: keep-alive pools of HTTP_POOL_SIZE connections per host."""
+    global session
+
+    with client_lock:
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = HTTP_USER_AGENT
+        return session
+
+
+def get_http2_client():
+    global http2_client
+
+    with client_lock:
+        if http2_client is None:
+            http2_client = httpx.Client(http2=True, headers={"User-Agent": HTTP_USER_AGENT},
+                                        limits=httpx.Limits(max_connections=HTTP_POOL_SIZE * 8,
+                                                            max_keepalive_connections=HTTP_POOL_SIZE * 4))
+        return http2_client
+
+
+#3
+def send_once(method, url, timeout, **kwargs):
+    """One attempt over HTTP/2 (https with httpx installed) or the requests session."""
+    if httpx is None or not HTTP2_ENABLED or not url.startswith("https://"):
+        return get_session().request(method, url, timeout=timeout, **kwargs)
+
+    try:
+        response = get_http2_client().request(method, url, timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+                                              follow_redirects=True, **kwargs)
+    except httpx.ConnectTimeout as e:
+        raise requests.exceptions.ConnectTimeout(str(e)) from e
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.ReadTimeout(str(e)) from e
+    except httpx.HTTPError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+
+    # Same interface for callers regardless of the transport
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted._content = response.content
+    converted.encoding = response.encoding
+    converted.url = str(response.url)
+    converted.reason = response.reason_phrase
+    return converted
+
+
+def backoff_delay(attempt, response=None):
+    """Full-jitter exponential backoff; a Retry-After header wins if present (capped at HTTP_BACKOFF_MAX)."""
+    if response is not None and response.headers.get("Retry-After", "").isdigit():
+        return min(float(response.headers["Retry-After"]), HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+#4
+def request(method, url, retries=HTTP_RETRIES, timeout=None, **kwargs):
+    """
+    Sends a request with pooling, timeouts, retries and the host's circuit breaker.
+    Idempotent methods are retried on any transport error; POSTs only when the request can't have
+    been processed (connect timeout, 429, 503), so a message is never sent twice.
+    Returns the final response (check raise_for_status()); raises requests exceptions on transport errors.
+    """
+    method = method.upper()
+    host = urlparse(url).netloc
+    breaker = get_breaker(host)
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            increment("http_circuit_rejected", host=host)
+            raise CircuitOpenError(f"Circuit open for {host} – skipping request")
+
+        response = None
+        try:
+            response = send_once(method, url, timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if breaker.record_failure():
+                logger.warning("🔌 Circuit opened for %s after repeated failures.", host)
+            increment("http_errors", host=host, error=type(e).__name__)
+            retryable = method in IDEMPOTENT_METHODS or isinstance(e, requests.exceptions.ConnectTimeout)
+            if attempt >= retries or not retryable:
+                raise
+            delay = backoff_delay(attempt)
+            logger.debug("🔁 %s %s failed (%s) – retry %d/%d in %.1fs", method, url, e, attempt + 1, retries, delay)
+            time.sleep(delay)
+            continue
+
+        # A 429 is the host pacing us, not failing – it is retried with backoff but doesn't trip the breaker
+        # (and a half-open trial that got one is released, or the host would stay cut off for good)
+        if response.status_code >= 500:
+            if breaker.record_failure():
+                logger.warning("🔌 Circuit opened for %s after repeated failures.", host)
+        elif response.status_code == 429:
+            breaker.release_trial()
+        else:
+            breaker.record_success()
+
+        retryable = response.status_code in RETRY_STATUSES and (method in IDEMPOTENT_METHODS or response.status_code in (429, 503))
+        if not retryable or attempt >= retries:
+            increment("http_requests", host=host, status=response.status_code)
+            return response
+
+        delay = backoff_delay(attempt, response)
+        increment("http_retries", host=host, status=response.status_code)
+        logger.debug("🔁 %s %s returned %d – retry %d/%d in %.1fs", method, url, response.status_code, attempt + 1, retries, delay)
+        time.sleep(delay)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+#5
+def close():
+    """Closes pooled connections (end of run)."""
+    global session, http2_client
+
+    with client_lock:
+        if session is not None:
+            session.close()
+            session = None
+        if http2_client is not None:
+            http2_client.close()
+            http2_client = None
@@ -24,49 +24,198 @@ import requests
 from urllib.parse import urlparse
 import html
 import time
+import contextlib
+import shutil
 from text_processing import compute_text_hash, extract_source_from_url
-from config import POSTED_NEWS_FILE
+from config import logger, POSTED_NEWS_FILE, SKIPPED_NEWS_FILE, RETRY_INDEX_FILE, STATE_FSYNC
+from serialization import encode, decode, decode_fields
+from metrics import timed, increment
+from article import ArticleRecord
+from search_index import update_index
+from retry_scheduler import schedule_retry, build_retry_index
+
+# 🔒 Optional: POSIX file locks (on other platforms the stores are written without a lock)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class StateCorruptedError(Exception):
+    """A state file and its backup both failed validation – refuse to continue with empty history."""
 
 
 #1
-def safe_load_json(filepath, default):
+@contextlib.contextmanager
+def state_lock(filepath, exclusive=True):
+    """
+    Holds an advisory lock on `<filepath>.lock` – shared for reads, exclusive for writes –
+    so overlapping runs never read a half-updated store or interleave their writes.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(filepath + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 
+def file_digest(filepath):
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_digests(filepath):
+    """Digests accepted for `filepath`: the current write and the one before it (see write_json_atomic)."""
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return default
+        with open(filepath + ".sha256", "r", encoding="utf-8") as f:
+            return set(f.read().split())
+    except FileNotFoundError:
+        return None
+
 
 #2
-def load_posted_news():
-    try:
-        with open(POSTED_NEWS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data if isinstance(data, list) else []
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+def write_json_atomic(filepath, data, state_format=None, compression=None):
+    """
+    Crash-safe write of a store (in STATE_FORMAT unless given):
+    1. The new content goes to a temp file (fsynced unless STATE_FSYNC=false).
+    2. The checksum sidecar is updated to accept both the new and the current content.
+    3. The current file is hard-linked to `.bak` as the last good snapshot.
+    4. The temp file atomically replaces the store.
+    A crash at any point leaves either the old or the new file, each matching the sidecar.
+    Caller must hold state_lock(filepath).
+    """
+    payload = encode(data, state_format, compression)
+    digest = hashlib.sha256(payload).hexdigest()
+
+    temp_file = filepath + ".tmp"
+    with open(temp_file, "wb") as f:
+        f.write(payload)
+        if STATE_FSYNC:
+            f.flush()
+            os.fsync(f.fileno())
+
+    previous_digest = file_digest(filepath) if os.path.exists(filepath) else ""
+    sidecar_temp = filepath + ".sha256.tmp"
+    with open(sidecar_temp, "w", encoding="utf-8") as f:
+        f.write(f"{digest}\n{previous_digest}\n")
+    os.replace(sidecar_temp, filepath + ".sha256")
+
+    if previous_digest:
+        backup_file = filepath + ".bak"
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(backup_file)
+        try:
+            os.link(filepath, backup_file)
+        except OSError:
+            shutil.copy2(filepath, backup_file)
+
+    os.replace(temp_file, filepath)
+
 
 #3
+def read_json_checked(filepath, default, fields=None):
+    """
+    Loads a store (any format, see serialization.py), validating it against its checksum sidecar. A missing or failed file falls
+    back to the `.bak` snapshot; only a store that never existed returns `default`.
+    Files written before the sidecar existed are accepted if they parse.
+    With `fields` (a tuple), a list store is returned as tuples of just those fields (decode_fields()).
+
+    :raises StateCorruptedError: if the store exists but neither it nor its snapshot is valid.
+    """
+    if not os.path.exists(filepath) and not os.path.exists(filepath + ".bak"):
+        return default
+
+    digests = read_digests(filepath)
+    for candidate in (filepath, filepath + ".bak"):
+        try:
+            with open(candidate, "rb") as f:
+                payload = f.read()
+            if digests is not None and hashlib.sha256(payload).hexdigest() not in digests:
+                raise ValueError("checksum mismatch")
+            data = decode(payload) if fields is None else decode_fields(payload, fields)
+        except (OSError, ValueError) as e:
+            logger.error("⚠️ State file %s failed validation: %s", candidate, e)
+            increment("state_validation_failed", store=os.path.basename(filepath))
+            continue
+
+        if candidate != filepath:
+            logger.warning("♻️ Recovered %s from its last good snapshot.", filepath)
+            increment("state_recovered", store=os.path.basename(filepath))
+        return data
+
+    raise StateCorruptedError(f"{filepath} and its backup are both unreadable – refusing to start with empty history.")
+
+
+#4
+def safe_load_json(filepath, default):
+    with state_lock(filepath, exclusive=False):
+        return read_json_checked(filepath, default)
+
+#5
+@timed("json_load", store="posted")
+def load_posted_news():
+    data = safe_load_json(POSTED_NEWS_FILE, [])
+    return data if isinstance(data, list) else []
+
+
+DEDUP_FIELDS = ("title", "url", "text_hash")
+
+
+@timed("json_load", store="posted_records")
+def load_posted_records():
+    """
+    Posted history as ArticleRecords with only title, URL and hash – what dedup needs. The other fields
+    (summaries, keywords) are skipped while parsing instead of being loaded and dropped.
+    """
+    with state_lock(POSTED_NEWS_FILE, exclusive=False):
+        rows = read_json_checked(POSTED_NEWS_FILE, [], fields=DEDUP_FIELDS)
+    return [ArticleRecord.dedup_view(title, url, text_hash) for title, url, text_hash in rows]
+
+#6
+@timed("json_save", store="posted")
 def save_posted_news(posted_news):
-    temp_file = POSTED_NEWS_FILE + ".tmp"
     try:
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(posted_news, f, ensure_ascii=False, indent=4)
-        os.replace(temp_file, POSTED_NEWS_FILE)
-        print(f"📂 {len(posted_news)} posted articles saved successfully.")
+        entries = [item.posted_entry() if isinstance(item, ArticleRecord) else item for item in posted_news]
+        with state_lock(POSTED_NEWS_FILE):
+            write_json_atomic(POSTED_NEWS_FILE, entries)
+        logger.debug("📂 %d posted articles saved successfully.", len(posted_news))
+        update_index("posted", entries)
     except Exception as e:
-        print(f"⚠️ Error while saving posted_news: {e}")
+        logger.error("⚠️ Error while saving posted_news: %s", e)
 
 
+@timed("json_save", store="posted_append")
+def append_posted_news(records):
+    """
+    Adds a run's sent articles to the posted store in one write, under the lock. The rest of the history
+    is re-read from disk rather than kept in memory, and overlapping runs can't overwrite each other's posts.
+    Errors (including StateCorruptedError) propagate: these articles are already out, and silently
+    dropping them from the dedup history would send them again.
+    """
+    if not records:
+        return
+    new_entries = [record.posted_entry() for record in records]
+    with state_lock(POSTED_NEWS_FILE):
+        posted_news = read_json_checked(POSTED_NEWS_FILE, [])
+        posted_news.extend(new_entries)
+        write_json_atomic(POSTED_NEWS_FILE, posted_news)
+    logger.debug("📂 %d posted articles saved successfully.", len(posted_news))
+    update_index("posted", new_entries)
 
-#4
-def load_skipped_news():
-    skipped_articles = safe_load_json("skipped_news_ud.json", {})
 
+
+#7
+def prune_skipped(skipped_articles):
+    """Migrates the old list layout and drops records older than 14 days or failed 3 times."""
     if isinstance(skipped_articles, list):
         skipped_articles = {article["id"]: article for article in skipped_articles}
 
-# Cleaning old/failed
+    # Cleaning old/failed
     cutoff_date = datetime.today() - timedelta(days=14)
     filtered = {}
 
@@ -87,72 +236,77 @@ def load_skipped_news():
                     "published_time": article.get("published_time", ""),
                     "rss_source": article.get("rss_source", "")
                 }
+                if "next_attempt_at" in article:
+                    filtered[article_id]["next_attempt_at"] = article["next_attempt_at"]
 
         except ValueError:
             continue
 
-    with open("skipped_news_ud.json", "w", encoding="utf-8") as f:
-        json.dump(filtered, f, ensure_ascii=False, indent=4)
-
     return filtered
 
-#5
+
+@timed("json_load", store="skipped")
+def load_skipped_news():
+    """Read-only: the pruning is applied in memory here and written by the next save_skipped_news()."""
+    with state_lock(SKIPPED_NEWS_FILE, exclusive=False):
+        skipped_articles = read_json_checked(SKIPPED_NEWS_FILE, {})
+    return prune_skipped(skipped_articles)
+
+#8
+@timed("json_save", store="skipped")
 def save_skipped_news(skipped_articles):
-    skipped_file = "skipped_news_ud.json"
-    try:
-        with open(skipped_file, "r", encoding="utf-8") as f:
-            existing_skipped = json.load(f)
-            if isinstance(existing_skipped, list):
-                existing_skipped = {article["id"]: article for article in existing_skipped}
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_skipped = {}
-
-    today_date = datetime.today().strftime("%Y-%m-%d")
-    current_time = datetime.today().strftime("%H:%M:%S")
-
-    for article in skipped_articles:
-        article_id = article["id"]
-        reason = article.get("reason", "Unknown")
-        title = article.get("title", "")
-        url = article.get("url", "")
-        summary = article.get("summary", "")
-        source = article.get("source", extract_source_from_url(url))
-        published_date = article.get("published_date", today_date)
-        published_time = article.get("published_time", current_time)
-        rss_source = article.get("rss_source", "Unknown")  # Call the country field if it exists
-
-         # Calculate hash if missing
-        text_hash = article.get("text_hash") or compute_text_hash(summary)
-
-        if article_id in existing_skipped:
-            existing = existing_skipped[article_id]
-            existing["fail_count"] = existing.get("fail_count", 1) + 1
-            existing["date"] = today_date
-            existing["reason"] = reason
-            existing["text_hash"] = text_hash
-            existing["summary"] = summary or existing.get("summary", "")
-            existing["source"] = source or existing.get("source", "")
-            existing["published_date"] = published_date
-            existing["published_time"] = published_time
-            existing["rss_source"] = rss_source
-        else:
-            existing_skipped[article_id] = {
-                "title": title,
-                "url": url,
-                "fail_count": 1,
-                "date": today_date,
-                "reason": reason,
-                "text_hash": text_hash,
-                "summary": summary,
-                "source": source,
-                "published_date": published_date,
-                "published_time": published_time,
-                "rss_source": rss_source
-            }
-
-    with open(skipped_file, "w", encoding="utf-8") as f:
-        json.dump(existing_skipped, f, ensure_ascii=False, indent=4)
-
-    print(f"[INFO] Skipped list updated: {len(skipped_articles)} new, {len(existing_skipped)} total.")
-    
+    skipped_file = SKIPPED_NEWS_FILE
+    with state_lock(skipped_file):
+        existing_skipped = prune_skipped(read_json_checked(skipped_file, {}))
+
+        now = datetime.today()
+        today_date = now.strftime("%Y-%m-%d")
+        current_time = now.strftime("%H:%M:%S")
+
+        for article in skipped_articles:
+            article_id = article["id"]
+            reason = article.get("reason", "Unknown")
+            title = article.get("title", "")
+            url = article.get("url", "")
+            summary = article.get("summary", "")
+            source = article.get("source", extract_source_from_url(url))
+            published_date = article.get("published_date", today_date)
+            published_time = article.get("published_time", current_time)
+            rss_source = article.get("rss_source", "Unknown")  # Call the country field if it exists
+
+             # Calculate hash if missing
+            text_hash = article.get("text_hash") or compute_text_hash(summary)
+
+            if article_id in existing_skipped:
+                existing = existing_skipped[article_id]
+                existing["fail_count"] = existing.get("fail_count", 1) + 1
+                existing["date"] = today_date
+                existing["reason"] = reason
+                existing["text_hash"] = text_hash
+                existing["summary"] = summary or existing.get("summary", "")
+                existing["source"] = source or existing.get("source", "")
+                existing["published_date"] = published_date
+                existing["published_time"] = published_time
+                existing["rss_source"] = rss_source
+            else:
+                existing_skipped[article_id] = {
+                    "title": title,
+                    "url": url,
+                    "fail_count": 1,
+                    "date": today_date,
+                    "reason": reason,
+                    "text_hash": text_hash,
+                    "summary": summary,
+                    "source": source,
+                    "published_date": published_date,
+                    "published_time": published_time,
+                    "rss_source": rss_source
+                }
+            # Backoff by reason: when (or whether) this article is tried again
+            schedule_retry(existing_skipped[article_id], now)
+
+        write_json_atomic(skipped_file, existing_skipped)
+        write_json_atomic(RETRY_INDEX_FILE, build_retry_index(existing_skipped))
 
+    update_index("skipped", [dict(existing_skipped[article["id"]], id=article["id"]) for article in skipped_articles])
+    logger.info("Skipped list updated: %d new, %d total.", len(skipped_articles), len(existing_skipped))
@@ -21,25 +21,73 @@ import requests
 from urllib.parse import urlparse
 import html
 import time
-from config import LOCK_FILE
+from config import logger, LOCK_FILE, NODE_ID
+from coordination import (coordination_enabled, acquire_lease, release_leases, start_heartbeat, lease_holder,
+                          purge_old_claims)
 
 
 #1
 def create_lock():
-    with open(LOCK_FILE, "w") as f:
-        pid = os.getpid()
+    """
+    Takes the run lock. With COORDINATION_DB set this is the node lease (renewed by a heartbeat
+    thread, so it expires by itself if the process dies); otherwise a local PID file.
+
+    :return: False if another process got the lock first.
+    """
+    if coordination_enabled:
+        if not acquire_lease(f"node:{NODE_ID}"):
+            logger.warning("⚠️ Node %s is already running elsewhere (lease held by %s).", NODE_ID, lease_holder(f"node:{NODE_ID}"))
+            return False
+        start_heartbeat()
+        purge_old_claims()
+        logger.info("🔒 Node lease acquired: %s", NODE_ID)
+        return True
+
+    pid = os.getpid()
+    try:
+        # O_EXCL: of two processes that both saw no lock, only one creates the file
+        fd = os.open(LOCK_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
         f.write(str(pid))
-    print(f"🔒 Lock file created with PID: {pid}")
+    logger.info("🔒 Lock file created with PID: %d", pid)
+    return True
 
 #2
 def remove_lock():
-    """Removes the lock file after execution is complete."""
-    if os.path.exists(LOCK_FILE):
+    """
+    Removes the lock file (or releases this process's leases) after execution is complete.
+    A lock file held by another process is left alone – e.g. when this run exits because one is already running.
+    """
+    if coordination_enabled:
+        release_leases()
+        return
+
+    if read_lock_pid() == os.getpid():
+        clear_lock_file()
+
+
+def read_lock_pid():
+    try:
+        with open(LOCK_FILE, "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def clear_lock_file():
+    try:
         os.remove(LOCK_FILE)
+    except FileNotFoundError:
+        pass
 
 
 #3
 def is_script_running():
+    if coordination_enabled:
+        return lease_holder(f"node:{NODE_ID}") is not None
+
     if not os.path.exists(LOCK_FILE):
         return False
 
@@ -47,15 +95,15 @@ def is_script_running():
         with open(LOCK_FILE, "r") as f:
             pid = int(f.read().strip())
             if is_process_running(pid):
-                print("⚠️ Script is already running (PID: {})".format(pid))
+                logger.warning("⚠️ Script is already running (PID: %d)", pid)
                 return True
             else:
-                print("🧹 Stale process detected – cleaning up old lock file.")
-                remove_lock()
+                logger.info("🧹 Stale process detected – cleaning up old lock file.")
+                clear_lock_file()
                 return False
     except Exception as e:
-        print(f"⚠️ Error reading lock file: {e}")
-        remove_lock()
+        logger.warning("⚠️ Error reading lock file: %s", e)
+        clear_lock_file()
         return False
 
 
@@ -21,9 +21,20 @@ import requests
 from urllib.parse import urlparse
 import html
 import time
-from messaging import send_telegram_message, post_articles_to_telegram
+import argparse
+from messaging import send_notice, post_articles_to_telegram
 from lock_manager import create_lock, remove_lock, is_script_running
 from news_retrieval import get_google_alerts,filter_new_articles
+from metrics import timed, write_run_report
+from scheduler import merge_with_backlog
+from retry_scheduler import merge_due_retries
+from archive import compact_posted_news
+from feed_checkpoints import commit_feed_checkpoints
+from feed_schedule import commit_feed_schedule
+from profiler import SamplingProfiler
+from resource_governor import governor
+from config import logger, shutdown_logging
+import http_client
 
 
 
@@ -31,40 +42,38 @@ from news_retrieval import get_google_alerts,filter_new_articles
 
 #1
 # 🔹 Starting the process
+@timed("pipeline")
 def process_and_send_articles():
-    print("📬 Entered process_and_send_articles()")
-    articles = get_google_alerts()
+    logger.debug("📬 Entered process_and_send_articles()")
+    try:
+        compact_posted_news()  # Keeps the posted history that every run loads to the hot window
+    except Exception as e:
+        logger.warning("⚠️ Archive compaction failed – continuing with the full history: %s", e)
+    articles = merge_due_retries(merge_with_backlog(get_google_alerts()))
     new_articles = filter_new_articles(articles)
 
     if new_articles:
         post_articles_to_telegram(new_articles)
     else:
-        print("📭 No new articles for today.")
+        logger.info("📭 No new articles for today.")
+    # Only now are this run's entries handled – a crash before this point means re-reading them
+    commit_feed_checkpoints()
+    commit_feed_schedule()
 
 
 LOCK_FILE = "script_running.lock"
 
 #2
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch, summarize and post cyber news.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run under the sampling profiler (stack samples per stage, flamegraph, allocation snapshots)")
+    args = parser.parse_args()
+    profiler = SamplingProfiler() if args.profile else None
+
     now = datetime.now()
     os.environ["CUDA_LAUNCH_BLOCKING"] = "1"
-    print("[INFO] Main execution started.")
-
-    try:
-        nltk.data.find("tokenizers/punkt")
-        print("NLTK resource 'punkt' is available.")
-except LookupError:
-    nltk.download("punkt")
-    print("NLTK resource 'punkt' has been downloaded.")
-
-
-    try:
-        nltk.data.find("tokenizers/punkt_tab")
-        print("NLTK resource 'punkt_tab' is available.")
-except LookupError:
-    nltk.download("punkt_tab")
-    print("NLTK resource 'punkt_tab' has been downloaded.")
-
+    logger.info("Main execution started.")
 
     try:
         with open("run_times.txt", "a", encoding="utf-8") as f:
@@ -73,30 +82,41 @@ except LookupError:
         with open("log.txt", "a", encoding="utf-8") as f:
             f.write(f"\n=== New run started at {now.strftime('%Y-%m-%d %H:%M:%S')} ===\n")
 
-        print("Attempting to send startup message via Telegram...")
-        send_telegram_message(f"Execution started at {now.strftime('%Y-%m-%d %H:%M:%S')}")
-        print("Telegram message sent.")
+        logger.debug("Attempting to send startup message via Telegram...")
+        send_notice(f"Execution started at {now.strftime('%Y-%m-%d %H:%M:%S')}")
 
-        print("Checking if script is already running...")
+        logger.debug("Checking if script is already running...")
         if is_script_running():
-            print("Script is already running. Exiting.")
+            logger.info("Script is already running. Exiting.")
             sys.exit(0)
 
-        print("Creating lock file...")
-        create_lock()
+        logger.debug("Creating lock file...")
+        if not create_lock():
+            logger.info("Another instance took the lock first. Exiting.")
+            sys.exit(0)
 
         try:
-            print("Starting to process and send articles...")
+            logger.info("Starting to process and send articles...")
+            if profiler:
+                profiler.start()
+            governor.start()
             process_and_send_articles()
-            print("✅ process_and_send_articles() completed successfully.")
+            logger.info("✅ process_and_send_articles() completed successfully.")
         except Exception as e:
-            print(f"❌ General error during execution: {e}")
-            send_telegram_message(f"❌ General error during execution: {e}")
+            logger.error("❌ General error during execution: %s", e)
+            send_notice(f"❌ General error during execution: {e}")
 
     finally:
-        print("Cleaning up lock file...")
+        logger.debug("Cleaning up lock file...")
         remove_lock()
-        print("Final cleanup complete. Exiting now.")
+        http_client.close()
+        if profiler:
+            profiler.stop()
+            profiler.write_report()
+        governor.stop()  # Adds the per-stage memory peaks to the run report
+        write_run_report()
+        logger.info("Final cleanup complete. Exiting now.")
+        shutdown_logging()
         sys.stdout.flush()
         sys.stderr.flush()
         os._exit(0)
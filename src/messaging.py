@@ -21,290 +21,334 @@ import requests
 from urllib.parse import urlparse
 import html
 import time
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TEAMS_WEBHOOK_URL
-from json_handler import load_skipped_news, load_posted_news, save_posted_news, save_skipped_news
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import (logger, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_API_URL, TEAMS_WEBHOOK_URL, RELEVANCE_FILTER_MODE,
+                    SUMMARIZER_BATCH_SIZE, EXTRACTION_WORKERS)
+from json_handler import load_skipped_news, load_posted_records, append_posted_news, save_skipped_news
 from text_processing import clean_title, clean_title_for_matching, clean_url, extract_source_from_url, compute_text_hash
-from summarizer import summarize_text
+from summarizer import summarize_batch, shutdown_summarizer_pool
 from news_retrieval import fetch_full_text
+from metrics import timed, increment
+from relevance import prefilter_articles
+from scheduler import schedule_articles, RunBudget, save_backlog
+from retry_scheduler import retry_due
+from resource_governor import governor
+from coordination import article_claim_keys, is_claimed_elsewhere, claim_article, mark_posted, release_claims
+from article import ArticleRecord
+import http_client
 
 #1
-def send_telegram_message(message, retries=3, delay=5):
-    print(f"➡️ Sending Telegram message: {message[:40]}...")
-    print(f"[BOT] {TELEGRAM_BOT_TOKEN[:10]}... | [CHAT_ID] {TELEGRAM_CHAT_ID}")
+def send_telegram_message(message, retries=3):
+    """Sends a message to the Telegram chat. Raises requests exceptions when it could not be sent."""
+    logger.debug("➡️ Sending Telegram message to chat %s: %.40s...", TELEGRAM_CHAT_ID, message)
 
     clean_message = message.strip()
     clean_message_text = BeautifulSoup(clean_message, "html.parser").get_text().strip()
 
     if not clean_message_text:
-        print("⚠️ Message is empty after cleaning. Skipping Telegram send.")
+        logger.warning("⚠️ Message is empty after cleaning. Skipping Telegram send.")
         return
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {"chat_id": TELEGRAM_CHAT_ID, "text": clean_message, "parse_mode": "HTML"}
 
-    for attempt in range(retries):
-        try:
-            response = requests.post(url, json=payload)
+    try:
+        with timed("telegram_send"):
+            # The shared client retries 429/503 (honouring Retry-After) and connect timeouts with backoff
+            response = http_client.post(url, json=payload, retries=retries)
             response.raise_for_status()
-            print("✅ Message sent successfully.")
-            return  # Exit after successful sendציאה מהפונקציה לאחר הצלחה
+        increment("telegram_messages", status="sent")
+        logger.debug("✅ Message sent successfully.")
+        return  # Exit after successful sendציאה מהפונקציה לאחר הצלחה
 
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", delay))
-                print(f"⏳ Received 429 Too Many Requests – retrying in {retry_after} seconds...")
-                time.sleep(retry_after)  
-            else:
-                print(f"❌ Error sending message: {e} – Status code: {response.status_code}")
-                break  
+    except requests.exceptions.HTTPError as e:
+        increment("telegram_messages", status="rate_limited" if response.status_code == 429 else "http_error")
+        logger.error("❌ Error sending message: %s – Status code: %d", e, response.status_code)
+        raise
+
+    except requests.exceptions.RequestException as e:
+        increment("telegram_messages", status="connection_error")
+        logger.error("❌ Telegram communication error: %s", e)
+        raise
+
+
+def send_notice(message):
+    """Run status messages (start, errors): a failed send is logged but never stops the run."""
+    try:
+        send_telegram_message(message)
+    except requests.exceptions.RequestException:
+        logger.warning("⚠️ Status message not delivered to Telegram.")
 
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Telegram communication error: {e}")
-            break  
 
-    print("⚠️ Failed to send the message after multiple attempts.")
+def extract_page(url):
+    """One page download + parse, within the memory governor's extraction limit."""
+    with governor.extraction_slot():
+        return fetch_full_text(url)
 
 
 #2
-def post_articles_to_telegram(articles):
+def post_articles_to_telegram(articles, shutdown_pool=True, defer_to_backlog=True, budget=None):
+    """
+    Dedups, fetches, summarizes and sends the articles.
+
+    :param shutdown_pool: Stop the summarization workers at the end (backfill keeps them for the next slice)
+    :param defer_to_backlog: Write articles the run budget cut off to the backlog (backfill retries its slice instead)
+    :param budget: RunBudget to check (default: measured from process start)
+    :return: (sent ArticleRecords, deferred ArticleRecords)
+    """
     start_time = datetime.now()
-    print(f"\n🚀 Starting to send articles: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info("🚀 Starting to send articles: %s", start_time.strftime('%Y-%m-%d %H:%M:%S'))
 
     sent_articles = []
     skipped_articles = []
-    skipped_news = load_skipped_news()
-    current_posted = load_posted_news()
-
-    posted_titles = set(clean_title_for_matching(item["title"]) for item in current_posted)
-    posted_urls = set(clean_url(item["url"]) for item in current_posted)
-    posted_hashes = set(item.get("text_hash") for item in current_posted if "text_hash" in item)
+    with timed("history_load"):
+        skipped_news = load_skipped_news()
+        current_posted = load_posted_records()
+
+    with timed("dedup_index"):
+        posted_titles = set(clean_title_for_matching(item.title) for item in current_posted)
+        posted_urls = set(clean_url(item.url) for item in current_posted)
+        posted_hashes = set(item.text_hash for item in current_posted if item.text_hash)
+
+    # Score candidates from title/summary and drop off-topic ones before any full-text download
+    if RELEVANCE_FILTER_MODE in ("log", "drop"):
+        articles, dropped = prefilter_articles(articles, dry_run=RELEVANCE_FILTER_MODE == "log")
+        for article, reason, score in dropped:
+            skipped_articles.append(article.skip_entry(f"Filtered before fetch: {reason} (score {score:g})",
+                                                       title=clean_title(article.title), url=clean_url(article.url)))
+
+    # Most important first, so a budget cut-off only ever defers the least important articles
+    articles = schedule_articles(articles)
+    budget = budget or RunBudget(since_process_start=True)
+    deferred_articles = []
 
     processed_titles = set()
     processed_urls = set()
     processed_hashes = set()
+    candidates = []  # Articles that passed dedup, waiting for their page
+    ready_articles = []  # Articles that passed dedup and have full text, waiting for summarization
 
     for index, article in enumerate(articles):
-        article_id = article["id"]
-        original_title = clean_title(article["title"]) or "🔹 Untitled Article"
-        match_title = clean_title_for_matching(article["title"])
-        clean_link = clean_url(article["url"])
-        summary = article.get("summary", "")
-        rss_source = article.get("rss_source", "Unknown")
-        text_hash = article.get("text_hash")
+        article_id = article.id
+        original_title = clean_title(article.title) or "🔹 Untitled Article"
+        match_title = clean_title_for_matching(article.title)
+        clean_link = clean_url(article.url)
+        text_hash = article.text_hash
 
-        print(f"[CHECK] Title: {original_title} | URL: {clean_link}")
+        logger.debug("[CHECK] Title: %s | URL: %s", original_title, clean_link)
 
 
         if text_hash and (text_hash in posted_hashes or text_hash in processed_hashes):
-            print(f"[DUPLICATE_HASH] Skipping by summary hash.")
-            skipped_articles.append({
-                "id": article_id,
-                "title": original_title,
-                "url": clean_link,
-                "reason": "Duplicate by summary hash",
-                "summary": summary,
-                "text_hash": text_hash,
-                "source": article.get("source", extract_source_from_url(clean_link)),
-                "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                "rss_source": rss_source
-            })
+            logger.debug("[DUPLICATE_HASH] Skipping by summary hash.")
+            increment("articles_skipped", reason="duplicate_hash")
+            skipped_articles.append(article.skip_entry("Duplicate by summary hash", title=original_title, url=clean_link))
             continue
 
         if match_title in posted_titles or match_title in processed_titles:
-            print(f"[DUPLICATE_TITLE] Skipping by title.")
-            skipped_articles.append({
-                "id": article_id,
-                "title": original_title,
-                "url": clean_link,
-                "reason": "Duplicate by title",
-                "summary": summary,
-                "text_hash": text_hash or "",
-                "source": article.get("source", extract_source_from_url(clean_link)),
-                "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                "rss_source": rss_source
-            })
+            logger.debug("[DUPLICATE_TITLE] Skipping by title.")
+            increment("articles_skipped", reason="duplicate_title")
+            skipped_articles.append(article.skip_entry("Duplicate by title", title=original_title, url=clean_link))
             continue
 
         # בדיקת כפילות לפי URL
         if clean_link in posted_urls or clean_link in processed_urls:
-            print(f"[DUPLICATE_URL] Skipping by url.")
-            skipped_articles.append({
-                "id": article_id,
-                "title": original_title,
-                "url": clean_link,
-                "reason": "Duplicate by url",
-                "summary": summary,
-                "text_hash": text_hash or "",
-                "source": article.get("source", extract_source_from_url(clean_link)),
-                "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                "rss_source": rss_source
-            })
+            logger.debug("[DUPLICATE_URL] Skipping by url.")
+            increment("articles_skipped", reason="duplicate_url")
+            skipped_articles.append(article.skip_entry("Duplicate by url", title=original_title, url=clean_link))
             continue
 
         if article_id in skipped_news:
             fail_count = skipped_news[article_id].get("fail_count", 0)
             if fail_count >= 3:
-                print(f"❌ The article '{original_title}' has failed too many times ({fail_count}) – skipping it.")
+                logger.debug("❌ The article '%s' has failed too many times (%d) – skipping it.", original_title, fail_count)
+                increment("articles_skipped", reason="too_many_failures")
+                continue
+            # Still backing off (or never to be retried) – don't redo the fetch and summarize yet
+            if not retry_due(skipped_news[article_id], start_time):
+                logger.debug("⏳ Retry of '%s' is not due (next attempt: %s) – skipping it.", original_title,
+                             skipped_news[article_id].get("next_attempt_at") or "never")
+                increment("articles_skipped", reason="retry_not_due")
                 continue
 
-        if not text_hash and summary.strip():
-            text_hash = compute_text_hash(summary)
-            article["text_hash"] = text_hash
-            print(f"[HASH] Recomputing hash from summary: {text_hash}")
+        if not text_hash and article.summary.strip():
+            text_hash = compute_text_hash(article.summary)
+            article.text_hash = text_hash
+            logger.debug("[HASH] Recomputing hash from summary: %s", text_hash)
 
-        try:
-            full_text = fetch_full_text(clean_link)
-        except Exception as e:
-            reason = f"Error while fetching article: {str(e)}"
-            print(f"❌ {reason}")
-            skipped_articles.append({
-                "id": article_id,
-                "title": original_title,
-                "url": clean_link,
-                "reason": reason,
-                "summary": summary,
-                "text_hash": text_hash or "",
-                "source": article.get("source", extract_source_from_url(clean_link)),
-                "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                "rss_source": rss_source
-            })
-            continue
-
-        if not full_text or len(full_text.split()) < 10:
-            reason = "Article text is empty or too short"
-            print(f"🚫 {reason} – skipped.")
-            skipped_articles.append({
-                "id": article_id,
-                "title": original_title,
-                "url": clean_link,
-                "reason": reason,
-                "summary": summary,
-                "text_hash": text_hash or "",
-                "source": article.get("source", extract_source_from_url(clean_link)),
-                "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                "rss_source": rss_source
-            })
+        # Other nodes' posts are not in our posted_news file – check the shared claim store before fetching
+        if is_claimed_elsewhere(article_claim_keys(clean_link, match_title, text_hash)):
+            logger.debug("[CLAIMED] Posted or being posted by another node.")
+            increment("articles_skipped", reason="claimed_elsewhere")
             continue
 
+        # Later copies of this story in the batch are duplicates of this one, whether or not its page loads
+        # (a failed fetch is retried through the skipped store)
         processed_titles.add(match_title)
         processed_urls.add(clean_link)
         if text_hash:
             processed_hashes.add(text_hash)
+        candidates.append((index, article, original_title, match_title, clean_link))
+
+    # Pages are downloaded and parsed EXTRACTION_WORKERS at a time (one at a time while memory is tight –
+    # see governor.extraction_slot()). The budget is checked as each download starts.
+    # A model left loaded by an earlier slice/pass is dropped first if page parsing needs the room
+    governor.relieve("extraction")
+    workers = max(1, EXTRACTION_WORKERS)
+    fetches = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as executor:
+        free_workers = threading.BoundedSemaphore(workers)
+        for position, candidate in enumerate(candidates):
+            free_workers.acquire()
+            exhausted = budget.exhausted()
+            if exhausted:
+                free_workers.release()
+                logger.warning("⏳ Run %s budget exhausted – deferring %d articles to the next run.", exhausted, len(candidates) - position)
+                deferred_articles.extend(item[1] for item in candidates[position:])
+                break
+            future = executor.submit(extract_page, candidate[4])
+            future.add_done_callback(lambda _: free_workers.release())
+            fetches.append((candidate, future))
 
-        print(f"\n📨 Article {index + 1}/{len(articles)}: {original_title}")
-
+    for (index, article, original_title, match_title, clean_link), future in fetches:
         try:
-            summarized_content = summarize_text(full_text, title=original_title)
+            full_text = future.result()
         except Exception as e:
-            reason = f"Error during summarization: {str(e)}"
-            print(f"⚠️ {reason}")
-            skipped_articles.append({
-                "id": article_id,
-                "title": original_title,
-                "url": clean_link,
-                "reason": reason,
-                "summary": summary,
-                "text_hash": text_hash or "",
-                "source": article.get("source", extract_source_from_url(clean_link)),
-                "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                "rss_source": rss_source
-            })
+            reason = f"Error while fetching article: {str(e)}"
+            logger.warning("❌ %s", reason)
+            increment("articles_skipped", reason="fetch_error")
+            skipped_articles.append(article.skip_entry(reason, title=original_title, url=clean_link))
             continue
 
-        if not summarized_content.strip() or len(summarized_content.split()) < 20:
-            reason = "Final summary is too short or empty"
-            print(f"🚫 {reason} – marking as failed.")
-            skipped_articles.append({
-                "id": article_id,
-                "title": original_title,
-                "url": clean_link,
-                "reason": reason,
-                "summary": summary,
-                "text_hash": text_hash or "",
-                "source": article.get("source", extract_source_from_url(clean_link)),
-                "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                "rss_source": rss_source
-            })
+        # fetch_full_text() reports failures as "⚠️ ..." messages instead of raising; keep them apart
+        # from short pages, since they are retried on a different schedule
+        if full_text and full_text.startswith("⚠️") and "too short" not in full_text:
+            reason = f"Error while fetching article: {full_text.lstrip('⚠️ ')}"
+            logger.warning("❌ %s – %s", reason, clean_link)
+            increment("articles_skipped", reason="fetch_error")
+            skipped_articles.append(article.skip_entry(reason, title=original_title, url=clean_link))
+            continue
+
+        if not full_text or len(full_text.split()) < 10:
+            reason = "Article text is empty or too short"
+            logger.info("🚫 %s – skipped: %s", reason, clean_link)
+            increment("articles_skipped", reason="text_too_short")
+            skipped_articles.append(article.skip_entry(reason, title=original_title, url=clean_link))
             continue
 
-        escaped_summary = html.escape(summarized_content.strip())
-        message = f"""
+        ready_articles.append((index, article, original_title, match_title, clean_link, full_text))
+
+    # Summarize fetched articles in batches so the pool/server can work on them in parallel,
+    # checking the budget between batches; the governor shrinks the batches while memory is tight
+    logger.info("🤖 Summarizing %d articles...", len(ready_articles))
+    summaries = []
+    start = 0
+    while start < len(ready_articles):
+        exhausted = budget.exhausted()
+        if exhausted:
+            logger.warning("⏳ Run %s budget exhausted – deferring %d fetched articles to the next run.", exhausted, len(ready_articles) - start)
+            deferred_articles.extend(item[1] for item in ready_articles[start:])
+            ready_articles = ready_articles[:start]
+            break
+        chunk = ready_articles[start:start + governor.batch_size(max(1, SUMMARIZER_BATCH_SIZE))]
+        summaries.extend(summarize_batch([(full_text, original_title) for _, _, original_title, _, _, full_text in chunk]))
+        start += len(chunk)
+    if shutdown_pool:
+        shutdown_summarizer_pool()
+    governor.relieve("sending")
+
+    # The posted history is rewritten once for the whole run; the finally makes sure what already went out
+    # is recorded even if the loop fails part-way
+    try:
+        for (index, article, original_title, match_title, clean_link, full_text), summarized_content in zip(ready_articles, summaries):
+            logger.info("📨 Article %d/%d: %s", index + 1, len(articles), original_title)
+
+            if not summarized_content.strip() or len(summarized_content.split()) < 20:
+                reason = "Final summary is too short or empty"
+                logger.info("🚫 %s – marking as failed.", reason)
+                increment("articles_skipped", reason="summary_too_short")
+                skipped_articles.append(article.skip_entry(reason, title=original_title, url=clean_link))
+                continue
+
+            escaped_summary = html.escape(summarized_content.strip())
+            message = f"""
 📰 <b>{original_title}</b>
-📅 <b>Date:</b> {article['published_date']} {article.get('published_time', '')}
+📅 <b>Date:</b> {article.published_date} {article.published_time}
 🔗 <a href='{clean_link}'>For Additional Reading</a>
 
 ✍️ <b>Summary:</b>
 {escaped_summary}
 """
-        teams_message = {
-            "title": original_title,
-            "date": article['published_date'],
-            "url": clean_link,
-            "summary": escaped_summary
-        }
-
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                send_telegram_message(message)
-                send_to_teams(teams_message, TEAMS_WEBHOOK_URL)
-
-                enriched = {
-                    "title": original_title,
-                    "url": clean_link,
-                    "text_hash": text_hash or "",
-                    "summary": summarized_content.strip(),
-                    "source": article.get("source", extract_source_from_url(clean_link)),
-                    "keywords": article.get("keywords", []),
-                    "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                    "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                    "rss_source": rss_source
-                }
-
-                sent_articles.append(enriched)
-                current_posted.append(enriched)
-                save_posted_news(current_posted)
+            teams_message = {
+                "title": original_title,
+                "date": article.published_date,
+                "url": clean_link,
+                "summary": escaped_summary
+            }
+
+            # Claim before posting, so two nodes that got the same story never both send it
+            claim_keys = article_claim_keys(clean_link, match_title, article.text_hash)
+            if not claim_article(claim_keys):
+                logger.info("🔒 Claimed by another node – not sending: %s", original_title)
+                increment("articles_skipped", reason="claimed_elsewhere")
+                continue
 
-                print(f"✅ Sent and saved: {original_title}")
-                break
-            except requests.exceptions.RequestException as e:
-                reason = f"Error sending to Telegram or Teams: {str(e)}"
-                print(f"❌ {reason}")
-                skipped_articles.append({
-                    "id": article_id,
-                    "title": original_title,
-                    "url": clean_link,
-                    "reason": reason,
-                    "summary": summary,
-                    "text_hash": text_hash or "",
-                    "source": article.get("source", extract_source_from_url(clean_link)),
-                    "published_date": article.get("published_date", datetime.today().strftime("%Y-%m-%d")),
-                    "published_time": article.get("published_time", datetime.today().strftime("%H:%M:%S")),
-                    "rss_source": rss_source
-                })
-                break
+            max_retries = 3
+            for attempt in range(max_retries):
+                try:
+                    send_telegram_message(message)
+                    try:
+                        send_to_teams(teams_message, TEAMS_WEBHOOK_URL)
+                    except requests.exceptions.RequestException:
+                        # Already on Telegram – retrying the article would post it there twice
+                        logger.warning("⚠️ Sent to Telegram but not to Teams: %s", original_title)
+                    mark_posted(claim_keys)
+
+                    enriched = ArticleRecord(
+                        title=original_title,
+                        url=clean_link,
+                        text_hash=article.text_hash or "",
+                        summary=summarized_content.strip(),
+                        source=article.source,
+                        keywords=article.keywords,
+                        published_date=article.published_date,
+                        published_time=article.published_time,
+                        rss_source=article.rss_source
+                    )
+
+                    sent_articles.append(enriched)
+                    increment("articles_sent")
+
+                    logger.info("✅ Sent: %s", original_title)
+                    break
+                except requests.exceptions.RequestException as e:
+                    release_claims(claim_keys)
+                    reason = f"Error sending to Telegram or Teams: {str(e)}"
+                    logger.error("❌ %s", reason)
+                    increment("articles_skipped", reason="send_error")
+                    skipped_articles.append(article.skip_entry(reason, title=original_title, url=clean_link))
+                    break
+    finally:
+        append_posted_news(sent_articles)
 
     if skipped_articles:
         save_skipped_news(skipped_articles)
 
-    print("\n📋 Finished sending articles:")
-    print(f"✅ Successfully sent: {len(sent_articles)}")
-    print(f"⚠️ Skipped or failed: {len(skipped_articles)}")
-    print(f"📊 Total summaries processed: {len(articles)}")
-    print(f"⏱️ Duration: {datetime.now() - start_time}")
+    if defer_to_backlog:
+        save_backlog(deferred_articles)
+
+    logger.info("📋 Finished sending articles: ✅ sent %d | ⚠️ skipped or failed %d | 📊 processed %d | ⏱️ duration %s",
+                len(sent_articles), len(skipped_articles), len(articles), datetime.now() - start_time)
+    return sent_articles, deferred_articles
 
 
 
 #3
-def send_to_teams(message, webhook_url, retries=3, delay=5):
-     """Sends a message to Microsoft Teams, with retry handling for HTTP 429 errors only."""
+def send_to_teams(message, webhook_url, retries=3):
+    """
+    Sends a message to Microsoft Teams; the shared HTTP client retries 429/503 responses only.
+    Raises requests exceptions when it could not be sent.
+    """
     try:
         headers = {"Content-Type": "application/json"}
         adaptive_card = {
@@ -358,24 +402,22 @@ def send_to_teams(message, webhook_url, retries=3, delay=5):
             ]
         }
 
-        for attempt in range(retries):
-            try:
-                response = requests.post(webhook_url, headers=headers, json=adaptive_card)
+        try:
+            with timed("teams_send"):
+                response = http_client.post(webhook_url, headers=headers, json=adaptive_card, retries=retries)
                 response.raise_for_status()
-                print(f"✅ Message successfully sent to Teams!")
-                return
-            except requests.exceptions.HTTPError as e:
-                if response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", delay))
-                    print(f"⏳ Received HTTP 429 – retrying in {retry_after} seconds...")
-                    time.sleep(retry_after)
-                else:
-                    print(f"❌ Failed to send message to Teams: {e} - status: {response.status_code}")
-                    break
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Communication error with Teams: {e}")
-                break
-
-        print("❌ Failed to send message to Teams after multiple attempts.")
+            increment("teams_messages", status="sent")
+            logger.debug("✅ Message successfully sent to Teams!")
+            return
+        except requests.exceptions.HTTPError as e:
+            increment("teams_messages", status="rate_limited" if response.status_code == 429 else "http_error")
+            logger.error("❌ Failed to send message to Teams: %s - status: %d", e, response.status_code)
+            raise
+        except requests.exceptions.RequestException as e:
+            increment("teams_messages", status="connection_error")
+            logger.error("⚠️ Communication error with Teams: %s", e)
+            raise
+    except requests.exceptions.RequestException:
+        raise
     except Exception as e:
-        print(f"⚠️ General error while sending to Teams: {e} {e}")
+        logger.error("⚠️ General error while sending to Teams: %s", e)
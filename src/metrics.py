@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# metrics.py - Per-stage timing, counters and run report export (JSON + Prometheus text format)
+# ==================================================================================================
+# 📦 Built-in libraries
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from config import logger, METRICS_DIR, METRICS_PROM_FILE
+
+METRIC_PREFIX = "cybernewsbot"
+# Upper bounds (seconds) for latency histograms – from fast JSON saves up to slow CPU summarization
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+#1
+class Histogram:
+    """Fixed-bucket histogram that also keeps the raw observations for percentiles in the run report."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.values = []
+        self.total = 0.0
+
+    def observe(self, value):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.values.append(value)
+        self.total += value
+
+    def percentile(self, pct):
+        if not self.values:
+            return 0.0
+        ordered = sorted(self.values)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        count = len(self.values)
+        return {
+            "count": count,
+            "sum": round(self.total, 6),
+            "min": round(min(self.values), 6) if count else 0.0,
+            "max": round(max(self.values), 6) if count else 0.0,
+            "avg": round(self.total / count, 6) if count else 0.0,
+            "p50": round(self.percentile(50), 6),
+            "p95": round(self.percentile(95), 6),
+            "p99": round(self.percentile(99), 6),
+        }
+
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> Histogram
+_gauges = {}      # (name, labels) -> value
+_run_started = datetime.now()
+_stage_stacks = {}     # thread id -> stages currently open on that thread (innermost last)
+_stage_listeners = []  # Called as listener(event, stage) on "enter"/"exit" – used by the profiler
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+#2
+def increment(name, value=1, **labels):
+    """Adds `value` to a counter, e.g. increment("articles_skipped", reason="Duplicate by url")."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+#3
+def observe(name, value, **labels):
+    """Records one observation in a histogram."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+#4
+def set_gauge(name, value, **labels):
+    """Sets a gauge to its latest value (e.g. a peak memory reading)."""
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+
+#5
+@contextmanager
+def timed(stage, **labels):
+    """
+    Times a block and records it as `stage_duration_seconds{stage=...}`.
+
+    Usage:
+        with timed("feed_fetch", feed=rss_url):
+            response = http_client.get(rss_url)
+    """
+    stack = _stage_stacks.setdefault(threading.get_ident(), [])
+    stack.append(stage)
+    for listener in _stage_listeners:
+        listener("enter", stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("stage_duration_seconds", time.perf_counter() - start, stage=stage, **labels)
+        stack.pop()
+        for listener in _stage_listeners:
+            listener("exit", stage)
+
+
+def current_stage(thread_id):
+    """The innermost open stage on a thread, or None."""
+    stack = _stage_stacks.get(thread_id)
+    return stack[-1] if stack else None
+
+
+def open_stages():
+    """Every stage open on any thread right now (outer stages included)."""
+    return {stage for stack in list(_stage_stacks.values()) for stage in list(stack)}
+
+
+def add_stage_listener(listener):
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener):
+    if listener in _stage_listeners:
+        _stage_listeners.remove(listener)
+
+
+#6
+def reset():
+    """Clears all collected metrics and restarts the run clock."""
+    global _run_started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _gauges.clear()
+        _run_started = datetime.now()
+
+
+#7
+def build_run_report():
+    """Returns the collected metrics as a JSON-serializable dict."""
+    with _lock:
+        return {
+            "run_started": _run_started.strftime("%Y-%m-%d %H:%M:%S"),
+            "run_finished": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_seconds": round((datetime.now() - _run_started).total_seconds(), 3),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(_counters.items())
+            ],
+            "gauges": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(_gauges.items())
+            ],
+            "histograms": [
+                {"name": name, "labels": dict(labels), **histogram.summary()}
+                for (name, labels), histogram in sorted(_histograms.items(), key=lambda item: item[0])
+            ],
+        }
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+
+#8
+def build_prometheus_text():
+    """Renders the collected metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        counter_names = sorted({name for name, _ in _counters})
+        for name in counter_names:
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(_counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        gauge_names = sorted({name for name, _ in _gauges})
+        for name in gauge_names:
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for (gauge_name, labels), value in sorted(_gauges.items()):
+                if gauge_name == name:
+                    lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        histogram_names = sorted({name for name, _ in _histograms})
+        for name in histogram_names:
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for (histogram_name, labels), histogram in sorted(_histograms.items(), key=lambda item: item[0]):
+                if histogram_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.total}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {len(histogram.values)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file = path + ".tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_file, path)
+
+
+#9
+def write_run_report(directory=METRICS_DIR, prom_file=METRICS_PROM_FILE):
+    """
+    Writes this run's metrics as metrics/run_<timestamp>.json and overwrites the Prometheus
+    text file (suitable for node_exporter's textfile collector).
+
+    :return: Path of the JSON report.
+    """
+    report = build_run_report()
+    report_path = os.path.join(directory, f"run_{_run_started.strftime('%Y%m%d_%H%M%S')}.json")
+
+    try:
+        _write_atomic(report_path, json.dumps(report, ensure_ascii=False, indent=4))
+        _write_atomic(prom_file, build_prometheus_text())
+        logger.info(f"Run metrics written to {report_path} and {prom_file}")
+    except OSError as e:
+        logger.error(f"Failed to write run metrics: {e}")
+
+    for histogram in report["histograms"]:
+        if histogram["name"] == "stage_duration_seconds":
+            labels = ", ".join(f"{k}={v}" for k, v in histogram["labels"].items())
+            logger.info(f"[{labels}] count={histogram['count']} total={histogram['sum']:.3f}s p95={histogram['p95']:.3f}s")
+
+    return report_path
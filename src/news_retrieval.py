@@ -22,18 +22,24 @@ import time
 
 # Import from our modules
 from config import logger, RSS_FEED_URL, rss_country_map
-from text_processing import clean_text, clean_url, clean_title_for_matching, compute_text_hash, extract_source_from_url, extract_keywords
-from json_handler import load_posted_news, load_skipped_news
+from text_processing import clean_text, clean_url, clean_title_for_matching, compute_text_hash, extract_source_from_url, extract_keywords_batch
+from metrics import timed, increment
+from coordination import shard_feeds
+from feed_checkpoints import filter_unseen_entries
+from feed_schedule import due_feeds, record_poll
+from article import ArticleRecord
+import http_client
 
 
 #---------------------------------------------------------------------------------------------------------------------------------------------------------
 #1
 
-def get_google_alerts(time_range=1):
-     """
+def get_google_alerts(time_range=1, incremental=True):
+    """
     Retrieves articles from predefined RSS feeds.
     
     :param time_range: Number of days back to fetch news (default: 1 – today's news)
+    :param incremental: Use the poll schedule and feed checkpoints (off for backfill, which reads every entry)
     :return: A list of new articles with additional metadata
     """
     articles = []
@@ -41,151 +47,194 @@ def get_google_alerts(time_range=1):
     start_date = today - timedelta(days=time_range)
     invalid_count = 0
 
-    for rss_url in RSS_FEED_URL:
+    # With multi-node coordination, each node reads only its share of the feeds
+    # Quiet feeds are only fetched when their adaptive poll interval has passed
+    for rss_url in shard_feeds(due_feeds(RSS_FEED_URL) if incremental else RSS_FEED_URL):
         try:
-            response = requests.get(rss_url, timeout=10)
-            response.raise_for_status()
-            feed = feedparser.parse(response.text)
+            with timed("feed_fetch", feed=rss_url):
+                response = http_client.get(rss_url)
+                response.raise_for_status()
+            with timed("feed_parse", feed=rss_url):
+                feed = feedparser.parse(response.text)
+            increment("feed_entries", len(feed.entries), feed=rss_url)
 
             if not feed.entries:
-                print(f"⚠️No articles found in RSS: {rss_url}")
+                if incremental:
+                    record_poll(rss_url)
+                logger.info("⚠️No articles found in RSS: %s", rss_url)
                 continue
 
-            print(f"📡 RSS Source: {rss_url} - {len(feed.entries)} articles found.")
-            rss_source = rss_country_map.get(rss_url, "Unknown") 
-            for entry in feed.entries:
-                try:
-                    article_id = entry.id if hasattr(entry, "id") else str(datetime.now().timestamp())
-                    title = clean_text(entry.title) if hasattr(entry, "title") else None
-                    raw_url = entry.link if hasattr(entry, "link") else None
-                    clean_url = urllib.parse.parse_qs(urllib.parse.urlparse(raw_url).query).get("url", [raw_url])[0] if raw_url else None
-                    summary = clean_text(entry.summary) if hasattr(entry, "summary") else ""
-                    published_dt = datetime(*entry.published_parsed[:6]) if hasattr(entry, "published_parsed") else datetime.now()
-                    published_date_obj = published_dt.date()
-                    published_date = published_dt.strftime("%Y-%m-%d")
-                    published_time = published_dt.strftime("%H:%M:%S")
-
-                
-                    if start_date <= published_date_obj <= today:
-                        if not title or not clean_url:
-                            print(f"⚠️ Invalid article (missing title or URL) – skipping.")
-                            invalid_count += 1
-                            continue
-
-                  
-                        word_count = len(summary.split())
-                        if word_count < 10:
-                            print(f"⚠️ Summary too short ({word_count} words) – skipping.")
-                            invalid_count += 1
-                            continue
-
-                        source = extract_source_from_url(clean_url)
-                        keywords = extract_keywords(summary)
-                        text_hash = compute_text_hash(summary) if summary.strip() else None
-
-                        articles.append({
-                            "id": article_id,
-                            "title": title,
-                            "url": clean_url,
-                            "text_hash": text_hash,
-                            "published_date": published_date,
-                            "published_time": published_time,
-                            "summary": summary,
-                            "source": source,
-                            "keywords": keywords,
-                            "rss_source": rss_source 
-                        })
-                        print(f"✅ Article added: {title}")
-
-                except Exception as e:
-                    print(f"⚠️ Error processing article from RSS ({rss_url}): {e}")
+            logger.info("📡 RSS Source: %s - %d articles found.", rss_url, len(feed.entries))
+            # Drop entries handled in earlier runs before any cleaning, hashing or tokenizing
+            entries = feed.entries
+            if incremental:
+                record_poll(rss_url, entries)
+                entries = filter_unseen_entries(rss_url, entries)
+            feed_articles, feed_invalid = normalize_entries(rss_url, entries, start_date, today)
+            articles.extend(feed_articles)
+            invalid_count += feed_invalid
 
 
         except requests.RequestException as e:
-            print(f"❌ Failed to fetch RSS from - {rss_url}: {e}")
+            increment("feed_fetch_errors", feed=rss_url)
+            if incremental:
+                record_poll(rss_url, error=True)
+            logger.error("❌ Failed to fetch RSS from - %s: %s", rss_url, e)
 
-    print(f"📡 Total new articles retrieved from all RSS feeds: {len(articles)} (Skipped: {invalid_count})")
+    add_keywords(articles)
+    logger.info("📡 Total new articles retrieved from all RSS feeds: %d (Skipped: %d)", len(articles), invalid_count)
     return articles
 
 
 
-
 #2
+def normalize_entry(entry, rss_source):
+    """
+    Builds an ArticleRecord from one feed entry – parsed from a polled feed or delivered by push
+    (push_receiver.py). Entries only need attribute access: id, title, link, summary, published_parsed.
+    """
+    article_id = entry.id if hasattr(entry, "id") else str(datetime.now().timestamp())
+    title = clean_text(entry.title) if hasattr(entry, "title") else None
+    raw_url = entry.link if hasattr(entry, "link") else None
+    clean_url = urllib.parse.parse_qs(urllib.parse.urlparse(raw_url).query).get("url", [raw_url])[0] if raw_url else None
+    summary = clean_text(entry.summary) if hasattr(entry, "summary") else ""
+    published_dt = datetime(*entry.published_parsed[:6]) if getattr(entry, "published_parsed", None) else datetime.now()
+
+    return ArticleRecord(
+        id=article_id,
+        title=title,
+        url=clean_url,
+        text_hash=compute_text_hash(summary) if summary.strip() else None,
+        published_date=published_dt.strftime("%Y-%m-%d"),
+        published_time=published_dt.strftime("%H:%M:%S"),
+        summary=summary,
+        source=extract_source_from_url(clean_url) if clean_url else "",
+        keywords=[],  # Filled in for the whole batch by add_keywords()
+        rss_source=rss_source
+    )
+
+
+def normalize_entries(rss_url, entries, start_date, today):
+    """
+    Normalizes a feed's entries and drops those outside the date range or unusable.
+
+    :return: (articles, number of invalid entries)
+    """
+    articles = []
+    invalid_count = 0
+    rss_source = rss_country_map.get(rss_url, "Unknown")
+
+    for entry in entries:
+        try:
+            article = normalize_entry(entry, rss_source)
+            published_date_obj = datetime.strptime(article.published_date, "%Y-%m-%d").date()
+            if not start_date <= published_date_obj <= today:
+                continue
+
+            if not article.title or not article.url:
+                logger.debug("⚠️ Invalid article (missing title or URL) – skipping.")
+                increment("feed_entries_invalid", reason="missing title or url")
+                invalid_count += 1
+                continue
+
+            word_count = len(article.summary.split())
+            if word_count < 10:
+                logger.debug("⚠️ Summary too short (%d words) – skipping.", word_count)
+                increment("feed_entries_invalid", reason="summary too short")
+                invalid_count += 1
+                continue
+
+            articles.append(article)
+            increment("articles_retrieved", feed=rss_url)
+            logger.debug("✅ Article added: %s", article.title)
+
+        except Exception as e:
+            increment("feed_entry_errors", feed=rss_url)
+            logger.warning("⚠️ Error processing article from RSS (%s): %s", rss_url, e)
+
+    return articles, invalid_count
+
+
+def add_keywords(articles):
+    # TF-IDF keywords across the whole batch, so they describe what is distinctive about each article
+    with timed("keywords"):
+        for article, keywords in zip(articles, extract_keywords_batch([article.summary for article in articles])):
+            article.keywords = keywords
+
+
+
+#3
+@timed("full_text_fetch")
 def fetch_full_text(url, max_words=600):
     try:
-        print(f"🌐 Attempting to fetch article from URL: {url}")
-        # Create the Article object with a custom User-Agent
+        logger.debug("🌐 Attempting to fetch article from URL: %s", url)
+        # Download through the shared client (pooling, timeouts, retries); newspaper only parses
+        response = http_client.get(url)
+        response.raise_for_status()
         article = Article(url, language='en')
-        article.download()
-        print(f"⬇️ Article download successful: {url}")
+        article.download(input_html=response.text)
+        logger.debug("⬇️ Article download successful: %s", url)
         article.parse()
-        print(f"📝 Article parsing successful: {url}")
+        logger.debug("📝 Article parsing successful: %s", url)
 
         text = article.text.strip()
         word_count = len(text.split())
-        print(f"📄 Extracted {word_count} words from article: {url}")
+        logger.debug("📄 Extracted %d words from article: %s", word_count, url)
 
         # Check if the article is too short
         if word_count < 10:
-            print(f"⚠️ Article text too short (<10 words) – skipping: {url}")
+            logger.info("⚠️ Article text too short (<10 words) – skipping: %s", url)
+            increment("full_text_results", result="too short")
             return "⚠️ Article text too short (<10 words)"
 
         # Trim the article if it's too long
         if word_count > max_words:
             text = " ".join(text.split()[:max_words])
-            print(f"✂️ Trimming article to {max_words} words: {url}")
+            logger.debug("✂️ Trimming article to %d words: %s", max_words, url)
 
-        print(f"✅ Full article text successfully extracted: {url}")
+        logger.debug("✅ Full article text successfully extracted: %s", url)
+        increment("full_text_results", result="ok")
         return text
 
     except ArticleException as ae:
-        print(f"⚠️ ArticleException while processing article from {url}: {ae}")
+        logger.warning("⚠️ ArticleException while processing article from %s: %s", url, ae)
+        increment("full_text_results", result="article error")
         return "⚠️ Article processing error"
 
-    except ConnectionError as ce:
-        print(f"⚠️ Connection error while accessing article from {url}: {ce}")
+    except (ConnectionError, requests.exceptions.RequestException) as ce:
+        logger.warning("⚠️ Connection error while accessing article from %s: %s", url, ce)
+        increment("full_text_results", result="connection error")
         return "⚠️ Connection error"
 
     except Exception as e:
-        print(f"⚠️ General error while retrieving article from {url}: {e}")
+        logger.warning("⚠️ General error while retrieving article from %s: %s", url, e)
+        increment("full_text_results", result="error")
         return "⚠️ General article retrieval error"
 
 
-#3
-ef filter_new_articles(articles):
-    try:
-        posted_news = load_posted_news()
-        print(f"✅ Successfully loaded previously sent articles. ({len(posted_news)} items)")
-    except Exception as e:
-        print(f"⚠️ Error loading sent articles: {e}")
-        posted_news = []
-
-    try:
-        skipped_news = load_skipped_news()
-        print(f"✅ Successfully loaded previously skipped articles. ({len(skipped_news)} items)")
-    except Exception as e:
-        print(f"⚠️ Error loading skipped articles: {e}")
-        skipped_news = {}
-
+#4
+@timed("filter")
+def filter_new_articles(articles):
+    """Drops articles without a title or URL and computes their summary hashes; dedup against history happens in messaging."""
     new_articles = []
 
     for article in articles:
-        title = clean_title_for_matching(article.get("title", ""))
-        url = clean_url(article.get("url", ""))
-        content = article.get("summary", "")
+        title = clean_title_for_matching(article.title)
+        url = clean_url(article.url)
+        content = article.summary
         content_word_count = len(content.split())
 
-        print(f"[DEBUG] Checking article: title='{title}' | url='{url}' | summary word count={content_word_count}")
+        logger.debug("Checking article: title='%s' | url='%s' | summary word count=%d", title, url, content_word_count)
 
         if not title or not url:
-            print(f"⚠️ Article missing title or URL: {article}")
+            logger.warning("⚠️ Article missing title or URL: %s", article)
             continue
 
         # תמיד מחשבים hash (אם יש תוכן)
         text_hash = compute_text_hash(content) if content.strip() else None
-        article["text_hash"] = text_hash
+        article.text_hash = text_hash
 
         new_articles.append(article)
 
-    print(f"✅ Found {len(new_articles)} articles to process (duplicates will be filtered later).")
+    logger.info("✅ Found %d articles to process (duplicates will be filtered later).", len(new_articles))
     return new_articles
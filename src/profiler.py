@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# profiler.py - Sampling profiler for `main.py --profile`: per-stage hot functions, flamegraph, allocations
+# ==================================================================================================
+# A background thread samples the Python stack of every busy thread every PROFILE_INTERVAL_MS and tags
+# each sample with the innermost metrics.timed() stage open on that thread (feed_parse, dedup_index,
+# full_text_fetch, summarize, ...). Threads without an open stage are only sampled for the main thread,
+# so idle pool workers and the log listener don't drown the profile. Time spent in C code (lxml, torch)
+# shows up under the Python function that called it. Summarization worker processes are not sampled.
+#
+# Output, in PROFILE_DIR/run_<timestamp>/:
+#   profile.collapsed – one "stage;frame;...;frame count" line per stack, for flamegraph.pl or speedscope
+#   report.txt        – samples per stage, then the top PROFILE_TOP_N functions per stage (self and total)
+#                       and the top allocation sites of each PROFILE_ALLOC_STAGES stage (tracemalloc)
+# ==================================================================================================
+# 📦 Built-in libraries
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from config import logger, PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_TOP_N, PROFILE_ALLOC_STAGES
+import metrics
+
+MAX_STACK_DEPTH = 128
+TRACEMALLOC_FRAMES = 10
+
+
+def frame_label(code):
+    # Collapsed-stack format separates frames with ";". co_qualname is new in Python 3.11.
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+#1
+class SamplingProfiler:
+    """
+    Usage:
+        profiler = SamplingProfiler()
+        profiler.start()
+        ...
+        profiler.stop()
+        profiler.write_report()
+    """
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS, alloc_stages=PROFILE_ALLOC_STAGES, output_dir=PROFILE_DIR):
+        self.interval = interval_ms / 1000
+        self.alloc_stages = set(alloc_stages)
+        self.output_dir = os.path.join(output_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.samples = Counter()  # (stage, frames root-first) -> sample count
+        self.allocations = {}     # stage -> {"count", "peak", "snapshot"} (snapshot of the heaviest pass)
+        self.alloc_depth = 0
+        self.started_tracing = False
+        self.alloc_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.started_at = None
+        self.elapsed = 0.0
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        metrics.add_stage_listener(self.on_stage)
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        self.thread.start()
+        logger.info("🔬 Profiling every %.1f ms – output in %s", self.interval * 1000, self.output_dir)
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        metrics.remove_stage_listener(self.on_stage)
+        if self.started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    #2
+    def run(self):
+        own_id = threading.get_ident()
+        main_id = threading.main_thread().ident
+        while not self.stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stage = metrics.current_stage(thread_id)
+                if stage is None:
+                    if thread_id != main_id:
+                        continue
+                    stage = "untracked"
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.samples[(stage, tuple(reversed(stack)))] += 1
+
+    #3
+    def on_stage(self, event, stage):
+        """Traces allocations while an allocation stage is open; keeps the snapshot of its heaviest pass."""
+        if stage not in self.alloc_stages:
+            return
+        with self.alloc_lock:
+            if event == "enter":
+                self.alloc_depth += 1
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(TRACEMALLOC_FRAMES)
+                    self.started_tracing = True
+                elif self.alloc_depth == 1:
+                    tracemalloc.reset_peak()
+                return
+
+            if self.alloc_depth == 0:
+                return  # Entered before the profiler was installed
+            # Every exit undoes its enter, even when tracing was stopped elsewhere or the snapshot fails,
+            # so a later stage still starts (and stops) tracing
+            try:
+                if not tracemalloc.is_tracing():
+                    return
+                _, peak = tracemalloc.get_traced_memory()
+                entry = self.allocations.setdefault(stage, {"count": 0, "peak": 0, "snapshot": None})
+                entry["count"] += 1
+                if peak >= entry["peak"]:
+                    entry["peak"] = peak
+                    entry["snapshot"] = tracemalloc.take_snapshot().filter_traces((
+                        tracemalloc.Filter(False, tracemalloc.__file__),
+                        tracemalloc.Filter(False, __file__),  # The sampler's own allocations
+                        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                    ))
+            finally:
+                self.alloc_depth -= 1
+                if self.alloc_depth == 0 and self.started_tracing:
+                    tracemalloc.stop()
+                    self.started_tracing = False
+
+    #4
+    def stage_report(self, stage, stage_samples):
+        self_counts = Counter()
+        total_counts = Counter()
+        for (sample_stage, stack), count in self.samples.items():
+            if sample_stage != stage or not stack:
+                continue
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                total_counts[label] += count
+
+        ms_per_sample = self.interval * 1000
+        lines = [f"== {stage}: {stage_samples} samples (~{stage_samples * ms_per_sample / 1000:.2f}s)"]
+        lines.append("  self%   total%  function")
+        for label, count in self_counts.most_common(PROFILE_TOP_N):
+            lines.append(f"  {count / stage_samples:6.1%}  {total_counts[label] / stage_samples:6.1%}  {label}")
+        lines.append("  -- by total (inclusive) --")
+        for label, count in total_counts.most_common(PROFILE_TOP_N):
+            lines.append(f"  {self_counts[label] / stage_samples:6.1%}  {count / stage_samples:6.1%}  {label}")
+        return lines
+
+    def allocation_report(self):
+        lines = []
+        for stage, entry in sorted(self.allocations.items()):
+            lines.append(f"== allocations in {stage}: {entry['count']} passes, peak {entry['peak'] / 1024 / 1024:.1f} MB "
+                         f"(still allocated at the end of the heaviest pass:)")
+            if entry["snapshot"] is None:
+                continue
+            for stat in entry["snapshot"].statistics("lineno")[:PROFILE_TOP_N]:
+                frame = stat.traceback[0]
+                lines.append(f"  {stat.size / 1024:10.1f} KiB  {stat.count:8d} blocks  "
+                             f"{os.path.basename(frame.filename)}:{frame.lineno}")
+        return lines
+
+    #5
+    def write_report(self):
+        """Writes profile.collapsed and report.txt. Returns the output directory."""
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        with open(os.path.join(self.output_dir, "profile.collapsed"), "w", encoding="utf-8") as f:
+            for (stage, stack), count in sorted(self.samples.items()):
+                f.write(";".join((stage,) + stack) + f" {count}\n")
+
+        stage_totals = Counter()
+        for (stage, _), count in self.samples.items():
+            stage_totals[stage] += count
+        total = sum(stage_totals.values()) or 1
+
+        lines = [f"Profile of {self.elapsed:.1f}s run, {total} samples every {self.interval * 1000:g} ms", ""]
+        lines += [f"  {count / total:6.1%}  {count:8d}  {stage}" for stage, count in stage_totals.most_common()]
+        for stage, count in stage_totals.most_common():
+            lines += [""] + self.stage_report(stage, count)
+        if self.allocations:
+            lines += [""] + self.allocation_report()
+
+        with open(os.path.join(self.output_dir, "report.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        logger.info("🔬 Profile written to %s (%d samples).", self.output_dir, total)
+        return self.output_dir
@@ -0,0 +1,469 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# push_receiver.py - Push ingestion: WebSub (PubSubHubbub) subscriber and generic webhook receiver
+# ==================================================================================================
+# Instead of waiting for the next poll, feeds that support WebSub push new entries to us as soon as
+# they are published. Every feed is subscribed at its own hub (or PUSH_HUB_URL) with a callback under
+# PUSH_CALLBACK_URL, and subscriptions are renewed before their lease runs out. Other sources can POST
+# entries as JSON to /webhook.
+#
+# Delivered entries go through the same path as polled ones: feed checkpoints, normalize_entries(),
+# filter_new_articles() and post_articles_to_telegram() (dedup, relevance filter, summarize, send).
+# Deliveries arriving within PUSH_BATCH_SECONDS are handled in one pass, under the run lock, so a
+# pass never overlaps a main.py run. A delivery counts as a poll of that feed, so its next poll is
+# pushed back – polling (main.py) stays the fallback for feeds or hubs that stop pushing.
+#
+#   python push_receiver.py serve          # Receive pushes and keep subscriptions renewed
+#   python push_receiver.py subscribe      # (Re)subscribe every feed now
+#   python push_receiver.py unsubscribe
+#   python push_receiver.py status
+#
+# Routes:
+#   GET  /websub?feed=<feed url>   hub verification of (un)subscribe requests – echoes hub.challenge
+#   POST /websub?feed=<feed url>   content delivery (Atom/RSS), signed with PUSH_SECRET (X-Hub-Signature)
+#   POST /webhook                  {"feed": ..., "entries": [{"id", "title", "link", "summary", "published"}]}
+#                                  with "Authorization: Bearer <PUSH_SECRET>"
+#   GET  /health
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import hashlib
+import hmac
+import json
+import queue
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# 🌐 Third-party libraries
+import feedparser
+import requests
+from config import (logger, RSS_FEED_URL, PUSH_RECEIVER_HOST, PUSH_RECEIVER_PORT, PUSH_CALLBACK_URL, PUSH_HUB_URL,
+                    PUSH_SECRET, PUSH_LEASE_SECONDS, PUSH_BATCH_SECONDS, PUSH_SUBSCRIPTIONS_FILE, shutdown_logging)
+from json_handler import state_lock, read_json_checked, write_json_atomic
+from news_retrieval import normalize_entries, add_keywords, filter_new_articles
+from messaging import post_articles_to_telegram
+from scheduler import RunBudget, save_backlog
+from summarizer import shutdown_summarizer_pool
+from feed_checkpoints import filter_unseen_entries, commit_feed_checkpoints, reset_checkpoint_cache
+from feed_schedule import record_poll, commit_feed_schedule
+from lock_manager import create_lock, remove_lock, is_script_running
+from metrics import timed, increment, write_run_report
+from resource_governor import governor
+import metrics
+import http_client
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+MAX_BODY_BYTES = 5 * 1024 * 1024
+RENEW_CHECK_SECONDS = 3600
+RENEW_BEFORE = timedelta(days=1)        # Renew a verified subscription this long before its lease ends
+RETRY_PENDING_AFTER = timedelta(hours=1)  # Resubscribe if the hub never verified the request
+RETRY_DENIED_AFTER = timedelta(days=1)
+LOCK_RETRY_SECONDS = 30                 # How often a pass waiting for a main.py run checks the lock again
+SIGNATURE_ALGORITHMS = {"sha1": hashlib.sha1, "sha256": hashlib.sha256, "sha384": hashlib.sha384, "sha512": hashlib.sha512}
+
+
+#1
+def load_subscriptions():
+    with state_lock(PUSH_SUBSCRIPTIONS_FILE, exclusive=False):
+        return read_json_checked(PUSH_SUBSCRIPTIONS_FILE, {})
+
+
+def update_subscription(feed, **fields):
+    with state_lock(PUSH_SUBSCRIPTIONS_FILE):
+        subscriptions = read_json_checked(PUSH_SUBSCRIPTIONS_FILE, {})
+        subscriptions.setdefault(feed, {}).update(fields)
+        write_json_atomic(PUSH_SUBSCRIPTIONS_FILE, subscriptions)
+    return subscriptions[feed]
+
+
+def callback_url(feed):
+    return f"{PUSH_CALLBACK_URL}/websub?feed={urllib.parse.quote(feed, safe='')}"
+
+
+def discover_hub(feed):
+    """Returns (hub, topic) advertised by the feed (<link rel="hub"/"self">), falling back to PUSH_HUB_URL and the feed URL."""
+    hub, topic = PUSH_HUB_URL, feed
+    try:
+        response = http_client.get(feed)
+        response.raise_for_status()
+        for link in feedparser.parse(response.text).feed.get("links", []):
+            if link.get("rel") == "hub" and link.get("href"):
+                hub = link["href"]
+            elif link.get("rel") == "self" and link.get("href"):
+                topic = link["href"]
+    except requests.RequestException as e:
+        logger.warning("⚠️ Could not read %s to discover its hub – using %s: %s", feed, hub, e)
+    return hub, topic
+
+
+#2
+def subscribe(feed, mode="subscribe"):
+    """Sends a (un)subscribe request to the feed's hub. The hub confirms it asynchronously by calling /websub."""
+    if not PUSH_CALLBACK_URL:
+        logger.warning("⚠️ PUSH_CALLBACK_URL is not set – hubs can't reach this receiver, not subscribing %s.", feed)
+        return False
+
+    hub, topic = discover_hub(feed)
+    data = {"hub.mode": mode, "hub.topic": topic, "hub.callback": callback_url(feed)}
+    if mode == "subscribe":
+        data["hub.lease_seconds"] = PUSH_LEASE_SECONDS
+        if PUSH_SECRET:
+            data["hub.secret"] = PUSH_SECRET
+
+    # Recorded first: a hub may verify before it even answers this request
+    update_subscription(feed, hub=hub, topic=topic, state="pending" if mode == "subscribe" else "unsubscribing",
+                        requested_at=datetime.now().strftime(TIMESTAMP_FORMAT))
+    try:
+        response = http_client.post(hub, data=data)
+    except requests.RequestException as e:
+        update_subscription(feed, state="failed", error=str(e))
+        increment("push_subscribe_errors", feed=feed)
+        logger.error("❌ %s request for %s to %s failed: %s", mode.capitalize(), feed, hub, e)
+        return False
+
+    if response.status_code not in (202, 204):
+        update_subscription(feed, state="failed", error=f"HTTP {response.status_code}: {response.text[:200]}")
+        increment("push_subscribe_errors", feed=feed)
+        logger.error("❌ Hub %s rejected the %s request for %s: HTTP %d", hub, mode, feed, response.status_code)
+        return False
+
+    increment("push_subscribe_requests", mode=mode)
+    logger.info("📮 %s request for %s sent to %s – waiting for verification.", mode.capitalize(), feed, hub)
+    return True
+
+
+def renew_subscriptions(now=None):
+    """Subscribes feeds that have no subscription, whose lease ends within a day, or whose last request got nowhere."""
+    now = now or datetime.now()
+    subscriptions = load_subscriptions()
+    for feed in RSS_FEED_URL:
+        subscription = subscriptions.get(feed)
+        if subscription:
+            state = subscription.get("state")
+            requested_at = datetime.strptime(subscription.get("requested_at", "1970-01-01 00:00:00"), TIMESTAMP_FORMAT)
+            if state == "verified" and subscription.get("expires_at"):
+                if datetime.strptime(subscription["expires_at"], TIMESTAMP_FORMAT) - now > RENEW_BEFORE:
+                    continue
+            elif state == "pending" and now - requested_at < RETRY_PENDING_AFTER:
+                continue
+            elif state in ("denied", "failed") and now - requested_at < RETRY_DENIED_AFTER:
+                continue
+            elif state == "unsubscribed":
+                continue  # Until `python push_receiver.py subscribe`
+        subscribe(feed)
+
+
+#3
+def verify_signature(body, header):
+    """Checks an X-Hub-Signature header ("sha256=<hex hmac of the body>"). Unsigned content is only accepted without a secret."""
+    if not PUSH_SECRET:
+        return True
+    algorithm, _, signature = (header or "").partition("=")
+    digest = SIGNATURE_ALGORITHMS.get(algorithm.lower())
+    if digest is None or not signature:
+        return False
+    expected = hmac.new(PUSH_SECRET.encode("utf-8"), body, digest).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+def parse_published(value):
+    """ISO 8601 string or epoch seconds -> UTC struct_time, like feedparser's published_parsed."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).timetuple()
+    published = datetime.fromisoformat(str(value).strip())
+    if published.tzinfo:
+        published = published.astimezone(timezone.utc)
+    return published.timetuple()
+
+
+def webhook_entries(payload):
+    """
+    Turns a webhook payload into (feed, feed-like entries).
+    Accepts {"feed": ..., "entries": [...]} or a single entry; an entry needs "title" and "link" (or "url").
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be a JSON object")
+    feed = payload.get("feed") or "webhook"
+    items = payload["entries"] if "entries" in payload else [payload]
+    if not isinstance(items, list):
+        raise ValueError("'entries' must be a list")
+
+    entries = []
+    for item in items:
+        link = item.get("link") or item.get("url")
+        if not item.get("title") or not link:
+            raise ValueError("every entry needs a title and a link")
+        entry = feedparser.FeedParserDict(id=str(item.get("id") or link), title=item["title"], link=link)
+        if item.get("summary"):
+            entry["summary"] = item["summary"]
+        if item.get("published") is not None:
+            entry["published_parsed"] = parse_published(item["published"])
+        entries.append(entry)
+    return feed, entries
+
+
+#4
+class PushIngestor:
+    """
+    Collects pushed entries and runs them through the pipeline in passes: a pass starts
+    PUSH_BATCH_SECONDS after the first delivery, and waits for the run lock if main.py is running.
+    """
+
+    def __init__(self, batch_seconds=PUSH_BATCH_SECONDS):
+        self.batch_seconds = batch_seconds
+        self.deliveries = queue.Queue()
+        self.stop_event = threading.Event()
+        self.worker = threading.Thread(target=self.run, name="push-ingestor", daemon=True)
+
+    def start(self):
+        self.worker.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.deliveries.put(None)
+        self.worker.join()
+
+    def deliver(self, feed, entries):
+        increment("push_entries_received", len(entries), feed=feed)
+        self.deliveries.put((feed, entries))
+
+    def drain(self, batch, timeout=None):
+        """Moves queued deliveries into `batch` ({feed: {entry id: entry}}); waits up to `timeout` for the first."""
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                delivery = self.deliveries.get(timeout=remaining) if remaining > 0 else self.deliveries.get_nowait()
+            except queue.Empty:
+                return
+            if delivery is None:
+                return
+            feed, entries = delivery
+            feed_entries = batch.setdefault(feed, {})
+            for entry in entries:
+                feed_entries[entry.get("id") or entry.get("link") or id(entry)] = entry
+
+    def run(self):
+        batch = {}
+        while not self.stop_event.is_set():
+            if not batch:
+                delivery = self.deliveries.get()
+                if delivery is None:
+                    break
+                self.deliveries.put(delivery)
+                self.drain(batch, timeout=self.batch_seconds)
+                continue
+            if self.process(batch):
+                batch = {}
+            else:
+                self.stop_event.wait(LOCK_RETRY_SECONDS)
+                self.drain(batch)
+
+        self.drain(batch)
+        if batch:
+            self.process(batch)  # Don't drop what was received before shutdown
+
+    def process(self, batch):
+        """Runs one pass under the run lock. Returns False if a main.py run holds the lock."""
+        if is_script_running() or not create_lock():
+            logger.info("⏳ A run is in progress – %d pushed feeds wait for it.", len(batch))
+            return False
+        try:
+            reset_checkpoint_cache()  # main.py runs may have committed checkpoints since the last pass
+            process_pushed({feed: list(entries.values()) for feed, entries in batch.items()})
+        except Exception as e:
+            increment("push_pass_errors")
+            logger.error("❌ Processing pushed entries failed: %s", e)
+        finally:
+            remove_lock()
+            governor.record_peaks()
+            write_run_report()
+            metrics.reset()
+            governor.reset_peaks()  # Each pass reports its own memory peaks
+        return True
+
+
+@timed("push_pass")
+def process_pushed(batch):
+    """Runs pushed entries ({feed: entries}) through the same checkpoint, normalization, dedup and send path as polling."""
+    today = datetime.today().date()
+    start_date = today - timedelta(days=1)
+    articles = []
+    for feed, entries in batch.items():
+        fresh = filter_unseen_entries(feed, entries)
+        if feed in RSS_FEED_URL:
+            record_poll(feed, entries)  # Counts as a poll, so polling this feed backs off while it pushes
+        feed_articles, invalid = normalize_entries(feed, fresh, start_date, today)
+        articles.extend(feed_articles)
+        logger.info("📬 Push from %s: %d entries, %d new, %d usable (%d invalid).",
+                    feed, len(entries), len(fresh), len(feed_articles), invalid)
+
+    add_keywords(articles)
+    new_articles = filter_new_articles(articles)
+    if new_articles:
+        # Each pass gets its own budget, and adds what it defers to the backlog instead of replacing
+        # what cron runs deferred
+        _, deferred = post_articles_to_telegram(new_articles, shutdown_pool=False, defer_to_backlog=False,
+                                                budget=RunBudget())
+        save_backlog(deferred, merge=True)
+    commit_feed_checkpoints()
+    commit_feed_schedule()
+
+
+#5
+class PushRequestHandler(BaseHTTPRequestHandler):
+    """WebSub callback (/websub), generic webhook (/webhook) and /health."""
+
+    ingestor = None
+
+    def _send(self, status, body="", content_type="text/plain"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self):
+        url = urllib.parse.urlparse(self.path)
+        return url.path.rstrip("/"), {key: values[0] for key, values in urllib.parse.parse_qs(url.query).items()}
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            return None
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        path, params = self._route()
+        if path == "/health":
+            return self._send(200, json.dumps({"status": "ok"}), "application/json")
+        if path != "/websub":
+            return self._send(404, "not found")
+
+        # Hub verification of a subscribe/unsubscribe request we made (or a denial)
+        feed, mode, topic = params.get("feed"), params.get("hub.mode"), params.get("hub.topic")
+        subscription = load_subscriptions().get(feed) if feed else None
+        if not subscription or topic != subscription.get("topic"):
+            increment("push_verifications", result="unknown topic")
+            return self._send(404, "unknown subscription")
+
+        now = datetime.now()
+        if mode == "denied":
+            update_subscription(feed, state="denied", error=params.get("hub.reason", ""))
+            logger.warning("🚫 Hub denied the subscription for %s: %s", feed, params.get("hub.reason", "no reason given"))
+            return self._send(200)
+        if mode == "subscribe" and subscription.get("state") in ("pending", "verified"):
+            lease = int(params.get("hub.lease_seconds") or PUSH_LEASE_SECONDS)
+            update_subscription(feed, state="verified", verified_at=now.strftime(TIMESTAMP_FORMAT),
+                                expires_at=(now + timedelta(seconds=lease)).strftime(TIMESTAMP_FORMAT), error=None)
+            logger.info("✅ Push subscription verified for %s (lease %.1f days).", feed, lease / 86400)
+        elif mode == "unsubscribe" and subscription.get("state") == "unsubscribing":
+            update_subscription(feed, state="unsubscribed", expires_at=None)
+            logger.info("👋 Push subscription removed for %s.", feed)
+        else:
+            increment("push_verifications", result="unexpected mode")
+            return self._send(404, "no such request pending")
+
+        increment("push_verifications", result=mode)
+        self._send(200, params.get("hub.challenge", ""))
+
+    def do_POST(self):
+        path, params = self._route()
+        body = self._read_body()
+        if body is None:
+            return self._send(413, "too large")
+        if path == "/websub":
+            return self._websub_delivery(params.get("feed"), body)
+        if path == "/webhook":
+            return self._webhook(body)
+        self._send(404, "not found")
+
+    def _websub_delivery(self, feed, body):
+        if feed not in RSS_FEED_URL:
+            return self._send(404, "unknown feed")
+        # A bad signature is acknowledged but ignored, as WebSub requires
+        if not verify_signature(body, self.headers.get("X-Hub-Signature")):
+            increment("push_rejected", reason="bad signature")
+            logger.warning("⚠️ Ignoring push for %s with a missing or invalid signature.", feed)
+            return self._send(202)
+
+        entries = feedparser.parse(body).entries
+        update_subscription(feed, last_delivery=datetime.now().strftime(TIMESTAMP_FORMAT))
+        self.ingestor.deliver(feed, entries)
+        self._send(202)
+
+    def _webhook(self, body):
+        token = (self.headers.get("Authorization") or "").removeprefix("Bearer ").strip()
+        if not PUSH_SECRET or not hmac.compare_digest(token, PUSH_SECRET):
+            increment("push_rejected", reason="bad token")
+            return self._send(403, "forbidden")
+        try:
+            feed, entries = webhook_entries(json.loads(body))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            increment("push_rejected", reason="invalid payload")
+            return self._send(400, json.dumps({"error": f"Invalid payload: {e}"}), "application/json")
+        self.ingestor.deliver(feed, entries)
+        self._send(202, json.dumps({"accepted": len(entries)}), "application/json")
+
+    def log_message(self, format, *args):
+        logger.debug(f"push-receiver {self.address_string()} {format % args}")
+
+
+#6
+def run_receiver(host=PUSH_RECEIVER_HOST, port=PUSH_RECEIVER_PORT):
+    if not PUSH_SECRET:
+        logger.warning("⚠️ PUSH_SECRET is not set – WebSub deliveries are unsigned and /webhook is disabled.")
+    governor.start()
+    PushRequestHandler.ingestor = PushIngestor().start()
+    server = ThreadingHTTPServer((host, port), PushRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="push-receiver", daemon=True).start()
+    logger.info("📥 Push receiver listening on http://%s:%d (callback base: %s)", host, port, PUSH_CALLBACK_URL or "not set")
+
+    # The server is up before subscribing, since hubs verify by calling back
+    try:
+        while True:
+            renew_subscriptions()
+            time.sleep(RENEW_CHECK_SECONDS)
+    except KeyboardInterrupt:
+        logger.info("🛑 Push receiver stopping...")
+    finally:
+        server.shutdown()
+        server.server_close()
+        PushRequestHandler.ingestor.stop()
+        governor.stop()
+        shutdown_summarizer_pool()
+        http_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Receive WebSub/webhook pushes and feed them into the pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the receiver and keep subscriptions renewed")
+    serve_parser.add_argument("--host", default=PUSH_RECEIVER_HOST)
+    serve_parser.add_argument("--port", type=int, default=PUSH_RECEIVER_PORT)
+    commands.add_parser("subscribe", help="(Re)subscribe every feed now")
+    commands.add_parser("unsubscribe", help="Unsubscribe every feed")
+    commands.add_parser("status", help="Show the subscription of every feed")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "serve":
+            run_receiver(args.host, args.port)
+        elif args.command in ("subscribe", "unsubscribe"):
+            for feed_url in RSS_FEED_URL:
+                subscribe(feed_url, mode=args.command)
+        else:
+            subscriptions = load_subscriptions()
+            for feed_url in RSS_FEED_URL:
+                subscription = subscriptions.get(feed_url, {})
+                print(f"{subscription.get('state', 'none'):13}  expires {subscription.get('expires_at') or '-':19}  "
+                      f"last push {subscription.get('last_delivery', '-'):19}  {feed_url}")
+    finally:
+        shutdown_logging()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# relevance.py - Pre-fetch relevance scoring and filtering of candidate articles
+# ==================================================================================================
+# 📦 Built-in libraries
+from collections import Counter
+from config import (logger, RELEVANCE_MIN_SCORE, RELEVANCE_LANGUAGES, BLOCKED_DOMAINS, CYBER_KEYWORDS)
+from text_processing import tokenize, is_youtube_link, is_summary_relevant, extract_source_from_url
+from metrics import increment, timed
+
+# 🌐 Optional: a real language detector if installed, otherwise a stopword heuristic is used
+try:
+    from langdetect import detect, DetectorFactory, LangDetectException
+    DetectorFactory.seed = 0  # Deterministic results
+except ImportError:
+    detect = None
+
+
+DEFAULT_CYBER_KEYWORDS = {
+    "cyber", "cyberattack", "cybersecurity", "security", "hacker", "hackers", "hacked", "hacking",
+    "breach", "breached", "leak", "leaked", "ransomware", "malware", "phishing", "spyware", "botnet",
+    "trojan", "backdoor", "exploit", "exploited", "vulnerability", "vulnerabilities", "cve", "zero-day",
+    "patch", "patched", "ddos", "attack", "attackers", "intrusion", "espionage", "apt", "credentials",
+    "encryption", "encrypted", "extortion", "stolen", "threat", "incident", "compromise", "compromised",
+    "data breach", "supply chain", "ransom", "infostealer", "cisa", "nist",
+}
+CYBER_LEXICON = set(CYBER_KEYWORDS) or DEFAULT_CYBER_KEYWORDS
+LEXICON_WORDS = {term for term in CYBER_LEXICON if " " not in term and "-" not in term}
+LEXICON_PHRASES = CYBER_LEXICON - LEXICON_WORDS
+
+# Very common English function words – used when langdetect is not installed
+ENGLISH_STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "is", "are", "was", "were",
+    "has", "have", "had", "that", "this", "it", "its", "by", "from", "at", "as", "be", "been", "after",
+    "over", "new", "said", "says", "will", "their", "they", "than", "more", "into", "about",
+}
+
+
+#1
+def detect_language(text):
+    """
+    Returns an ISO 639-1 code when langdetect is installed, otherwise "en" or "other"
+    based on the share of common English function words.
+    """
+    if detect is not None:
+        try:
+            return detect(text)
+        except LangDetectException:
+            return "unknown"
+
+    tokens = tokenize(text)
+    if not tokens:
+        return "unknown"
+    english_ratio = sum(1 for token in tokens if token in ENGLISH_STOPWORDS) / len(tokens)
+    return "en" if english_ratio >= 0.1 else "other"
+
+
+#2
+def is_blocked_domain(url):
+    domain = extract_source_from_url(url).lower()
+    return any(domain == blocked or domain.endswith("." + blocked) for blocked in BLOCKED_DOMAINS)
+
+
+#3
+def score_article(article):
+    """
+    Scores a candidate article from its title and RSS summary (no network access).
+
+    :return: (score, reason) – reason is None when the article passes, otherwise why it was dropped:
+             "youtube", "blocked_domain", "language" or "low_score".
+    """
+    url = article.url
+    title = article.title
+    summary = article.summary
+
+    if is_youtube_link(url):
+        return 0.0, "youtube"
+    if is_blocked_domain(url):
+        return 0.0, "blocked_domain"
+
+    text = f"{title} {summary}"
+    if RELEVANCE_LANGUAGES:
+        language = detect_language(text)
+        if language not in RELEVANCE_LANGUAGES and language != "unknown":
+            return 0.0, "language"
+
+    # One point per distinct lexicon term; title terms count double because alerts match on them
+    lowered = text.lower()
+    summary_hits = set(tokenize(summary)) & LEXICON_WORDS
+    title_hits = set(tokenize(title)) & LEXICON_WORDS
+    phrase_hits = {phrase for phrase in LEXICON_PHRASES if phrase in lowered}
+    score = len(summary_hits | title_hits) + len(title_hits) + len(phrase_hits)
+
+    # Bonus when the summary is actually about the title (not a page that merely mentions it)
+    if is_summary_relevant(summary, title):
+        score += 0.5
+
+    if score < RELEVANCE_MIN_SCORE:
+        return score, "low_score"
+    return score, None
+
+
+#4
+@timed("prefilter")
+def prefilter_articles(articles, dry_run=False):
+    """
+    Scores every candidate, drops the ones that fail, and ranks the rest by score (highest first,
+    feed order kept for ties). Each article gets its relevance_score set.
+
+    :param dry_run: Only log and count what would be dropped (RELEVANCE_FILTER_MODE=log); every article is kept
+    :return: (kept_articles, dropped) where dropped is a list of (article, reason, score).
+    """
+    kept = []
+    dropped = []
+    reasons = Counter()
+
+    for article in articles:
+        score, reason = score_article(article)
+        article.relevance_score = score
+        if reason:
+            reasons[reason] += 1
+            if dry_run:
+                increment("prefilter_would_drop", reason=reason)
+                logger.info("🎯 Relevance filter would drop (%s, score %g): %s", reason, score, article.url)
+                kept.append(article)
+                continue
+            dropped.append((article, reason, score))
+            increment("prefilter_dropped", reason=reason)
+        else:
+            kept.append(article)
+
+    if dry_run:
+        logger.info("🎯 Relevance filter (log only): %d of %d candidates would be dropped (%s)",
+                    sum(reasons.values()), len(articles), dict(reasons) or "none")
+        return kept, dropped
+
+    kept.sort(key=lambda article: -article.relevance_score)
+    increment("prefilter_kept", len(kept))
+
+    logger.info("🎯 Relevance filter: kept %d of %d candidates (dropped: %s)",
+                len(kept), len(articles), dict(reasons) or "none")
+    return kept, dropped
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# resource_governor.py - Memory-aware limits for the extraction and summarization stages
+# ==================================================================================================
+# A background thread samples, every MEMORY_SAMPLE_INTERVAL_MS, the RSS of this process plus its
+# summarization workers and the system's available memory, and classifies it:
+#   ok       – full SUMMARIZER_BATCH_SIZE batches, EXTRACTION_WORKERS pages extracted at once
+#   high     – batches halve on every check while it lasts, pages are extracted one at a time
+#   critical – batches of one, and the model is unloaded between phases (reloaded when next needed)
+# Batches grow back (doubling) once memory recovers. The peak RSS seen while each metrics.timed()
+# stage was open is recorded in the run report as stage_peak_rss_mb{stage=...}.
+#
+# Usage:
+#     governor.start()     # main.py / backfill.py / push_receiver.py, at the start of a run
+#     size = governor.batch_size(SUMMARIZER_BATCH_SIZE)
+#     with governor.extraction_slot():        # In each EXTRACTION_WORKERS thread (messaging.extract_page)
+#         text = fetch_full_text(url)
+#     governor.relieve("extraction")
+#     governor.stop()      # Writes the peaks to the run report
+# ==================================================================================================
+# 📦 Built-in libraries
+import gc
+import threading
+from contextlib import contextmanager
+# 🌐 Third-party libraries
+import psutil
+from config import (logger, MEMORY_GOVERNOR_ENABLED, MEMORY_SAMPLE_INTERVAL_MS, MEMORY_LOW_AVAILABLE_MB,
+                    MEMORY_CRITICAL_AVAILABLE_MB, MEMORY_RSS_LIMIT_MB)
+import metrics
+from metrics import increment, set_gauge
+
+MB = 1024 * 1024
+LEVELS = ("ok", "high", "critical")
+
+
+#1
+class MemoryGovernor:
+
+    def __init__(self, enabled=MEMORY_GOVERNOR_ENABLED, interval_ms=MEMORY_SAMPLE_INTERVAL_MS,
+                 low_available_mb=MEMORY_LOW_AVAILABLE_MB, critical_available_mb=MEMORY_CRITICAL_AVAILABLE_MB,
+                 rss_limit_mb=MEMORY_RSS_LIMIT_MB):
+        self.enabled = enabled
+        self.interval = interval_ms / 1000
+        self.low_available_mb = low_available_mb
+        self.critical_available_mb = critical_available_mb
+        self.rss_limit_mb = rss_limit_mb
+        self.process = psutil.Process()
+        self.level = "ok"
+        self.scale = 1.0          # Share of the requested batch size currently allowed
+        self.last_batch_size = None
+        self.peaks = {}           # stage -> peak RSS (MB) while it was open
+        self.run_peak_mb = 0.0
+        self.min_available_mb = None
+        self.lock = threading.Lock()
+        self.extraction = threading.Condition()
+        self.extracting = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if not self.enabled or self.thread is not None:
+            return
+        self.stop_event.clear()
+        metrics.add_stage_listener(self.on_stage)
+        self.thread = threading.Thread(target=self.run, name="memory-governor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        metrics.remove_stage_listener(self.on_stage)
+        self.record_peaks()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def on_stage(self, event, stage):
+        # A reading when each stage ends (it is already off the stack), so short stages get a peak too
+        if event == "exit":
+            self.sample(stage)
+
+    #2
+    def tree_rss_mb(self):
+        """RSS of this process and its children (the summarization workers)."""
+        total = 0
+        for process in [self.process] + self.process.children(recursive=True):
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / MB
+
+    def classify(self, rss_mb, available_mb):
+        if available_mb < self.critical_available_mb or (self.rss_limit_mb and rss_mb >= self.rss_limit_mb):
+            return "critical"
+        if available_mb < self.low_available_mb or (self.rss_limit_mb and rss_mb >= 0.8 * self.rss_limit_mb):
+            return "high"
+        return "ok"
+
+    def sample(self, ending_stage=None):
+        """Takes a reading, updates the peaks of the open stages and returns the pressure level."""
+        if not self.enabled:
+            return "ok"
+        try:
+            rss_mb = self.tree_rss_mb()
+            available_mb = psutil.virtual_memory().available / MB
+        except psutil.Error:
+            return self.level
+        level = self.classify(rss_mb, available_mb)
+        stages = metrics.open_stages() | ({ending_stage} if ending_stage else set())
+
+        with self.lock:
+            self.run_peak_mb = max(self.run_peak_mb, rss_mb)
+            if self.min_available_mb is None or available_mb < self.min_available_mb:
+                self.min_available_mb = available_mb
+            for stage in stages:
+                if rss_mb > self.peaks.get(stage, 0):
+                    self.peaks[stage] = rss_mb
+            previous, self.level = self.level, level
+
+        if level != previous:
+            increment("memory_pressure_changes", level=level)
+            log = logger.warning if LEVELS.index(level) > LEVELS.index(previous) else logger.info
+            log("🧯 Memory pressure %s → %s (RSS %.0f MB, %.0f MB available).", previous, level, rss_mb, available_mb)
+        return level
+
+    def current_level(self):
+        # Between samples of the background thread the last reading is fresh enough
+        return self.level if self.thread is not None else self.sample()
+
+    #3
+    def batch_size(self, requested):
+        """The summarization batch size to use now: shrinks (halving) under pressure, grows back when it passes."""
+        if not self.enabled:
+            return requested
+        level = self.current_level()
+        with self.lock:
+            if level == "critical":
+                self.scale = 1 / max(1, requested)
+            elif level == "high":
+                self.scale = max(1 / max(1, requested), self.scale / 2)
+            else:
+                self.scale = min(1.0, self.scale * 2)
+            size = max(1, int(requested * self.scale))
+            changed, self.last_batch_size = size != self.last_batch_size, size
+        if size < requested:
+            increment("memory_batches_shrunk")
+        if changed and size < requested:
+            logger.info("🧯 Memory pressure %s – summarizing %d articles per batch instead of %d.", level, size, requested)
+        return size
+
+    @contextmanager
+    def extraction_slot(self):
+        """
+        Wraps one page download + parse. The extraction pool runs EXTRACTION_WORKERS of these at once;
+        under memory pressure the workers wait here so only one page is extracted at a time.
+        """
+        with self.extraction:
+            while self.enabled and self.extracting and self.current_level() != "ok":
+                increment("memory_extraction_waits")
+                self.extraction.wait(max(self.interval, 0.1))
+            self.extracting += 1
+        try:
+            yield
+        finally:
+            with self.extraction:
+                self.extracting -= 1
+                self.extraction.notify_all()
+
+    def relieve(self, phase):
+        """
+        Called between phases (before extraction, after summarization). When memory is critical, unloads
+        the summarization model and workers – the next summary reloads them.
+        """
+        if not self.enabled or self.sample() != "critical":
+            return False
+        from summarizer import unload_summarizer  # summarizer depends on this module's callers, not the reverse
+
+        unloaded = unload_summarizer()
+        gc.collect()
+        if unloaded:
+            increment("memory_model_unloads", phase=phase)
+            logger.warning("🧯 Memory critical before %s – summarization model unloaded (reloaded when next needed).", phase)
+            self.sample()
+        return unloaded
+
+    #4
+    def record_peaks(self):
+        """Writes the peaks to the run report (gauges)."""
+        with self.lock:
+            peaks = dict(self.peaks)
+            run_peak, min_available = self.run_peak_mb, self.min_available_mb
+        for stage, peak in peaks.items():
+            set_gauge("stage_peak_rss_mb", round(peak, 1), stage=stage)
+        if run_peak:
+            set_gauge("run_peak_rss_mb", round(run_peak, 1))
+        if min_available is not None:
+            set_gauge("min_available_memory_mb", round(min_available, 1))
+
+    def reset_peaks(self):
+        """Starts a new set of peaks (the push receiver writes a report per pass)."""
+        with self.lock:
+            self.peaks.clear()
+            self.run_peak_mb = 0.0
+            self.min_available_mb = None
+
+
+governor = MemoryGovernor()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# retry_scheduler.py - When (and whether) a skipped article is tried again
+# ==================================================================================================
+# Every record in the skipped store gets a next_attempt_at from its failure reason and fail_count:
+# - network errors (fetch/connection/send): RETRY_BASE_MINUTES, doubling per failure, at most RETRY_MAX_HOURS
+# - too little text or summary: RETRY_SHORT_TEXT_HOURS, doubling – pages are often completed later
+# - too little text on NON_ARTICLE_DOMAINS, duplicates, pre-fetch filter drops and 3 failures: never (None)
+# The store writers also keep RETRY_INDEX_FILE, the [next_attempt_at, id] pairs sorted by time, so a run
+# finds the due articles with a binary search instead of reading and scanning the whole store.
+#
+#   python retry_scheduler.py      # Lists scheduled retries, soonest first
+# ==================================================================================================
+# 📦 Built-in libraries
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from config import (logger, SKIPPED_NEWS_FILE, RETRY_INDEX_FILE, RETRY_BASE_MINUTES, RETRY_MAX_HOURS,
+                    RETRY_SHORT_TEXT_HOURS, NON_ARTICLE_DOMAINS)
+from text_processing import extract_keywords_batch
+from metrics import increment
+from article import ArticleRecord
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+MAX_FAILURES = 3  # Same limit as load_skipped_news() and post_articles_to_telegram()
+TEXT_TOO_SHORT = "Article text is empty or too short"
+
+
+#1
+def is_non_article_domain(url):
+    host = (urlparse(url).hostname or "").lower().removeprefix("www.")
+    return any(host == domain or host.endswith("." + domain) for domain in NON_ARTICLE_DOMAINS)
+
+
+def retry_policy(reason, url=""):
+    """"never", "network" or "content" for a skip reason (as written by post_articles_to_telegram)."""
+    if reason.startswith(("Duplicate", "Filtered")):
+        return "never"
+    if reason.startswith(TEXT_TOO_SHORT):
+        return "never" if is_non_article_domain(url) else "content"
+    if reason.startswith("Final summary"):
+        return "content"
+    return "network"  # Fetch and send errors, and anything unexpected
+
+
+def retry_delay(policy, fail_count):
+    base = RETRY_BASE_MINUTES * 60 if policy == "network" else RETRY_SHORT_TEXT_HOURS * 3600
+    return min(base * 2 ** max(0, fail_count - 1), RETRY_MAX_HOURS * 3600)
+
+
+#2
+def compute_next_attempt(record, now):
+    """(policy, next attempt timestamp or None) for a skipped-store record."""
+    policy = retry_policy(record.get("reason", ""), record.get("url", ""))
+    fail_count = record.get("fail_count", 1)
+    if policy == "never" or fail_count >= MAX_FAILURES:
+        return "never", None
+    return policy, (now + timedelta(seconds=retry_delay(policy, fail_count))).strftime(TIMESTAMP_FORMAT)
+
+
+def schedule_retry(record, now=None):
+    """Sets record["next_attempt_at"] (None = never retried) from its reason, url and fail_count."""
+    policy, record["next_attempt_at"] = compute_next_attempt(record, now or datetime.now())
+    increment("retries_scheduled", policy=policy)
+    return record
+
+
+def next_attempt_at(record):
+    """The record's retry time; records written before retry scheduling are scheduled from their skip date."""
+    if "next_attempt_at" in record:
+        return record["next_attempt_at"]
+    try:
+        skipped_at = datetime.strptime(record.get("date", ""), "%Y-%m-%d")
+    except ValueError:
+        return None
+    return compute_next_attempt(record, skipped_at)[1]
+
+
+def retry_due(record, now=None):
+    attempt_at = next_attempt_at(record)
+    return attempt_at is not None and attempt_at <= (now or datetime.now()).strftime(TIMESTAMP_FORMAT)
+
+
+#3
+def build_retry_index(skipped):
+    """Sorted [next_attempt_at, id] pairs of the skipped articles that will be retried."""
+    index = []
+    for article_id, record in skipped.items():
+        attempt_at = next_attempt_at(record)
+        if attempt_at:
+            index.append([attempt_at, article_id])
+    index.sort()
+    return index
+
+
+def load_retry_index():
+    from json_handler import state_lock, read_json_checked, StateCorruptedError  # json_handler imports this module
+
+    with state_lock(SKIPPED_NEWS_FILE, exclusive=False):
+        try:
+            index = read_json_checked(RETRY_INDEX_FILE, None)
+        except StateCorruptedError:
+            index = None
+        if index is None:
+            # Not written yet (first run after an upgrade) or unreadable – the next store save rewrites it
+            index = build_retry_index(read_json_checked(SKIPPED_NEWS_FILE, {}))
+    return index
+
+
+def due_ids(index=None, now=None):
+    """Ids of the skipped articles whose next attempt has come, found by binary search on the sorted index."""
+    index = load_retry_index() if index is None else index
+    now = (now or datetime.now()).strftime(TIMESTAMP_FORMAT)
+    return [article_id for _, article_id in index[:bisect_right(index, [now, "\U0010ffff"])]]
+
+
+#4
+def merge_due_retries(articles, now=None):
+    """Adds the skipped articles due for a retry to this run's candidates (the fresh feed copy wins on id clashes)."""
+    from json_handler import load_skipped_news
+
+    ids = due_ids(now=now)
+    if not ids:
+        return articles
+
+    skipped = load_skipped_news()  # The full records are only read when something is due
+    seen_ids = {article.id for article in articles}
+    retries = [ArticleRecord.from_dict(dict(skipped[article_id], id=article_id))
+               for article_id in ids if article_id in skipped and article_id not in seen_ids]
+    for article, keywords in zip(retries, extract_keywords_batch([article.summary for article in retries])):
+        article.keywords = keywords
+
+    if retries:
+        increment("retries_due", len(retries))
+        logger.info("🔁 Picked up %d skipped articles due for a retry.", len(retries))
+    return articles + retries
+
+
+if __name__ == "__main__":
+    from json_handler import state_lock, read_json_checked
+
+    with state_lock(SKIPPED_NEWS_FILE, exclusive=False):
+        skipped = read_json_checked(SKIPPED_NEWS_FILE, {})
+    index = load_retry_index()
+    for attempt_at, article_id in index:
+        record = skipped.get(article_id, {})
+        print(f"{attempt_at}  fails {record.get('fail_count', '?')}  {record.get('reason', '')[:50]:50}  {record.get('url', article_id)}")
+    never = sum(1 for record in skipped.values() if next_attempt_at(record) is None)
+    print(f"{len(index)} scheduled ({len(due_ids(index))} due now), {never} never retried")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# scheduler.py - Priority ordering, per-run budgets and the persisted backlog of deferred articles
+# ==================================================================================================
+# 📦 Built-in libraries
+import time
+from datetime import datetime, timedelta
+# 🌐 Third-party libraries
+import psutil
+from config import (logger, RUN_WALL_BUDGET_SECONDS, RUN_CPU_BUDGET_SECONDS, BACKLOG_FILE,
+                    BACKLOG_MAX_AGE_DAYS, RECENCY_HALF_LIFE_HOURS, FEED_WEIGHTS)
+from relevance import score_article
+from metrics import increment
+from json_handler import state_lock, read_json_checked, write_json_atomic, StateCorruptedError
+from article import ArticleRecord
+
+
+#1
+def priority_score(article, now=None):
+    """
+    Priority = (1 + keyword relevance) × feed weight × recency decay.
+    - Relevance: the pre-filter's "relevance_score" (computed here if missing).
+    - Feed weight: FEED_WEIGHTS for the article's rss_source (country from RSS_COUNTRY_MAPPINGS), default 1.
+    - Recency: halves every RECENCY_HALF_LIFE_HOURS since publication.
+    """
+    now = now or datetime.now()
+
+    relevance = article.relevance_score
+    if relevance is None:
+        relevance, _ = score_article(article)
+
+    feed_weight = FEED_WEIGHTS.get(article.rss_source, 1.0)
+
+    try:
+        published = datetime.strptime(f"{article.published_date} {article.published_time or '00:00:00'}",
+                                      "%Y-%m-%d %H:%M:%S")
+        age_hours = max(0.0, (now - published).total_seconds() / 3600)
+    except ValueError:
+        age_hours = 0.0
+    recency = 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS) if RECENCY_HALF_LIFE_HOURS > 0 else 1.0
+
+    return (1 + relevance) * feed_weight * recency
+
+
+#2
+def schedule_articles(articles):
+    """Orders candidates by priority, highest first (feed order kept for ties)."""
+    now = datetime.now()
+    for article in articles:
+        article.priority = round(priority_score(article, now), 4)
+    return sorted(articles, key=lambda article: -article.priority)
+
+
+#3
+class RunBudget:
+    """
+    Wall-clock and CPU budget for one run. CPU time includes the summarization worker processes.
+    - since_process_start=True: measured from process start (a cron run or backfill is one process)
+    - otherwise: measured from when the budget is created (one pass of the long-lived push receiver)
+    """
+
+    def __init__(self, wall_seconds=RUN_WALL_BUDGET_SECONDS, cpu_seconds=RUN_CPU_BUDGET_SECONDS, since_process_start=False):
+        self.wall_seconds = wall_seconds
+        self.cpu_seconds = cpu_seconds
+        self.process = psutil.Process()
+        self.started_at = self.process.create_time() if since_process_start else time.time()
+        self.cpu_baseline = 0.0 if since_process_start else self.total_cpu()
+
+    def wall_used(self):
+        return time.time() - self.started_at
+
+    def cpu_used(self):
+        return self.total_cpu() - self.cpu_baseline
+
+    def total_cpu(self):
+        times = self.process.cpu_times()
+        total = times.user + times.system + times.children_user + times.children_system
+        for child in self.process.children(recursive=True):
+            try:
+                child_times = child.cpu_times()
+                total += child_times.user + child_times.system
+            except psutil.Error:
+                continue
+        return total
+
+    def exhausted(self):
+        """Returns why the budget is used up ("wall" or "cpu"), or None while there is budget left."""
+        if self.wall_seconds > 0 and self.wall_used() >= self.wall_seconds:
+            return "wall"
+        if self.cpu_seconds > 0 and self.cpu_used() >= self.cpu_seconds:
+            return "cpu"
+        return None
+
+
+#4
+def load_backlog():
+    """Loads deferred articles from the previous run, dropping those older than BACKLOG_MAX_AGE_DAYS."""
+    try:
+        with state_lock(BACKLOG_FILE, exclusive=False):
+            backlog = read_json_checked(BACKLOG_FILE, [])
+    except StateCorruptedError as e:
+        logger.error("⚠️ %s", e)  # Losing deferred articles is not worth failing the run
+        return []
+
+    cutoff = (datetime.now() - timedelta(days=BACKLOG_MAX_AGE_DAYS)).strftime("%Y-%m-%d %H:%M:%S")
+    return [ArticleRecord.from_dict(article) for article in backlog
+            if isinstance(article, dict) and article.get("deferred_at", "") >= cutoff]
+
+
+#5
+def save_backlog(articles, merge=False):
+    """
+    Replaces the backlog with the articles this run could not get to.
+
+    :param merge: Add them to the stored backlog instead (push passes, which didn't pick the backlog up)
+    """
+    if merge and not articles:
+        return
+    deferred_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    backlog = [dict(article.to_dict(), deferred_at=article.deferred_at or deferred_at) for article in articles]
+
+    try:
+        with state_lock(BACKLOG_FILE):
+            if merge:
+                new_ids = {entry["id"] for entry in backlog}
+                backlog = [entry for entry in read_json_checked(BACKLOG_FILE, [])
+                           if isinstance(entry, dict) and entry.get("id") not in new_ids] + backlog
+            write_json_atomic(BACKLOG_FILE, backlog)
+        increment("articles_deferred", len(articles))
+        if articles:
+            logger.info("🗂️ %d articles deferred to the next run.", len(articles))
+    except Exception as e:
+        logger.error("⚠️ Error while saving the backlog: %s", e)
+
+
+#6
+def merge_with_backlog(articles):
+    """Adds last run's deferred articles to this run's candidates (the fresh feed copy wins on id clashes)."""
+    backlog = load_backlog()
+    if not backlog:
+        return articles
+
+    seen_ids = {article.id for article in articles}
+    carried = [article for article in backlog if article.id not in seen_ids]
+    logger.info("🗂️ Picked up %d deferred articles from the backlog.", len(carried))
+    return articles + carried
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# search_index.py - Full-text search over posted and skipped articles (SQLite FTS5)
+# ==================================================================================================
+# Every record written to the posted or skipped store is also upserted into SEARCH_INDEX_DB. That is
+# a plain `documents` table (one row per posted URL / skipped id) with an FTS5 index over title,
+# summary, keywords, source and country, kept in sync by triggers. Records that have not changed are
+# not rewritten. Compaction doesn't remove anything, so archived posts stay searchable.
+#
+#   python search_index.py query "ransomware hospital"                # Ranked: title > keywords > summary
+#   python search_index.py query 'title:lockbit OR "cl0p"' --kind posted --since 2025-01-01 --newest
+#   python search_index.py query "rss_source:Israel AND phishing"
+#   python search_index.py rebuild                                    # Re-index stores + archive
+#   python search_index.py stats
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from config import logger, SEARCH_INDEX_ENABLED, SEARCH_INDEX_DB
+from metrics import timed, increment
+
+COLUMNS = ("title", "summary", "keywords", "source", "rss_source")
+BM25_WEIGHTS = (5.0, 1.0, 2.0, 1.0, 1.0)  # Same order as COLUMNS
+
+thread_state = threading.local()
+
+
+#1
+def get_connection():
+    """Opens (once per thread) the index database and creates its tables."""
+    connection = getattr(thread_state, "connection", None)
+    if connection is None:
+        connection = sqlite3.connect(SEARCH_INDEX_DB, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=wal")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS documents (
+                key TEXT PRIMARY KEY, kind TEXT NOT NULL, title TEXT, summary TEXT, keywords TEXT, source TEXT,
+                rss_source TEXT, url TEXT, published TEXT, reason TEXT, fail_count INTEGER);
+            CREATE INDEX IF NOT EXISTS documents_published ON documents(published);
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5({", ".join(COLUMNS)},
+                content='documents', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2', prefix='2 3');
+            CREATE TRIGGER IF NOT EXISTS documents_insert AFTER INSERT ON documents BEGIN
+                INSERT INTO documents_fts(rowid, {", ".join(COLUMNS)}) VALUES (new.rowid, {", ".join("new." + c for c in COLUMNS)});
+            END;
+            CREATE TRIGGER IF NOT EXISTS documents_delete AFTER DELETE ON documents BEGIN
+                INSERT INTO documents_fts(documents_fts, rowid, {", ".join(COLUMNS)}) VALUES ('delete', old.rowid, {", ".join("old." + c for c in COLUMNS)});
+            END;
+            CREATE TRIGGER IF NOT EXISTS documents_update AFTER UPDATE ON documents BEGIN
+                INSERT INTO documents_fts(documents_fts, rowid, {", ".join(COLUMNS)}) VALUES ('delete', old.rowid, {", ".join("old." + c for c in COLUMNS)});
+                INSERT INTO documents_fts(rowid, {", ".join(COLUMNS)}) VALUES (new.rowid, {", ".join("new." + c for c in COLUMNS)});
+            END;
+        """)
+        thread_state.connection = connection
+    return connection
+
+
+#2
+def document_row(kind, record):
+    """(key, kind, title, summary, keywords, source, rss_source, url, published, reason, fail_count) for a stored record."""
+    keywords = record.get("keywords") or []
+    key = f"posted:{record.get('url', '')}" if kind == "posted" else f"skipped:{record.get('id', '')}"
+    published = f"{record.get('published_date', '')} {record.get('published_time', '')}".strip()
+    return (key, kind, record.get("title", ""), record.get("summary", ""),
+            " ".join(keywords) if isinstance(keywords, list) else str(keywords),
+            record.get("source", ""), record.get("rss_source", ""), record.get("url", ""), published,
+            record.get("reason"), record.get("fail_count"))
+
+
+UPSERT = f"""
+    INSERT INTO documents (key, kind, {", ".join(COLUMNS)}, url, published, reason, fail_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET {", ".join(f"{c} = excluded.{c}" for c in COLUMNS)}, url = excluded.url,
+        published = excluded.published, reason = excluded.reason, fail_count = excluded.fail_count
+    WHERE {" OR ".join(f"documents.{c} IS NOT excluded.{c}" for c in COLUMNS + ("published", "reason", "fail_count"))}
+"""
+
+
+def index_records(kind, records):
+    """Upserts stored records ("posted" or "skipped" dicts) into the index in one transaction."""
+    rows = [document_row(kind, record) for record in records]
+    if not rows:
+        return
+    connection = get_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        connection.executemany(UPSERT, rows)
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    increment("search_index_upserts", len(rows), kind=kind)
+
+
+def update_index(kind, records):
+    """Called by the store writers. Never fails the save – the index can always be rebuilt."""
+    if not SEARCH_INDEX_ENABLED:
+        return
+    try:
+        with timed("search_index_update", kind=kind):
+            index_records(kind, records)
+    except Exception as e:
+        logger.warning("⚠️ Search index update failed (run `python search_index.py rebuild`): %s", e)
+
+
+#3
+def quote_terms(query):
+    """Turns free text that isn't valid FTS5 syntax (e.g. CVE-2024-1234) into a plain AND of quoted terms."""
+    return " ".join(f'"{term}"' for term in re.findall(r"[^\s\"]+", query))
+
+
+def search(query, kind=None, since=None, limit=20, newest=False):
+    """
+    Returns matching documents as dicts, best match first (or newest first).
+    `query` is FTS5 syntax: words (AND), OR, NOT, "phrases", prefix*, column:term.
+    """
+    conditions = ["documents_fts MATCH ?"]
+    params = []
+    if kind:
+        conditions.append("d.kind = ?")
+        params.append(kind)
+    if since:
+        conditions.append("d.published >= ?")
+        params.append(since)
+    order = "d.published DESC" if newest else f"bm25(documents_fts, {', '.join(map(str, BM25_WEIGHTS))})"
+    sql = (f"SELECT d.kind, d.published, d.title, d.url, d.source, d.rss_source, d.reason, "
+           f"snippet(documents_fts, 1, '[', ']', '…', 12) FROM documents_fts "
+           f"JOIN documents d ON d.rowid = documents_fts.rowid WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ?")
+
+    connection = get_connection()
+    try:
+        rows = connection.execute(sql, [query] + params + [limit]).fetchall()
+    except sqlite3.OperationalError:
+        rows = connection.execute(sql, [quote_terms(query)] + params + [limit]).fetchall()
+    keys = ("kind", "published", "title", "url", "source", "rss_source", "reason", "snippet")
+    return [dict(zip(keys, row)) for row in rows]
+
+
+#4
+def rebuild():
+    """Re-indexes everything from the posted store, the archive and the skipped store."""
+    from json_handler import state_lock, read_json_checked  # json_handler imports this module
+    from archive import iter_archived
+    from config import POSTED_NEWS_FILE, SKIPPED_NEWS_FILE
+
+    connection = get_connection()
+    connection.execute("DELETE FROM documents")
+    connection.execute("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')")
+
+    batch = []
+    for record in iter_archived():
+        batch.append(record)
+        if len(batch) >= 5000:
+            index_records("posted", batch)
+            batch = []
+    index_records("posted", batch)
+
+    with state_lock(POSTED_NEWS_FILE, exclusive=False):
+        posted = read_json_checked(POSTED_NEWS_FILE, [])
+    index_records("posted", posted)
+
+    with state_lock(SKIPPED_NEWS_FILE, exclusive=False):
+        skipped = read_json_checked(SKIPPED_NEWS_FILE, {})
+    if isinstance(skipped, dict):
+        skipped = [dict(record, id=article_id) for article_id, record in skipped.items()]
+    index_records("skipped", skipped)
+
+    connection.execute("INSERT INTO documents_fts(documents_fts) VALUES ('optimize')")
+    return connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search posted and skipped CyberNewsBot articles.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query_parser = commands.add_parser("query", help="Full-text search (FTS5 syntax)")
+    query_parser.add_argument("query")
+    query_parser.add_argument("--kind", choices=["posted", "skipped"])
+    query_parser.add_argument("--since", help="Only articles published on/after YYYY-MM-DD")
+    query_parser.add_argument("--limit", type=int, default=20)
+    query_parser.add_argument("--newest", action="store_true", help="Newest first instead of best match first")
+    commands.add_parser("rebuild", help="Re-index the posted store, the archive and the skipped store")
+    commands.add_parser("stats", help="Show document counts")
+    args = parser.parse_args()
+
+    if args.command == "query":
+        start = time.perf_counter()
+        results = search(args.query, kind=args.kind, since=args.since, limit=args.limit, newest=args.newest)
+        elapsed = (time.perf_counter() - start) * 1000
+        for result in results:
+            status = "posted" if result["kind"] == "posted" else f"skipped: {result['reason']}"
+            print(f"{result['published']}  [{status}]  {result['title']}\n    {result['url']}  ({result['rss_source']})\n    {result['snippet']}")
+        print(f"{len(results)} results in {elapsed:.1f} ms")
+    elif args.command == "rebuild":
+        start = time.perf_counter()
+        count = rebuild()
+        print(f"🔎 Indexed {count} documents in {time.perf_counter() - start:.1f}s")
+    else:
+        for kind, count in get_connection().execute("SELECT kind, COUNT(*) FROM documents GROUP BY kind"):
+            print(f"{kind}: {count}")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# serialization.py - Pluggable on-disk format for the state stores
+# ==================================================================================================
+# STATE_FORMAT picks the encoder: "json" (stdlib), "orjson", "msgspec" (fast JSON) or "msgpack"
+# (binary). STATE_COMPRESSION=zstd compresses the result. Loading detects the format from the
+# content, so stores written in any format stay readable after the setting changes.
+#
+#   python serialization.py convert --format msgpack --compression zstd posted_news_ud.json skipped_news_ud.json
+#   python serialization.py inspect posted_news_ud.json
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import json
+import os
+import time
+from config import logger, STATE_FORMAT, STATE_COMPRESSION, STATE_ZSTD_LEVEL, STATE_JSON_INDENT
+
+# 🌐 Optional codecs – any that aren't installed fall back to the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+AVAILABLE_FORMATS = {"json": True, "orjson": orjson is not None, "msgspec": msgspec is not None, "msgpack": msgpack is not None}
+
+
+#1
+def resolve_settings(state_format=STATE_FORMAT, compression=STATE_COMPRESSION):
+    """Returns the (format, compression) that will actually be used, warning about missing libraries."""
+    if not AVAILABLE_FORMATS.get(state_format):
+        logger.warning("⚠️ STATE_FORMAT=%s is not available (unknown or not installed) – using json.", state_format)
+        state_format = "json"
+    if compression == "zstd" and zstandard is None:
+        logger.warning("⚠️ STATE_COMPRESSION=zstd needs the zstandard package – writing uncompressed.")
+        compression = "none"
+    return state_format, compression
+
+
+DEFAULT_FORMAT, DEFAULT_COMPRESSION = resolve_settings()  # Resolved once, so the warning isn't repeated per write
+
+
+#2
+def encode(data, state_format=None, compression=None):
+    """Serializes a store to bytes in the configured (or given) format."""
+    if state_format or compression:
+        state_format, compression = resolve_settings(state_format or DEFAULT_FORMAT, compression or DEFAULT_COMPRESSION)
+    else:
+        state_format, compression = DEFAULT_FORMAT, DEFAULT_COMPRESSION
+
+    if state_format == "orjson":
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if STATE_JSON_INDENT else 0)
+    elif state_format == "msgspec":
+        payload = msgspec.json.encode(data)
+        if STATE_JSON_INDENT:
+            payload = msgspec.json.format(payload, indent=STATE_JSON_INDENT)
+    elif state_format == "msgpack":
+        payload = msgpack.packb(data, use_bin_type=True)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=STATE_JSON_INDENT).encode("utf-8")
+
+    if compression == "zstd":
+        payload = zstandard.ZstdCompressor(level=STATE_ZSTD_LEVEL).compress(payload)
+    return payload
+
+
+#3
+def detect_format(payload):
+    """Returns (format, compressed, uncompressed payload) for raw store bytes."""
+    compressed = payload[:4] == ZSTD_MAGIC
+    if compressed:
+        if zstandard is None:
+            raise ValueError("store is zstd-compressed but the zstandard package is not installed")
+        try:
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"invalid zstd data: {e}") from e
+    first = payload.lstrip()[:1]
+    return ("json" if first in (b"[", b"{") or not first else "msgpack"), compressed, payload
+
+
+def decode(payload):
+    """Deserializes store bytes written in any supported format. Raises ValueError on bad data."""
+    state_format, _, payload = detect_format(payload)
+
+    if state_format == "msgpack":
+        if msgpack is None:
+            raise ValueError("store is in msgpack format but the msgpack package is not installed")
+        try:
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        except Exception as e:
+            raise ValueError(f"invalid msgpack data: {e}") from e
+
+    # Fastest installed JSON parser – they all read what any of them wrote
+    if orjson is not None:
+        return orjson.loads(payload)
+    if msgspec is not None:
+        try:
+            return msgspec.json.decode(payload)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return json.loads(payload)
+
+
+field_decoders = {}  # fields -> msgspec decoder for a list of records with just those fields
+
+
+def field_decoder(fields):
+    if fields not in field_decoders:
+        record_type = msgspec.defstruct("StoreRecord", [(field, object, None) for field in fields])
+        field_decoders[fields] = msgspec.json.Decoder(list[record_type])
+    return field_decoders[fields]
+
+
+def project(data, fields):
+    if not isinstance(data, list):
+        return []
+    return [tuple(item.get(field) for field in fields) for item in data if isinstance(item, dict)]
+
+
+def decode_fields(payload, fields):
+    """
+    Decodes a list store keeping only `fields` of each record, as tuples in `fields` order. With msgspec the
+    other fields (e.g. summaries) are skipped by the parser and never allocated; without it each record is
+    trimmed as soon as it is parsed, so the full records never exist all at once.
+    Raises ValueError on bad data.
+    """
+    state_format, _, payload = detect_format(payload)
+
+    def trim(item):
+        return tuple(item.get(field) for field in fields)
+
+    if state_format == "msgpack":
+        if msgpack is None:
+            raise ValueError("store is in msgpack format but the msgpack package is not installed")
+        try:
+            data = msgpack.unpackb(payload, raw=False, strict_map_key=False, object_hook=trim)
+        except Exception as e:
+            raise ValueError(f"invalid msgpack data: {e}") from e
+        return [item for item in data if isinstance(item, tuple)] if isinstance(data, list) else []
+
+    if msgspec is not None:
+        try:
+            records = field_decoder(fields).decode(payload)
+            return [tuple(getattr(record, field) for field in fields) for record in records]
+        except msgspec.ValidationError:
+            return project(decode(payload), fields)  # Not a list of records – decode() decides if it is valid
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    # object_hook also runs for nested objects, which the stores' records don't have
+    data = json.loads(payload, object_hook=trim)
+    return [item for item in data if isinstance(item, tuple)] if isinstance(data, list) else []
+
+
+#4
+def convert_file(filepath, state_format, compression):
+    """Rewrites one store in another format, through the normal locked, checksummed write path."""
+    from json_handler import state_lock, read_json_checked, write_json_atomic  # json_handler imports this module
+
+    with state_lock(filepath):
+        data = read_json_checked(filepath, None)
+        if data is None:
+            logger.warning("⚠️ %s does not exist – nothing to convert.", filepath)
+            return
+        before = os.path.getsize(filepath)
+        write_json_atomic(filepath, data, state_format=state_format, compression=compression)
+    logger.info("🔁 %s: %d → %d bytes (%s, compression: %s)", filepath, before, os.path.getsize(filepath),
+                state_format, compression)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert or inspect CyberNewsBot state stores.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help="Rewrite stores in another format")
+    convert_parser.add_argument("--format", default=STATE_FORMAT, choices=sorted(AVAILABLE_FORMATS))
+    convert_parser.add_argument("--compression", default=STATE_COMPRESSION, choices=["none", "zstd"])
+    convert_parser.add_argument("files", nargs="+")
+    inspect_parser = commands.add_parser("inspect", help="Show the format, size and decode time of stores")
+    inspect_parser.add_argument("files", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        for path in args.files:
+            convert_file(path, args.format, args.compression)
+    else:
+        for path in args.files:
+            with open(path, "rb") as f:
+                raw = f.read()
+            state_format, compressed, _ = detect_format(raw)
+            start = time.perf_counter()
+            data = decode(raw)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{path}: {state_format}{' + zstd' if compressed else ''}, {len(raw)} bytes, "
+                  f"{len(data)} records, decoded in {elapsed:.1f} ms")
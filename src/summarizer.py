@@ -15,7 +15,7 @@ import nltk
 # 🌐 Third-party libraries
 import feedparser
 from bs4 import BeautifulSoup
-from transformers import pipeline
+from transformers import pipeline, AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer
 from newspaper import Article, ArticleException
 import torch
 import psutil  
@@ -25,27 +25,93 @@ import requests
 from urllib.parse import urlparse
 import html
 import time
-
-
-
+import gc
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from config import (logger, SUMMARIZER_MODEL, SUMMARIZER_SERVER_ENABLED, SUMMARIZER_SERVER_HOST,
+                    SUMMARIZER_SERVER_PORT, SUMMARIZER_SERVER_TIMEOUT, SUMMARIZER_BATCH_SIZE,
+                    SUMMARIZER_POOL_ENABLED, SUMMARIZER_WORKERS, SUMMARIZER_THREADS_PER_WORKER,
+                    SUMMARIZER_WORKER_MEMORY_MB, SUMMARIZER_RESERVED_CORES, SUMMARIZER_LOAD_MODE,
+                    SUMMARIZER_MMAP_DIR, SUMMARIZER_NUM_BEAMS, SUMMARIZER_GREEDY, SUMMARIZER_LENGTH_PENALTY,
+                    SUMMARIZER_EARLY_STOPPING)
+from metrics import timed
+import http_client
 
 
 #1
 def load_summarizer():
+    logger.info("🧠 Summarization model: %s | decoding: %s", SUMMARIZER_MODEL, GENERATION_KWARGS)
+    if SUMMARIZER_LOAD_MODE == "mmap":
+        try:
+            return load_mmap_summarizer()
+        except Exception as e:
+            logger.warning("⚠️ Memory-mapped loading failed – loading a private copy instead: %s", e)
+
     try:
         if torch.cuda.is_available():
-            print("🚀 Using GPU for summarization")
-            return pipeline("summarization", model="facebook/bart-large-cnn", device=0)
+            logger.info("🚀 Using GPU for summarization")
+            return pipeline("summarization", model=SUMMARIZER_MODEL, device=0)
         else:
-            print("⚠️ GPU not available, falling back to CPU")
-            return pipeline("summarization", model="facebook/bart-large-cnn", device=-1)
+            logger.info("⚠️ GPU not available, falling back to CPU")
+            return pipeline("summarization", model=SUMMARIZER_MODEL, device=-1)
     except Exception as e:
-        print(f"⚠️ GPU failed – switching to CPU: {e}")
+        logger.warning("⚠️ GPU failed – switching to CPU: %s", e)
         torch.cuda.empty_cache()  
-        return pipeline("summarization", model="facebook/bart-large-cnn", device=-1)
+        return pipeline("summarization", model=SUMMARIZER_MODEL, device=-1)
+
+
+def mmap_weights_path():
+    model_name = SUMMARIZER_MODEL.strip("/").replace("/", "--")
+    return os.path.join(SUMMARIZER_MMAP_DIR, f"{model_name}.pt")
 
 
 #2
+def export_mmap_weights():
+    """
+    Writes the model state dict once to SUMMARIZER_MMAP_DIR so processes can memory-map it.
+    Does nothing if the file already exists.
+    """
+    path = mmap_weights_path()
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(SUMMARIZER_MMAP_DIR, exist_ok=True)
+    logger.info("💾 Exporting model weights for memory-mapping: %s", path)
+    model = AutoModelForSeq2SeqLM.from_pretrained(SUMMARIZER_MODEL)
+    temp_file = path + ".tmp"
+    torch.save(model.state_dict(), temp_file)
+    os.replace(temp_file, path)
+    return path
+
+
+#3
+def load_mmap_summarizer():
+    """
+    Builds the pipeline around weights that are memory-mapped read-only from disk.
+    All processes that map the same file share one physical copy through the page cache. CPU only.
+    """
+    path = export_mmap_weights()
+    config = AutoConfig.from_pretrained(SUMMARIZER_MODEL)
+
+    # Build the model without allocating weights, then point the parameters at the mapped tensors
+    with torch.device("meta"):
+        model = AutoModelForSeq2SeqLM.from_config(config)
+    state_dict = torch.load(path, mmap=True, weights_only=True, map_location="cpu")
+    model.load_state_dict(state_dict, assign=True)
+    model.tie_weights()
+
+    if any(tensor.is_meta for tensor in list(model.parameters()) + list(model.buffers())):
+        raise RuntimeError("Some model tensors were not found in the mapped weights file")
+
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(SUMMARIZER_MODEL)
+    logger.info("🗺️ Using memory-mapped model weights from %s", path)
+    return pipeline("summarization", model=model, tokenizer=tokenizer, device=-1)
+
+
+#4
 def is_rss_summary_sufficient(text):
     """
     Checks whether the RSS summary is sufficient:
@@ -56,61 +122,352 @@ def is_rss_summary_sufficient(text):
     return word_count >= 15
 
 
+#5
+def prepare_summary_input(text, title=""):
+    """
+    Builds the model input and generation lengths for a text.
+    Shared by the in-process path and the summarization server so both produce identical summaries.
+
+    :return: (model_text, max_length, min_length)
+    """
+    original_word_count = len(text.split())
+
+    # Optionally prepend the title as hidden context
+    if title:
+        text = f"{title}. {text}"
+
+    # Trim to 500 words max
+    if original_word_count > 500:
+        text = " ".join(text.split()[:500])
+
+    max_length = min(200, original_word_count * 2)
+    min_length = max(20, max_length // 2)
+    return text, max_length, min_length
+
+
+def generation_kwargs(num_beams=SUMMARIZER_NUM_BEAMS, greedy=SUMMARIZER_GREEDY, length_penalty=SUMMARIZER_LENGTH_PENALTY,
+                      early_stopping=SUMMARIZER_EARLY_STOPPING):
+    """
+    Decoding settings passed to the pipeline next to max/min length. Only the configured ones are
+    set, so the model's generation_config supplies the rest. Greedy decoding ignores the beam options.
+    """
+    kwargs = {"do_sample": False}
+    if greedy:
+        kwargs["num_beams"] = 1
+        return kwargs
+    if num_beams:
+        kwargs["num_beams"] = num_beams
+    if length_penalty is not None:
+        kwargs["length_penalty"] = length_penalty
+    if early_stopping is not None:
+        kwargs["early_stopping"] = early_stopping
+    return kwargs
+
+
+GENERATION_KWARGS = generation_kwargs()
+
+
+server_available = SUMMARIZER_SERVER_ENABLED # Cleared after the first failed connection so we don't retry every article
+#6
+def is_server_ready():
+    """Quick health check so batch callers know up front whether to fan requests out to the server."""
+    global server_available
+
+    if not server_available:
+        return False
+
+    try:
+        response = http_client.get(f"http://{SUMMARIZER_SERVER_HOST}:{SUMMARIZER_SERVER_PORT}/health", retries=0, timeout=(1, 1))
+        response.raise_for_status()
+        return True
+    except requests.exceptions.RequestException:
+        logger.info("ℹ️ Summarization server not available – using in-process model.")
+        server_available = False
+        return False
+
+
+#7
+def request_remote_summary(text, max_length, min_length):
+    """
+    Sends a prepared text to the local summarization server.
+
+    :return: The summary string, or None if the server is not reachable (caller falls back to in-process).
+    """
+    global server_available
+
+    if not server_available:
+        return None
+
+    url = f"http://{SUMMARIZER_SERVER_HOST}:{SUMMARIZER_SERVER_PORT}/summarize"
+    payload = {"text": text, "max_length": max_length, "min_length": min_length}
+
+    try:
+        response = http_client.post(url, json=payload, retries=0, timeout=(1, SUMMARIZER_SERVER_TIMEOUT))
+    except requests.exceptions.ConnectionError:
+        logger.info("ℹ️ Summarization server not available – using in-process model.")
+        server_available = False
+        return None
+
+    response.raise_for_status()
+    return response.json().get("summary_text", "")
+
+
+summarizer = None
 summarizer_loaded = False # Global flag to check if the model is loaded
-#3
+load_lock = threading.Lock()  # Loading, pool start-up and unload_summarizer() happen one at a time
+active_batches = 0  # summarize_batch() calls in progress
+#8
 def summarize_text(text, title=""):
     global summarizer, summarizer_loaded
 
     try:
-        # Check if the model is already loaded
-        if not summarizer_loaded or summarizer is None:
-            print("⚠️ Summarization model not loaded – reloading...")
-            summarizer = load_summarizer()
-            summarizer_loaded = True
-
         if not text.strip():
-            print("⚠️ Input text is empty.")
+            logger.debug("⚠️ Input text is empty.")
             return ""
 
         # Return short texts (under 30 words) as-is
         original_word_count = len(text.split())
         if original_word_count < 30:
-            print(f"✅ Short text detected ({original_word_count} words) – skipping summarization.")
+            logger.debug("✅ Short text detected (%d words) – skipping summarization.", original_word_count)
             return text
 
-        # Optionally prepend the title as hidden context
-        if title:
-            text = f"{title}. {text}"
+        text, max_length, min_length = prepare_summary_input(text, title)
 
-        # Trim to 500 words max
-        if original_word_count > 500:
-            text = " ".join(text.split()[:500])
+        logger.debug("🤖 Summarizing %d words with max_length=%d, min_length=%d...", len(text.split()), max_length, min_length)
+        with timed("summarize"):
+            summarized_text = request_remote_summary(text, max_length, min_length)
 
-        max_length = min(200, original_word_count * 2)
-        min_length = max(20, max_length // 2)
+            if summarized_text is None:
+                # Check if the model is already loaded
+                with load_lock:
+                    if not summarizer_loaded or summarizer is None:
+                        logger.warning("⚠️ Summarization model not loaded – reloading...")
+                        with timed("model_load"):
+                            summarizer = load_summarizer()
+                        summarizer_loaded = True
+                    model = summarizer  # unload_summarizer() may drop the global reference meanwhile
 
-        print(f"🤖 Summarizing {len(text.split())} words with max_length={max_length}, min_length={min_length}...")
-        summary = summarizer(text, max_length=max_length, min_length=min_length, do_sample=False)
+                summary = model(text, max_length=max_length, min_length=min_length, **GENERATION_KWARGS)
+                summarized_text = summary[0]['summary_text'] if summary else ""
 
-        if summary and summary[0]['summary_text'].strip():
-            summarized_text = summary[0]['summary_text'].strip()
+        if summarized_text.strip():
+            summarized_text = summarized_text.strip()
             word_count = len(summarized_text.split())
-            print(f"✅ Summary generated – {word_count} words.")
+            logger.debug("✅ Summary generated – %d words.", word_count)
             return summarized_text
         else:
-            print("⚠️ Empty summary returned – using fallback.")
+            logger.warning("⚠️ Empty summary returned – using fallback.")
             return ""
 
-    except NameError as ne:
-        print(f"⚠️ Model error (not found): {ne}")
-        summarizer_loaded = False
-        return summarize_text(text, title)  # Retry after reloading
-
     except Exception as e:
-        print(f"🔥 Error during summarization: {e}")
+        logger.error("🔥 Error during summarization: %s", e)
         torch.cuda.empty_cache()
         summarizer_loaded = False
         return ""
 
 
+#9
+def plan_worker_pool():
+    """
+    Decides how many summarization workers to start and how many torch threads each one gets.
+    The worker count is capped by the usable cores (minus SUMMARIZER_RESERVED_CORES for network work)
+    and by the available memory divided by SUMMARIZER_WORKER_MEMORY_MB per model replica.
+
+    :return: (workers, threads_per_worker)
+    """
+    threads = max(1, SUMMARIZER_THREADS_PER_WORKER)
+    usable_cores = max(1, (os.cpu_count() or 1) - SUMMARIZER_RESERVED_CORES)
+    available_mb = psutil.virtual_memory().available // (1024 * 1024)
+
+    max_by_cores = max(1, usable_cores // threads)
+    max_by_memory = max(1, available_mb // max(1, SUMMARIZER_WORKER_MEMORY_MB))
+
+    if SUMMARIZER_WORKERS.strip().lower() == "auto":
+        workers = min(max_by_cores, max_by_memory)
+    else:
+        workers = max(1, int(SUMMARIZER_WORKERS))
+        if workers > max_by_memory:
+            logger.warning("⚠️ %d workers requested but memory only fits %d model replicas.", workers, max_by_memory)
+
+    return workers, threads
+
+
+#10
+def _init_pool_worker(num_threads):
+    """Runs once in every worker process: pins the torch thread budget and loads the model replica."""
+    global summarizer, summarizer_loaded, server_available
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already set in this process
+
+    server_available = False  # Workers always use their own replica
+    if summarizer is None:
+        summarizer = load_summarizer()
+    summarizer_loaded = True  # In "fork" mode the parent's model is inherited copy-on-write
+
+
+def _summarize_in_worker(text, title):
+    return summarize_text(text, title)
+
+
+summarizer_pool = None
+#11
+def get_summarizer_pool():
+    global summarizer_pool
+
+    with load_lock:
+        if summarizer_pool is None:
+            workers, threads = plan_worker_pool()
+            start_method = "spawn"
+
+            if SUMMARIZER_LOAD_MODE == "mmap":
+                export_mmap_weights()  # Once in the parent, so workers don't race to write it
+            elif SUMMARIZER_LOAD_MODE == "fork":
+                # Forking this process is unsafe: threads are running (log listener, lease heartbeat, memory
+                # governor, push ingestor) and load_lock is held right here. The workers are forked from a
+                # forkserver instead – a fresh single-threaded process that loads the model once on start
+                # (summarizer_preload.py), so they still share its pages copy-on-write.
+                start_method = "forkserver"
+                multiprocessing.get_context(start_method).set_forkserver_preload(["summarizer_preload"])
+
+            logger.info("🧵 Starting %d summarization workers with %d torch threads each (%s loading)...",
+                        workers, threads, SUMMARIZER_LOAD_MODE)
+            summarizer_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=_init_pool_worker,
+                initargs=(threads,),
+            )
+    return summarizer_pool
+
+
+def load_parent_model_for_fork():
+    """
+    Loads the model in the forkserver before the workers are forked so they share its pages copy-on-write.
+    The forkserver never runs inference itself – forking after torch has started its intra-op thread
+    pool can deadlock the children.
+    """
+    global summarizer, summarizer_loaded
+
+    if summarizer is None:
+        summarizer = load_summarizer()
+        summarizer_loaded = True
+
+    # Move everything allocated so far out of the GC's reach so collections in the workers
+    # don't write to (and therefore copy) the shared pages
+    gc.freeze()
+
+
+#12
+def shutdown_summarizer_pool():
+    """Stops the worker processes and frees their model replicas."""
+    global summarizer_pool
+
+    if summarizer_pool is not None:
+        summarizer_pool.shutdown(wait=True, cancel_futures=True)
+        summarizer_pool = None
+        logger.info("🧹 Summarization workers stopped.")
+
+
+def unload_summarizer():
+    """
+    Frees the in-process model and the worker pool when memory runs low (resource_governor.py).
+    Both are loaded again by the next summary.
+
+    :return: False if a batch is being summarized or nothing was loaded.
+    """
+    global summarizer, summarizer_loaded
+
+    with load_lock:
+        if active_batches or (summarizer is None and summarizer_pool is None):
+            return False
+        summarizer = None
+        summarizer_loaded = False
+        shutdown_summarizer_pool()
+
+    gc.unfreeze()  # load_parent_model_for_fork() froze the model's objects
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    return True
+
+
+#13
+def report_worker_memory():
+    """
+    Logs (at DEBUG) unique vs shared memory for this process and its worker processes.
+    - USS: memory only this process uses (what it would free on exit)
+    - Shared: RSS pages also mapped by other processes (e.g. memory-mapped or forked model weights)
+    - PSS: the process's fair share of RSS, with shared pages split across their users
+
+    :return: A list of per-process dicts (values in MB).
+    """
+    report = []
+    parent = psutil.Process()
+
+    for process in [parent] + parent.children(recursive=True):
+        try:
+            info = process.memory_full_info()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+
+        uss = getattr(info, "uss", 0)
+        report.append({
+            "pid": process.pid,
+            "role": "parent" if process.pid == parent.pid else "worker",
+            "rss_mb": round(info.rss / 1024 / 1024, 1),
+            "uss_mb": round(uss / 1024 / 1024, 1),
+            "shared_mb": round((info.rss - uss) / 1024 / 1024, 1),
+            "pss_mb": round(getattr(info, "pss", 0) / 1024 / 1024, 1),
+        })
+
+    logger.debug("🧠 Memory per process (MB):")
+    for entry in report:
+        logger.debug("   %-6s pid=%-7d rss=%-8s unique=%-8s shared=%-8s pss=%s", entry["role"], entry["pid"],
+                     entry["rss_mb"], entry["uss_mb"], entry["shared_mb"], entry["pss_mb"])
+    return report
+
+
+#14
+@timed("summarize_batch")
+def summarize_batch(items):
+    """
+    Summarizes a list of (text, title) pairs and returns the summaries in the same order.
+    - Pool mode (SUMMARIZER_POOL_ENABLED): articles are spread across the worker processes.
+    - Server mode: requests are sent concurrently so the server can batch them.
+    - Otherwise: articles are summarized one by one with the in-process model.
+    A failed article yields an empty summary, like summarize_text().
+    """
+    global active_batches
+
+    if not items:
+        return []
+
+    with load_lock:
+        active_batches += 1  # unload_summarizer() leaves the model alone while a batch runs
+    try:
+        if SUMMARIZER_POOL_ENABLED:
+            pool = get_summarizer_pool()
+            futures = [pool.submit(_summarize_in_worker, text, title) for text, title in items]
+            summaries = []
+            for future in futures:
+                try:
+                    summaries.append(future.result())
+                except Exception as e:
+                    logger.error("🔥 Summarization worker failed: %s", e)
+                    summaries.append("")
+            if logger.isEnabledFor(logging.DEBUG):
+                report_worker_memory()  # Reads USS/PSS of the whole process tree – only worth it when debugging
+            return summaries
+
+        if is_server_ready():
+            with ThreadPoolExecutor(max_workers=max(1, SUMMARIZER_BATCH_SIZE)) as executor:
+                return list(executor.map(lambda item: summarize_text(*item), items))
 
+        return [summarize_text(text, title) for text, title in items]
+    finally:
+        with load_lock:
+            active_batches -= 1
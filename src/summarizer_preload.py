@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# summarizer_preload.py - Imported by the forkserver in SUMMARIZER_LOAD_MODE=fork
+# ==================================================================================================
+# The forkserver is a fresh single-threaded process, so it can fork safely. Loading the model here,
+# once, lets every pool worker it forks share the model's pages copy-on-write.
+# ==================================================================================================
+import summarizer
+
+summarizer.load_parent_model_for_fork()
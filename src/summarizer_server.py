@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ==================================================================================================
+# summarizer_server.py - Long-lived local summarization server with dynamic batching
+# ==================================================================================================
+# 📦 Built-in libraries
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# 🌐 Third-party libraries
+import torch
+from config import (logger, SUMMARIZER_SERVER_HOST, SUMMARIZER_SERVER_PORT, SUMMARIZER_SERVER_TIMEOUT, SUMMARIZER_BATCH_SIZE,
+                    SUMMARIZER_BATCH_WAIT_MS)
+from summarizer import load_summarizer, GENERATION_KWARGS
+
+
+#1
+class BatchingSummarizer:
+    """
+    Owns the summarization pipeline and groups concurrent requests into batches.
+    Requests that arrive within `max_wait_ms` of each other (up to `max_batch_size`) are run
+    through the model together; requests with different generation lengths are run as separate groups.
+    """
+
+    def __init__(self, summarizer, max_batch_size=SUMMARIZER_BATCH_SIZE, max_wait_ms=SUMMARIZER_BATCH_WAIT_MS):
+        self.summarizer = summarizer
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name="summarizer-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, text, max_length, min_length):
+        future = Future()
+        self.requests.put((text, max_length, min_length, future))
+        return future
+
+    def _collect_batch(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+
+            groups = {}
+            for text, max_length, min_length, future in batch:
+                # Requests whose client gave up waiting were cancelled – don't spend the model on them
+                if not future.set_running_or_notify_cancel():
+                    continue
+                groups.setdefault((max_length, min_length), []).append((text, future))
+
+            for (max_length, min_length), items in groups.items():
+                texts = [text for text, _ in items]
+                try:
+                    results = self.summarizer(texts, max_length=max_length, min_length=min_length,
+                                              batch_size=len(texts), **GENERATION_KWARGS)
+                    for (_, future), result in zip(items, results):
+                        future.set_result(result["summary_text"])
+                    logger.info(f"Summarized batch of {len(texts)} (max_length={max_length})")
+                except Exception as e:
+                    logger.error(f"Batch summarization failed: {e}")
+                    torch.cuda.empty_cache()
+                    for _, future in items:
+                        future.set_exception(e)
+
+
+#2
+class SummarizeRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front-end: POST /summarize with {"text", "max_length", "min_length"}, GET /health."""
+
+    batcher = None
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/summarize":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict) or not isinstance(request.get("text"), str):
+                raise ValueError('expected a JSON object with a "text" string')
+            future = self.batcher.submit(request["text"], int(request["max_length"]), int(request["min_length"]))
+        except (KeyError, TypeError, ValueError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        try:
+            # Bounded like the client's read timeout, so a stuck batch can't hold handler threads forever
+            self._send_json(200, {"summary_text": future.result(timeout=SUMMARIZER_SERVER_TIMEOUT)})
+        except FutureTimeoutError:
+            future.cancel()
+            self._send_json(504, {"error": f"Summary not ready after {SUMMARIZER_SERVER_TIMEOUT:.0f}s"})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logger.debug(f"summarizer-server {self.address_string()} {format % args}")
+
+
+#3
+def run_server(host=SUMMARIZER_SERVER_HOST, port=SUMMARIZER_SERVER_PORT):
+    logger.info("🧠 Loading summarization model for the server...")
+    SummarizeRequestHandler.batcher = BatchingSummarizer(load_summarizer())
+
+    server = ThreadingHTTPServer((host, port), SummarizeRequestHandler)
+    logger.info("✅ Summarization server listening on http://%s:%d", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 Summarization server stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local summarization server shared across CyberNewsBot runs.")
+    parser.add_argument("--host", default=SUMMARIZER_SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SUMMARIZER_SERVER_PORT)
+    args = parser.parse_args()
+    run_server(args.host, args.port)
@@ -22,7 +22,11 @@ from urllib.parse import urlparse
 import html
 import time
 import urllib.parse
+import math
 from collections import Counter
+from config import logger, KEYWORD_TOKENIZER
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")  # Runs of letters (any script) – same tokens word_tokenize + isalpha keeps
 
 
 #1
@@ -30,7 +34,7 @@ def clean_url(url):
     # Remove query parameters from the URL
     parsed_url = urlparse(url)
     clean_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-    print(f"[CLEAN_URL] Cleaned: {clean_url}")
+    logger.debug("[CLEAN_URL] Cleaned: %s", clean_url)
     return clean_url
 
 
@@ -63,7 +67,7 @@ def clean_text(raw_text):
 def safe_text_cut(text, max_words=500):
     words = text.split()
     if len(words) > max_words:
-        print(f"⚠️ Text exceeds {max_words} words – trimming.")
+        logger.debug("⚠️ Text exceeds %d words – trimming.", max_words)
         return " ".join(words[:max_words])
     return text
 
@@ -84,11 +88,11 @@ def extract_text_relevance(text, keywords):
         return 0
 
     try:
-        text_tokens = set(word_tokenize(text.lower()))
+        text_tokens = set(tokenize(text))
         keyword_tokens = set(word.lower() for word in keywords)
         return len(text_tokens & keyword_tokens)  # Intersection between tokens
     except Exception as e:
-        print(f"⚠️ Error during tokenization: {e}")
+        logger.warning("⚠️ Error during tokenization: %s", e)
         return 0
 
 #9
@@ -113,9 +117,63 @@ def extract_source_from_url(url):
 
 def extract_keywords(text, num_keywords=5):
     try:
-        tokens = word_tokenize(text.lower())
-        tokens = [t for t in tokens if t.isalpha() and len(t) > 4]
+        tokens = [t for t in tokenize(text) if len(t) > 4]
         most_common = Counter(tokens).most_common(num_keywords)
         return [kw for kw, _ in most_common]
     except Exception:
         return []
+
+
+nltk_resources_ready = False
+#10
+def ensure_nltk_resources():
+    """Finds (or downloads) the punkt data – only needed when KEYWORD_TOKENIZER is "nltk"."""
+    global nltk_resources_ready
+
+    if nltk_resources_ready:
+        return
+
+    for resource in ("tokenizers/punkt", "tokenizers/punkt_tab"):
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(resource.split("/")[-1])
+            logger.info("NLTK resource '%s' has been downloaded.", resource)
+    nltk_resources_ready = True
+
+
+#11
+def tokenize(text):
+    """
+    Lowercases text and splits it into alphabetic word tokens.
+    Uses a compiled regex by default, so no NLTK data is loaded; KEYWORD_TOKENIZER=nltk restores word_tokenize.
+    """
+    if KEYWORD_TOKENIZER == "nltk":
+        ensure_nltk_resources()
+        return [t for t in word_tokenize(text.lower()) if t.isalpha()]
+    return WORD_PATTERN.findall(text.lower())
+
+
+#12
+def extract_keywords_batch(texts, num_keywords=5, min_length=5):
+    """
+    Extracts keywords for many texts in one pass, scored by TF-IDF across the batch.
+    Words that appear in every summary of the batch (e.g. the alert's own search term) rank below
+    words that are distinctive for one article. With a single text this equals extract_keywords().
+
+    :return: One keyword list per input text, in the same order.
+    """
+    documents = [[t for t in tokenize(text or "") if len(t) >= min_length] for text in texts]
+
+    document_frequency = Counter()
+    for tokens in documents:
+        document_frequency.update(set(tokens))
+
+    total_documents = len(documents)
+    keywords = []
+    for tokens in documents:
+        counts = Counter(tokens)
+        # Smoothed IDF; sorted() is stable, so ties keep first-appearance order like most_common()
+        ranked = sorted(counts.items(), key=lambda item: -item[1] * (math.log((1 + total_documents) / (1 + document_frequency[item[0]])) + 1))
+        keywords.append([word for word, _ in ranked[:num_keywords]])
+    return keywords
@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# config.py refuses to start without a feed and opens app.log in the working directory on import
+os.environ.setdefault("RSS_FEED_URL", "https://example.com/feed.xml")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("SEARCH_INDEX_ENABLED", "false")
+os.chdir(tempfile.mkdtemp(prefix="cybernewsbot-tests-"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """Every test runs in an empty directory – the state files are relative paths."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,123 @@
+import glob
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import archive
+from archive import compact_posted_news, load_index, search_archive, segment_path
+from json_handler import read_json_checked, write_json_atomic
+from config import POSTED_NEWS_FILE
+
+
+def days_ago(days):
+    return (datetime.today() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def record(number, days_old):
+    return {"title": f"Ransomware story {number}", "url": f"https://example.com/{number}",
+            "text_hash": f"hash{number}", "published_date": days_ago(days_old)}
+
+
+POSTED = [record(1, 90), record(2, 60), record(3, 5), record(4, 0), {"title": "Undated", "url": "https://example.com/u"}]
+
+
+@pytest.fixture
+def posted():
+    write_json_atomic(POSTED_NEWS_FILE, POSTED)
+    return POSTED
+
+
+def hot_urls():
+    return [entry["url"] for entry in read_json_checked(POSTED_NEWS_FILE, [])]
+
+
+def archived_urls():
+    urls = []
+    for path in sorted(glob.glob(os.path.join(archive.ARCHIVE_DIR, "posted_*.jsonl.gz"))):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            urls += [json.loads(line)["url"] for line in f if line.strip()]
+    return urls
+
+
+def assert_index_matches_segments():
+    for month, entry in load_index()["segments"].items():
+        assert entry["records"] == archive.segment_stats(segment_path(month))[0]
+
+
+def test_compaction_moves_old_records_once_a_day(posted):
+    assert compact_posted_news(hot_days=30) == 2
+
+    assert hot_urls() == ["https://example.com/3", "https://example.com/4", "https://example.com/u"]
+    assert sorted(archived_urls()) == ["https://example.com/1", "https://example.com/2"]
+    assert "pending" not in load_index()
+    assert_index_matches_segments()
+
+    write_json_atomic(POSTED_NEWS_FILE, read_json_checked(POSTED_NEWS_FILE, []) + [record(5, 100)])
+    assert compact_posted_news(hot_days=30) == 0            # Already ran today
+    assert compact_posted_news(hot_days=30, force=True) == 1
+
+
+def test_search_reads_only_matching_segments(posted):
+    compact_posted_news(hot_days=30)
+
+    assert [entry["url"] for entry in search_archive("story 2")] == ["https://example.com/2"]
+    assert search_archive("ransomware", since=days_ago(70)) == [record(2, 60)]
+    assert search_archive("ransomware", until=days_ago(200)[:7]) == []
+
+
+def test_crash_before_the_hot_file_is_replaced_is_rolled_back(posted, monkeypatch):
+    compact_posted_news(hot_days=80)  # Archive record 1 first, so one segment had content before the crash
+    original_write = archive.write_json_atomic
+
+    def crash_on_hot_file(path, data, **kwargs):
+        if path == POSTED_NEWS_FILE:
+            raise OSError("disk full")
+        return original_write(path, data, **kwargs)
+
+    monkeypatch.setattr(archive, "write_json_atomic", crash_on_hot_file)
+    with pytest.raises(OSError):
+        compact_posted_news(hot_days=30, force=True)
+    assert "pending" in load_index()
+    assert sorted(archived_urls()) == ["https://example.com/1", "https://example.com/2"]
+
+    monkeypatch.setattr(archive, "write_json_atomic", original_write)
+    assert compact_posted_news(hot_days=30, force=True) == 1
+
+    assert sorted(archived_urls()) == ["https://example.com/1", "https://example.com/2"]  # No duplicate of 2
+    assert "https://example.com/2" not in hot_urls()
+    assert_index_matches_segments()
+
+
+def test_crash_after_the_hot_file_is_replaced_is_completed(posted, monkeypatch):
+    def crash_after_archiving(name, value=1, **labels):
+        if name == "records_archived":
+            raise OSError("killed")
+
+    monkeypatch.setattr(archive, "increment", crash_after_archiving)
+    with pytest.raises(OSError):
+        compact_posted_news(hot_days=30)
+    index = json.load(open(archive.INDEX_FILE))
+    assert "pending" in index and index["segments"] == {}  # The counts were never saved
+
+    monkeypatch.setattr(archive, "increment", lambda *args, **kwargs: None)
+    assert compact_posted_news(hot_days=30) == 0
+
+    assert sorted(archived_urls()) == ["https://example.com/1", "https://example.com/2"]
+    assert "pending" not in load_index()
+    assert_index_matches_segments()
+
+
+def test_rebuild_index_drops_duplicates(posted):
+    compact_posted_news(hot_days=30)
+    month = archive.record_month(record(1, 90))
+    with gzip.open(segment_path(month), "at", encoding="utf-8") as f:
+        f.write(json.dumps(record(1, 90)) + "\n")
+    os.remove(archive.INDEX_FILE)
+
+    archive.rebuild_index()
+
+    assert sorted(archived_urls()) == ["https://example.com/1", "https://example.com/2"]
+    assert_index_matches_segments()
@@ -0,0 +1,95 @@
+import pytest
+
+import backfill
+from article import ArticleRecord
+from backfill import dedupe_window, load_state, run_backfill
+
+
+def article(number, day, title=None, url=None, time="10:00:00"):
+    return ArticleRecord(id=str(number), title=title or f"Story number {number}",
+                         url=url or f"https://example.com/{number}", published_date=day, published_time=time)
+
+
+WINDOW = [article(1, "2026-10-03"), article(2, "2026-10-01"), article(3, "2026-10-02"), article(4, "2026-10-01")]
+
+
+class Pipeline:
+    """Stands in for the feeds and the send path: records which days were sent, can fail or defer a day."""
+
+    def __init__(self, monkeypatch):
+        self.articles = list(WINDOW)
+        self.days = []
+        self.fail = set()
+        self.defer = set()
+        monkeypatch.setattr(backfill, "get_google_alerts", lambda time_range, incremental: list(self.articles))
+        monkeypatch.setattr(backfill, "filter_new_articles", lambda articles: articles)
+        monkeypatch.setattr(backfill, "post_articles_to_telegram", self.post)
+        monkeypatch.setattr(backfill, "shutdown_summarizer_pool", lambda: None)
+
+    def post(self, articles, shutdown_pool=True, defer_to_backlog=True):
+        day = articles[0].published_date
+        self.days.append(day)
+        if day in self.fail:
+            raise RuntimeError("Telegram is down")
+        if day in self.defer:
+            return articles[:1], articles[1:]
+        return articles, []
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    return Pipeline(monkeypatch)
+
+
+def test_dedupe_window_keeps_the_earliest_copy():
+    first = article(1, "2026-10-01", title="Ransomware hits hospital")
+    same_title = article(2, "2026-10-02", title="Ransomware hits hospital")
+    same_url = article(3, "2026-10-01", url="https://example.com/1?utm_source=rss", time="12:00:00")
+    other = article(4, "2026-10-02")
+
+    assert dedupe_window([same_title, other, same_url, first]) == [first, other]
+
+
+def test_days_run_oldest_first_and_are_checkpointed(pipeline):
+    assert run_backfill(3) == 0
+
+    assert pipeline.days == ["2026-10-01", "2026-10-02", "2026-10-03"]
+    completed = load_state()["completed"]
+    assert {day: info["sent"] for day, info in completed.items()} == {"2026-10-01": 2, "2026-10-02": 1,
+                                                                      "2026-10-03": 1}
+
+    pipeline.days.clear()
+    assert run_backfill(3) == 0
+    assert pipeline.days == []
+
+
+def test_a_failed_day_stays_open_and_later_days_still_run(pipeline):
+    pipeline.fail = {"2026-10-02"}
+    assert run_backfill(3) == 1
+    assert pipeline.days == ["2026-10-01", "2026-10-02", "2026-10-03"]
+
+    pipeline.fail.clear()
+    pipeline.days.clear()
+    assert run_backfill(3) == 0
+    assert pipeline.days == ["2026-10-02"]
+
+
+def test_budget_deferral_leaves_the_rest_of_the_window_open(pipeline):
+    pipeline.defer = {"2026-10-01"}
+    assert run_backfill(3) == 3
+    assert pipeline.days == ["2026-10-01"]
+    assert load_state()["completed"] == {}
+
+    pipeline.defer.clear()
+    pipeline.days.clear()
+    assert run_backfill(3) == 0
+    assert pipeline.days == ["2026-10-01", "2026-10-02", "2026-10-03"]
+
+
+def test_restart_forgets_finished_days(pipeline):
+    run_backfill(3)
+    backfill.reset_state()
+    pipeline.days.clear()
+
+    assert run_backfill(3) == 0
+    assert len(pipeline.days) == 3
@@ -0,0 +1,106 @@
+import sqlite3
+import time
+
+import pytest
+
+import coordination
+from coordination import HashRing, acquire_lease, article_claim_keys, claim_article, mark_posted, release_claims
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(coordination, "COORDINATION_DB", str(tmp_path / "coordination.db"))
+    monkeypatch.setattr(coordination, "coordination_enabled", True)
+    coordination.thread_state.connection = None
+    coordination.held_leases.clear()
+    yield
+    if coordination.thread_state.connection is not None:
+        coordination.thread_state.connection.close()
+    coordination.thread_state.connection = None
+    coordination.held_leases.clear()
+
+
+def insert_lease(name, owner, expires_at):
+    coordination.get_connection().execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (name, owner, expires_at))
+
+
+def insert_claim(key, owner, status, claimed_at):
+    coordination.get_connection().execute("INSERT OR REPLACE INTO claims VALUES (?, ?, ?, ?)",
+                                           (key, owner, status, claimed_at))
+
+
+def test_lease_is_exclusive_until_it_expires():
+    assert acquire_lease("node:a")
+    assert acquire_lease("node:a")  # Renewing our own lease
+
+    insert_lease("node:b", "other:1", time.time() + 60)
+    assert not acquire_lease("node:b")
+    assert coordination.lease_holder("node:b") == "other:1"
+
+    insert_lease("node:b", "other:1", time.time() - 1)
+    assert acquire_lease("node:b")
+    assert coordination.held_leases == {"node:a", "node:b"}
+
+
+def test_claims_conflict_with_other_owners_and_posted_keys():
+    keys = article_claim_keys("https://example.com/a", "title", "hash")
+    assert claim_article(keys)
+    assert claim_article(keys)  # Our own claim
+
+    insert_claim("url:https://example.com/b", "other:1", "claimed", time.time())
+    assert not claim_article(["url:https://example.com/b", "title:b"])
+    assert coordination.is_claimed_elsewhere(["url:https://example.com/b"])
+
+    insert_claim("url:https://example.com/c", "other:1", "claimed", time.time() - coordination.LEASE_TTL_SECONDS - 1)
+    assert claim_article(["url:https://example.com/c"])  # Expired claim is taken over
+
+    mark_posted(keys)
+    assert not claim_article(keys)
+
+
+def test_release_claims_keeps_posted_keys():
+    claim_article(["url:x", "url:y"])
+    mark_posted(["url:x"])
+    release_claims(["url:x", "url:y"])
+
+    rows = coordination.get_connection().execute("SELECT key, status FROM claims ORDER BY key").fetchall()
+    assert rows == [("url:x", "posted")]
+
+
+def test_locked_database_raises_without_a_stray_rollback(tmp_path):
+    connection = coordination.get_connection()
+    connection.execute("PRAGMA busy_timeout=50")
+    other = sqlite3.connect(coordination.COORDINATION_DB, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            claim_article(["url:z"])
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            acquire_lease("node:z")
+        assert not connection.in_transaction
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    assert claim_article(["url:z"])
+    assert acquire_lease("node:z")
+
+
+def test_disabled_coordination_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(coordination, "coordination_enabled", False)
+
+    assert acquire_lease("node:a")
+    assert claim_article(["url:a"])
+    assert not coordination.is_claimed_elsewhere(["url:a"])
+    assert coordination.thread_state.connection is None
+
+
+def test_hash_ring_moves_only_the_removed_nodes_feeds():
+    feeds = [f"https://example.com/feed{i}.xml" for i in range(200)]
+    ring = HashRing(["a", "b", "c"])
+    before = {feed: ring.node_for(feed) for feed in feeds}
+    after = {feed: HashRing(["a", "b"]).node_for(feed) for feed in feeds}
+
+    assert set(before.values()) == {"a", "b", "c"}
+    assert all(after[feed] == node for feed, node in before.items() if node != "c")
+    assert before == {feed: HashRing(["c", "b", "a"]).node_for(feed) for feed in feeds}
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import feed_schedule
+from feed_schedule import commit_feed_schedule, due_feeds, load_schedule, next_interval, record_poll
+
+FEED = "https://example.com/feed.xml"
+NOW = datetime(2026, 10, 1, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def schedule(monkeypatch):
+    monkeypatch.setattr(feed_schedule, "FEED_SCHEDULE_ENABLED", True)
+    monkeypatch.setattr(feed_schedule, "FEED_POLL_MIN_MINUTES", 15)
+    monkeypatch.setattr(feed_schedule, "FEED_POLL_MAX_HOURS", 24)
+    monkeypatch.setattr(feed_schedule, "FEED_RATE_SMOOTHING", 0.5)
+    feed_schedule.pending_results.clear()
+    yield
+    feed_schedule.pending_results.clear()
+
+
+def entries(*ids):
+    return [SimpleNamespace(id=entry_id) for entry_id in ids]
+
+
+def state():
+    return feed_schedule.pending_results[FEED]
+
+
+def test_next_interval_bounds_and_backoff():
+    assert next_interval(None, 0) == 15 * 60
+    assert next_interval(0, 0, previous=24 * 3600) == 24 * 3600
+    assert next_interval(100, 0, previous=15 * 60) == 15 * 60
+    assert next_interval(0, 0, previous=15 * 60) == 30 * 60  # At most doubles per poll
+    assert next_interval(None, 3) == 15 * 60 * 8
+    assert next_interval(None, 20) == 24 * 3600
+
+
+def test_first_poll_only_sets_the_baseline():
+    record_poll(FEED, entries("a", "b", "c"), now=NOW)
+
+    assert state()["rate"] is None
+    assert state()["entry_ids"] == ["a", "b", "c"]
+    assert state()["interval_seconds"] == 15 * 60
+
+
+def test_repeated_entries_are_not_counted_as_new():
+    record_poll(FEED, entries("a", "b", "c"), now=NOW)
+    record_poll(FEED, entries("a", "b", "c"), now=NOW + timedelta(hours=1))
+    assert state()["rate"] == 0
+
+    record_poll(FEED, entries("d", "a", "b"), now=NOW + timedelta(hours=2))
+    assert state()["rate"] == 0.5  # One new entry in an hour, smoothed with the previous 0
+
+
+def test_pushed_entries_extend_the_known_ids():
+    record_poll(FEED, entries("a", "b"), now=NOW)
+    record_poll(FEED, entries("c"), now=NOW + timedelta(hours=1))
+    record_poll(FEED, entries("c", "a", "b"), now=NOW + timedelta(hours=2))
+
+    assert state()["entry_ids"] == ["c", "a", "b"]
+    assert state()["rate"] == 0.5  # 1/h from the push, then an hour with nothing new
+
+
+def test_errors_back_off_and_keep_the_known_ids():
+    record_poll(FEED, entries("a"), now=NOW)
+    record_poll(FEED, error=True, now=NOW + timedelta(minutes=15))
+    record_poll(FEED, error=True, now=NOW + timedelta(minutes=45))
+
+    assert state()["errors"] == 2
+    assert state()["interval_seconds"] == 15 * 60 * 4
+    assert state()["entry_ids"] == ["a"]
+
+
+def test_due_feeds_and_commit(monkeypatch):
+    other = "https://example.com/other.xml"
+    record_poll(FEED, entries("a"), now=NOW)
+    commit_feed_schedule()
+
+    assert FEED in load_schedule()
+    assert feed_schedule.pending_results == {}
+    assert due_feeds([FEED, other], now=NOW + timedelta(minutes=5)) == [other]
+    assert due_feeds([FEED, other], now=NOW + timedelta(minutes=14)) == [FEED, other]  # Within the 10% slack
+
+    monkeypatch.setattr(feed_schedule, "FEED_SCHEDULE_ENABLED", False)
+    assert due_feeds([FEED, other], now=NOW) == [FEED, other]
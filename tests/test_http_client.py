@@ -0,0 +1,162 @@
+import pytest
+import requests
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances monotonic() instead of waiting."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(http_client, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Queue of results for send_once(): status codes, or exceptions to raise."""
+    queued = []
+    calls = []
+
+    def fake_send_once(method, url, timeout, **kwargs):
+        calls.append((method, url))
+        result = queued.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        response = requests.Response()
+        response.status_code = result
+        response.url = url
+        return response
+
+    monkeypatch.setattr(http_client, "send_once", fake_send_once)
+    monkeypatch.setattr(http_client, "breakers", {})
+    return queued, calls
+
+
+def open_breaker(clock, threshold=2, reset_seconds=30):
+    breaker = CircuitBreaker(threshold=threshold, reset_seconds=reset_seconds)
+    for _ in range(threshold):
+        breaker.record_failure()
+    assert not breaker.allow()
+    return breaker
+
+
+def test_breaker_opens_after_threshold_and_closes_on_trial_success(clock):
+    breaker = CircuitBreaker(threshold=3, reset_seconds=30)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()  # Just opened
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()      # Half-open trial
+    assert not breaker.allow()  # Only one at a time
+    breaker.record_success()
+    assert breaker.allow() and breaker.failures == 0
+
+
+def test_failed_trial_reopens_without_reporting_a_new_opening(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.record_failure()
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_rate_limited_trial_is_released_and_retried_later(clock):
+    breaker = open_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release_trial()  # The trial got a 429
+
+    assert not breaker.trial_running
+    assert breaker.failures == 2
+    assert not breaker.allow()  # Still open for another reset period
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()      # Trial again
+    breaker.record_success()
+    assert breaker.opened_at is None
+
+
+def test_release_trial_is_a_no_op_on_a_closed_breaker(clock):
+    breaker = CircuitBreaker(threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    breaker.release_trial()
+    assert breaker.allow() and breaker.failures == 1 and breaker.opened_at is None
+
+
+def test_request_half_open_429_then_trial_again(clock, responses):
+    queued, calls = responses
+    breaker = http_client.get_breaker("api.example.com")
+    breaker.threshold, breaker.reset_seconds = 2, 30
+    breaker.record_failure()
+    breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        http_client.get("https://api.example.com/a", retries=0)
+
+    clock.now += 30
+    queued.append(429)
+    assert http_client.get("https://api.example.com/a", retries=0).status_code == 429
+    with pytest.raises(CircuitOpenError):
+        http_client.get("https://api.example.com/a", retries=0)
+
+    clock.now += 30
+    queued.append(200)
+    assert http_client.get("https://api.example.com/a", retries=0).status_code == 200
+    assert breaker.opened_at is None and len(calls) == 2
+
+
+def test_get_retries_transient_statuses_and_errors(clock, responses):
+    queued, calls = responses
+    queued.extend([503, requests.exceptions.ReadTimeout("slow"), 200])
+
+    assert http_client.get("https://feeds.example.com/rss", retries=3).status_code == 200
+    assert len(calls) == 3 and len(clock.sleeps) == 2
+
+
+def test_post_is_not_retried_after_a_read_timeout(clock, responses):
+    queued, calls = responses
+    queued.extend([requests.exceptions.ReadTimeout("slow"), 200])
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        http_client.post("https://api.example.com/send", retries=3)
+    assert len(calls) == 1
+
+
+def test_post_is_retried_on_429_with_retry_after(clock, responses, monkeypatch):
+    queued, calls = responses
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_MAX", 60)
+    original = http_client.send_once
+
+    def with_retry_after(method, url, timeout, **kwargs):
+        response = original(method, url, timeout, **kwargs)
+        if response.status_code == 429:
+            response.headers["Retry-After"] = "7"
+        return response
+
+    monkeypatch.setattr(http_client, "send_once", with_retry_after)
+    queued.extend([429, 200])
+
+    assert http_client.post("https://api.example.com/send", retries=2).status_code == 200
+    assert clock.sleeps == [7.0]
+    assert http_client.get_breaker("api.example.com").failures == 0
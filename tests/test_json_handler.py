@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+import json_handler
+from json_handler import StateCorruptedError, read_json_checked, state_lock, write_json_atomic
+from article import ArticleRecord
+
+STORE = "store_ud.json"
+
+
+def write(data):
+    with state_lock(STORE):
+        write_json_atomic(STORE, data)
+
+
+def test_missing_store_returns_default():
+    assert read_json_checked(STORE, {"empty": True}) == {"empty": True}
+
+
+def test_round_trip_writes_sidecar_and_snapshot():
+    write({"a": 1})
+    write({"a": 2})
+
+    assert read_json_checked(STORE, {}) == {"a": 2}
+    assert not os.path.exists(STORE + ".tmp")
+    with open(STORE + ".sha256", encoding="utf-8") as f:
+        current, previous = f.read().split()
+    assert current == json_handler.file_digest(STORE)
+    assert previous == json_handler.file_digest(STORE + ".bak")
+    assert read_json_checked(STORE + ".bak", {}) == {"a": 1}
+
+
+def test_checksum_mismatch_falls_back_to_snapshot():
+    write(["first"])
+    write(["second"])
+    with open(STORE, "w", encoding="utf-8") as f:
+        f.write('["tampered"]')  # Valid JSON, but not what was written
+
+    assert read_json_checked(STORE, []) == ["first"]
+
+
+def test_truncated_store_falls_back_to_snapshot():
+    write(["first"])
+    write(["second", "third"])
+    with open(STORE, "r+b") as f:
+        f.truncate(5)
+
+    assert read_json_checked(STORE, []) == ["first"]
+
+
+def test_store_and_snapshot_both_corrupt_raises():
+    write(["first"])
+    write(["second"])
+    for path in (STORE, STORE + ".bak"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+
+    with pytest.raises(StateCorruptedError):
+        read_json_checked(STORE, [])
+
+
+def test_store_without_sidecar_is_accepted_if_it_parses():
+    with open(STORE, "w", encoding="utf-8") as f:
+        f.write('{"legacy": true}')
+
+    assert read_json_checked(STORE, {}) == {"legacy": True}
+
+
+def test_crash_before_replace_keeps_previous_content():
+    write({"version": 1})
+    # A crash after the sidecar was updated but before the temp file replaced the store
+    payload = json_handler.encode({"version": 2})
+    with open(STORE + ".tmp", "wb") as f:
+        f.write(payload)
+    previous = json_handler.file_digest(STORE)
+    with open(STORE + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{json_handler.hashlib.sha256(payload).hexdigest()}\n{previous}\n")
+
+    assert read_json_checked(STORE, {}) == {"version": 1}
+
+
+def test_fields_projection():
+    write([{"title": "T", "url": "https://a", "text_hash": "h", "summary": "long"}, {"title": "U"}])
+
+    assert read_json_checked(STORE, [], fields=("title", "url")) == [("T", "https://a"), ("U", None)]
+
+
+def test_append_posted_news_keeps_existing_history():
+    record = ArticleRecord(id="1", title="Title", url="https://example.com/a", text_hash="h1",
+                           published_date="2026-10-01")
+    json_handler.append_posted_news([record])
+    json_handler.append_posted_news([])
+    json_handler.append_posted_news([ArticleRecord(id="2", title="Other", url="https://example.com/b", text_hash="h2")])
+
+    posted = json_handler.load_posted_news()
+    assert [entry["url"] for entry in posted] == ["https://example.com/a", "https://example.com/b"]
+    views = json_handler.load_posted_records()
+    assert [(view.title, view.url, view.text_hash) for view in views] == [
+        ("Title", "https://example.com/a", "h1"), ("Other", "https://example.com/b", "h2")]
+
+
+def test_load_skipped_news_does_not_write():
+    with state_lock(json_handler.SKIPPED_NEWS_FILE):
+        write_json_atomic(json_handler.SKIPPED_NEWS_FILE, {"old": {"date": "2000-01-01", "fail_count": 1}})
+    before = json_handler.file_digest(json_handler.SKIPPED_NEWS_FILE)
+
+    assert json_handler.load_skipped_news() == {}
+    assert json_handler.file_digest(json_handler.SKIPPED_NEWS_FILE) == before
@@ -0,0 +1,95 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import messaging
+import json_handler
+from article import ArticleRecord
+
+SUMMARY = ("Attackers exploited a zero-day flaw in a popular VPN appliance & pivoted into hospital networks "
+           "before the vendor shipped a patch on Friday.")
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Captures every request the messaging module makes instead of sending it."""
+    requests_made = []
+
+    def fake_post(url, json=None, **kwargs):
+        requests_made.append((url, json))
+        return SimpleNamespace(status_code=200, raise_for_status=lambda: None)
+
+    monkeypatch.setattr(messaging.http_client, "post", fake_post)
+    monkeypatch.setattr(messaging, "fetch_full_text", lambda url: "Full article text " * 40)
+    monkeypatch.setattr(messaging, "summarize_batch", lambda items: [SUMMARY for _ in items])
+    monkeypatch.setattr(messaging, "TEAMS_WEBHOOK_URL", "https://teams.example.com/hook")
+    return requests_made
+
+
+def test_telegram_message_text(sent):
+    article = ArticleRecord(id="1", title="VPN zero-day exploited", url="https://example.com/news/vpn",
+                            published_date="2026-10-01", published_time="10:30:00", summary="feed snippet")
+
+    sent_articles, deferred = messaging.post_articles_to_telegram([article], defer_to_backlog=False)
+
+    telegram = [payload for url, payload in sent if "/sendMessage" in url]
+    assert len(telegram) == 1
+    assert telegram[0]["parse_mode"] == "HTML"
+    assert telegram[0]["text"] == (
+        "📰 <b>VPN zero-day exploited</b>\n"
+        "📅 <b>Date:</b> 2026-10-01 10:30:00\n"
+        "🔗 <a href='https://example.com/news/vpn'>For Additional Reading</a>\n"
+        "\n"
+        "✍️ <b>Summary:</b>\n"
+        "Attackers exploited a zero-day flaw in a popular VPN appliance &amp; pivoted into hospital networks "
+        "before the vendor shipped a patch on Friday."
+    )
+    assert [record.url for record in sent_articles] == ["https://example.com/news/vpn"]
+    assert deferred == []
+    assert [entry["url"] for entry in json_handler.load_posted_news()] == ["https://example.com/news/vpn"]
+
+
+def test_pages_are_fetched_concurrently_up_to_the_worker_limit(sent, monkeypatch):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow_fetch(url):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return f"Full text of {url} " * 20
+
+    monkeypatch.setattr(messaging, "fetch_full_text", slow_fetch)
+    monkeypatch.setattr(messaging, "EXTRACTION_WORKERS", 3)
+    monkeypatch.setattr(messaging.governor, "enabled", False)
+    articles = [ArticleRecord(id=str(i), title=f"Story number {i}", url=f"https://example.com/news/{i}",
+                              published_date="2026-10-01") for i in range(8)]
+
+    sent_articles, _ = messaging.post_articles_to_telegram(articles, defer_to_backlog=False)
+
+    assert peak[0] == 3
+    assert sorted(record.url for record in sent_articles) == sorted(article.url for article in articles)
+
+
+def test_budget_is_checked_as_each_download_starts(sent, monkeypatch):
+    monkeypatch.setattr(messaging, "EXTRACTION_WORKERS", 1)
+    checks = []
+
+    class Budget:
+        def exhausted(self):
+            checks.append(1)
+            # Runs out as the third download would start; the summary stage checks again later
+            return "wall-clock" if len(checks) == 3 else None
+
+    articles = [ArticleRecord(id=str(i), title=f"Story number {i}", url=f"https://example.com/news/{i}",
+                              published_date="2026-10-01") for i in range(5)]
+
+    sent_articles, deferred = messaging.post_articles_to_telegram(articles, defer_to_backlog=False, budget=Budget())
+
+    assert len(sent_articles) == 2
+    assert len(deferred) == 3
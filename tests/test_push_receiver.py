@@ -0,0 +1,148 @@
+import hashlib
+import hmac
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+import push_receiver
+from push_receiver import PushRequestHandler, renew_subscriptions, update_subscription, verify_signature, webhook_entries
+
+SECRET = "s3cret"
+FEED = "https://example.com/feed.xml"
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Alerts</title>
+<entry><id>tag:1</id><title>Ransomware hits hospital</title><link href="https://news.example.com/1"/>
+<updated>2026-10-01T10:00:00Z</updated></entry></feed>"""
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setattr(push_receiver, "PUSH_SECRET", SECRET)
+    monkeypatch.setattr(push_receiver, "RSS_FEED_URL", [FEED])
+
+
+def sign(body, algorithm="sha256"):
+    return f"{algorithm}={hmac.new(SECRET.encode(), body, getattr(hashlib, algorithm)).hexdigest()}"
+
+
+def test_verify_signature():
+    assert verify_signature(ATOM, sign(ATOM))
+    assert verify_signature(ATOM, sign(ATOM, "sha1"))
+    assert verify_signature(ATOM, "SHA256=" + sign(ATOM).partition("=")[2].upper())  # Hubs may send upper-case hex
+    assert not verify_signature(ATOM + b" ", sign(ATOM))
+    assert not verify_signature(ATOM, None)
+    assert not verify_signature(ATOM, "md5=" + hashlib.md5(ATOM).hexdigest())
+    assert not verify_signature(ATOM, "sha256=")
+
+
+def test_unsigned_content_is_accepted_only_without_a_secret(monkeypatch):
+    monkeypatch.setattr(push_receiver, "PUSH_SECRET", "")
+    assert verify_signature(ATOM, None)
+
+
+def test_webhook_entries():
+    feed, entries = webhook_entries({"feed": FEED, "entries": [
+        {"id": "a", "title": "First", "link": "https://news.example.com/a", "summary": "Text",
+         "published": "2026-10-01T12:00:00+02:00"},
+        {"title": "Second", "url": "https://news.example.com/b", "published": 1790000000},
+    ]})
+
+    assert feed == FEED
+    assert [entry.id for entry in entries] == ["a", "https://news.example.com/b"]
+    assert entries[0].summary == "Text"
+    assert tuple(entries[0].published_parsed)[:5] == (2026, 10, 1, 10, 0)  # Converted to UTC
+    assert "summary" not in entries[1]
+
+    feed, entries = webhook_entries({"title": "Single", "link": "https://news.example.com/c"})
+    assert feed == "webhook" and entries[0].link == "https://news.example.com/c"
+
+
+@pytest.mark.parametrize("payload", [["not", "an", "object"], {"entries": {"title": "x"}},
+                                     {"entries": [{"title": "No link"}]}, {"title": "x", "link": "y", "published": "soon"}])
+def test_invalid_webhook_payloads(payload):
+    with pytest.raises(ValueError):
+        webhook_entries(payload)
+
+
+def test_renew_subscriptions_only_renews_what_is_due(monkeypatch):
+    feeds = ["https://a.example/feed", "https://b.example/feed", "https://c.example/feed", "https://d.example/feed"]
+    monkeypatch.setattr(push_receiver, "RSS_FEED_URL", feeds)
+    now = datetime(2026, 10, 1, 12, 0, 0)
+    fmt = push_receiver.TIMESTAMP_FORMAT
+    update_subscription(feeds[0], state="verified", expires_at=(now + timedelta(days=5)).strftime(fmt))
+    update_subscription(feeds[1], state="verified", expires_at=(now + timedelta(hours=12)).strftime(fmt))
+    update_subscription(feeds[2], state="pending", requested_at=(now - timedelta(minutes=10)).strftime(fmt))
+    subscribed = []
+    monkeypatch.setattr(push_receiver, "subscribe", subscribed.append)
+
+    renew_subscriptions(now)
+
+    assert subscribed == [feeds[1], feeds[3]]
+
+
+class FakeIngestor:
+    def __init__(self):
+        self.delivered = []
+
+    def deliver(self, feed, entries):
+        self.delivered.append((feed, entries))
+
+
+@pytest.fixture
+def server(monkeypatch):
+    ingestor = FakeIngestor()
+    monkeypatch.setattr(PushRequestHandler, "ingestor", ingestor)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PushRequestHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}", ingestor
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_websub_delivery_checks_the_signature(server):
+    base, ingestor = server
+    url = f"{base}/websub?feed={requests.utils.quote(FEED, safe='')}"
+
+    assert requests.post(url, data=ATOM, headers={"X-Hub-Signature": "sha256=bad"}).status_code == 202
+    assert ingestor.delivered == []  # Acknowledged but ignored
+
+    assert requests.post(url, data=ATOM, headers={"X-Hub-Signature": sign(ATOM)}).status_code == 202
+    [(feed, entries)] = ingestor.delivered
+    assert feed == FEED and [entry.title for entry in entries] == ["Ransomware hits hospital"]
+
+    other = f"{base}/websub?feed={requests.utils.quote('https://other.example/feed', safe='')}"
+    assert requests.post(other, data=ATOM, headers={"X-Hub-Signature": sign(ATOM)}).status_code == 404
+
+
+def test_webhook_requires_the_token_and_a_valid_payload(server):
+    base, ingestor = server
+    payload = {"feed": FEED, "entries": [{"title": "Phishing wave", "link": "https://news.example.com/p"}]}
+
+    assert requests.post(f"{base}/webhook", json=payload).status_code == 403
+    assert requests.post(f"{base}/webhook", json=payload, headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+    response = requests.post(f"{base}/webhook", json={"entries": [{"title": "x"}]},
+                             headers={"Authorization": f"Bearer {SECRET}"})
+    assert response.status_code == 400 and "Invalid payload" in response.json()["error"]
+
+    response = requests.post(f"{base}/webhook", json=payload, headers={"Authorization": f"Bearer {SECRET}"})
+    assert response.status_code == 202 and response.json() == {"accepted": 1}
+    assert [entry.link for _, entries in ingestor.delivered for entry in entries] == ["https://news.example.com/p"]
+
+
+def test_hub_verification_echoes_the_challenge_for_a_pending_request(server):
+    base, _ = server
+    update_subscription(FEED, state="pending", topic=FEED)
+    params = {"feed": FEED, "hub.mode": "subscribe", "hub.topic": FEED, "hub.challenge": "abc123",
+              "hub.lease_seconds": "86400"}
+
+    assert requests.get(f"{base}/websub", params=dict(params, **{"hub.topic": "https://evil.example"})).status_code == 404
+    response = requests.get(f"{base}/websub", params=params)
+    assert response.status_code == 200 and response.text == "abc123"
+    assert push_receiver.load_subscriptions()[FEED]["state"] == "verified"
+
+    assert requests.get(f"{base}/websub", params=dict(params, **{"hub.mode": "unsubscribe"})).status_code == 404
+    assert requests.get(f"{base}/health").json() == {"status": "ok"}
@@ -0,0 +1,58 @@
+import pytest
+
+import relevance
+from article import ArticleRecord
+from relevance import prefilter_articles, score_article
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setattr(relevance, "detect", None)  # The stopword heuristic, whether or not langdetect is installed
+    monkeypatch.setattr(relevance, "RELEVANCE_LANGUAGES", ["en"])
+    monkeypatch.setattr(relevance, "RELEVANCE_MIN_SCORE", 1)
+    monkeypatch.setattr(relevance, "BLOCKED_DOMAINS", ["spam.example"])
+
+
+def candidate(title, summary="", url="https://news.example.com/story"):
+    return ArticleRecord(id=title, title=title, url=url, summary=summary, published_date="2026-10-01")
+
+
+def test_title_terms_count_double():
+    in_summary = candidate("Quarterly results for the company",
+                           "The company said a ransomware gang was behind the outage")
+    in_title = candidate("Ransomware gang hits the company",
+                         "The company said the outage lasted for two days")
+
+    # Both get the 0.5 bonus for a summary that is about the title
+    assert score_article(in_summary) == (1.5, None)
+    assert score_article(in_title) == (2.5, None)
+
+
+def test_drop_reasons():
+    assert score_article(candidate("Ransomware attack", url="https://www.youtube.com/watch?v=1"))[1] == "youtube"
+    assert score_article(candidate("Ransomware attack", url="https://feeds.spam.example/a"))[1] == "blocked_domain"
+    assert score_article(candidate("Cyberangriff auf Krankenhaus", "Hacker legten die Systeme lahm"))[1] == "language"
+    assert score_article(candidate("The new phone is on sale", "It has a bigger screen than the old one"))[1] == "low_score"
+
+
+def test_prefilter_ranks_and_drops():
+    weak = candidate("Vendor ships a patch for the router", "The patch is out for the router")
+    strong = candidate("Ransomware gang breach exposes stolen data", "Hackers leaked the stolen data after the breach")
+    off_topic = candidate("The new phone is on sale", "It has a bigger screen than the old one")
+
+    kept, dropped = prefilter_articles([weak, off_topic, strong])
+
+    assert kept == [strong, weak]
+    assert [(article, reason) for article, reason, _ in dropped] == [(off_topic, "low_score")]
+    assert off_topic.relevance_score < 1 <= weak.relevance_score < strong.relevance_score
+
+
+def test_dry_run_keeps_everything_in_feed_order():
+    weak = candidate("Vendor ships a patch for the router", "The patch is out for the router")
+    off_topic = candidate("The new phone is on sale", "It has a bigger screen than the old one")
+    strong = candidate("Ransomware gang breach exposes stolen data", "Hackers leaked the stolen data after the breach")
+
+    kept, dropped = prefilter_articles([weak, off_topic, strong], dry_run=True)
+
+    assert kept == [weak, off_topic, strong]
+    assert dropped == []
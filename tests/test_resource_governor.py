@@ -0,0 +1,139 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+import resource_governor
+from resource_governor import MB, MemoryGovernor
+
+
+class Memory:
+    """Readings the governor sees instead of the real process tree and system memory."""
+
+    def __init__(self):
+        self.rss_mb = 200.0
+        self.available_mb = 4096.0
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    readings = Memory()
+    monkeypatch.setattr(resource_governor.psutil, "virtual_memory",
+                        lambda: SimpleNamespace(available=readings.available_mb * MB))
+    return readings
+
+
+@pytest.fixture
+def governor(memory, monkeypatch):
+    metrics.reset()
+    instance = MemoryGovernor(enabled=True, interval_ms=10, low_available_mb=1024, critical_available_mb=400,
+                              rss_limit_mb=1000)
+    monkeypatch.setattr(instance, "tree_rss_mb", lambda: memory.rss_mb)
+    yield instance
+    metrics.reset()
+
+
+def gauges():
+    return {(gauge["name"], tuple(gauge["labels"].items())): gauge["value"]
+            for gauge in metrics.build_run_report()["gauges"]}
+
+
+def test_classify_thresholds(governor):
+    assert governor.classify(rss_mb=200, available_mb=4096) == "ok"
+    assert governor.classify(rss_mb=200, available_mb=1000) == "high"
+    assert governor.classify(rss_mb=800, available_mb=4096) == "high"   # 80% of the RSS limit
+    assert governor.classify(rss_mb=200, available_mb=399) == "critical"
+    assert governor.classify(rss_mb=1000, available_mb=4096) == "critical"
+
+    governor.rss_limit_mb = 0  # No limit: only the available memory counts
+    assert governor.classify(rss_mb=50_000, available_mb=4096) == "ok"
+
+
+def test_batch_size_shrinks_under_pressure_and_grows_back(governor, memory):
+    assert governor.batch_size(16) == 16
+
+    memory.available_mb = 1000
+    assert [governor.batch_size(16) for _ in range(3)] == [8, 4, 2]
+
+    memory.available_mb = 300
+    assert governor.batch_size(16) == 1
+
+    memory.available_mb = 4096
+    assert [governor.batch_size(16) for _ in range(5)] == [2, 4, 8, 16, 16]
+
+
+def test_disabled_governor_changes_nothing(governor, memory):
+    governor.enabled = False
+    memory.available_mb = 100
+    assert governor.batch_size(16) == 16
+    assert governor.relieve("extraction") is False
+
+
+def run_extractions(governor, count):
+    """Runs `count` extraction_slot() users at once, returns the most that were inside together."""
+    active, peak = [0], [0]
+    lock = threading.Lock()
+    start = threading.Barrier(count)
+
+    def extract():
+        start.wait()
+        with governor.extraction_slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=extract) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert governor.extracting == 0
+    return peak[0]
+
+
+def test_extraction_runs_concurrently_when_memory_is_ok(governor):
+    assert run_extractions(governor, 4) == 4
+
+
+def test_extraction_is_serialized_under_pressure(governor, memory):
+    memory.available_mb = 1000
+    assert run_extractions(governor, 4) == 1
+    assert any(counter["name"] == "memory_extraction_waits"
+               for counter in metrics.build_run_report()["counters"])
+
+
+def test_relieve_unloads_the_model_only_when_critical(governor, memory, monkeypatch):
+    import summarizer
+
+    unloads = []
+    monkeypatch.setattr(summarizer, "unload_summarizer", lambda: unloads.append(1) or True)
+
+    memory.available_mb = 1000
+    assert governor.relieve("extraction") is False
+    memory.available_mb = 300
+    assert governor.relieve("extraction") is True
+    assert unloads == [1]
+
+
+def test_peaks_are_recorded_per_stage(governor, memory):
+    with metrics.timed("summarization"):
+        memory.rss_mb = 640.0
+        governor.sample()
+        memory.rss_mb = 320.0
+    governor.on_stage("exit", "summarization")
+    memory.available_mb = 900.0
+    governor.sample()
+    governor.record_peaks()
+
+    recorded = gauges()
+    assert recorded[("stage_peak_rss_mb", (("stage", "summarization"),))] == 640.0
+    assert recorded[("run_peak_rss_mb", ())] == 640.0
+    assert recorded[("min_available_memory_mb", ())] == 900.0
+
+    governor.reset_peaks()
+    assert governor.peaks == {} and governor.run_peak_mb == 0.0
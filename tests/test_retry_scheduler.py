@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import retry_scheduler
+from retry_scheduler import (TEXT_TOO_SHORT, build_retry_index, compute_next_attempt, due_ids, next_attempt_at,
+                             retry_delay, retry_due, retry_policy)
+
+NOW = datetime(2026, 10, 1, 12, 0, 0)
+
+
+def stamp(moment):
+    return moment.strftime(retry_scheduler.TIMESTAMP_FORMAT)
+
+
+@pytest.mark.parametrize("reason, url, policy", [
+    ("Duplicate by url", "https://example.com/a", "never"),
+    ("Filtered by relevance prefilter", "https://example.com/a", "never"),
+    (TEXT_TOO_SHORT, "https://example.com/a", "content"),
+    ("Final summary too short", "https://example.com/a", "content"),
+    ("Error while fetching article: Connection error", "https://example.com/a", "network"),
+    ("Something unexpected", "", "network"),
+])
+def test_retry_policy(reason, url, policy):
+    assert retry_policy(reason, url) == policy
+
+
+def test_short_text_on_non_article_domain_is_never_retried(monkeypatch):
+    monkeypatch.setattr(retry_scheduler, "NON_ARTICLE_DOMAINS", ["youtube.com"])
+
+    assert retry_policy(TEXT_TOO_SHORT, "https://www.youtube.com/watch?v=1") == "never"
+    assert retry_policy(TEXT_TOO_SHORT, "https://m.youtube.com/watch?v=1") == "never"
+    assert retry_policy(TEXT_TOO_SHORT, "https://notyoutube.com/a") == "content"
+
+
+def test_retry_delay_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(retry_scheduler, "RETRY_BASE_MINUTES", 30)
+    monkeypatch.setattr(retry_scheduler, "RETRY_SHORT_TEXT_HOURS", 6)
+    monkeypatch.setattr(retry_scheduler, "RETRY_MAX_HOURS", 2)
+
+    assert [retry_delay("network", count) for count in (1, 2, 3, 4)] == [1800, 3600, 7200, 7200]
+    assert retry_delay("content", 1) == 7200
+
+
+def test_compute_next_attempt_stops_after_max_failures():
+    assert compute_next_attempt({"reason": "Error sending", "fail_count": retry_scheduler.MAX_FAILURES}, NOW) == ("never", None)
+    assert compute_next_attempt({"reason": "Duplicate by url"}, NOW) == ("never", None)
+    policy, attempt_at = compute_next_attempt({"reason": "Error sending", "fail_count": 1}, NOW)
+    assert policy == "network"
+    assert attempt_at == stamp(NOW + timedelta(seconds=retry_delay("network", 1)))
+
+
+def test_legacy_record_is_scheduled_from_its_skip_date():
+    record = {"reason": "Error sending", "fail_count": 1, "date": "2026-09-30"}
+
+    assert next_attempt_at(record) == stamp(datetime(2026, 9, 30) + timedelta(seconds=retry_delay("network", 1)))
+    assert next_attempt_at({"reason": "Error sending", "date": "not a date"}) is None
+    assert retry_due(record, NOW)
+
+
+def test_index_is_sorted_and_due_ids_uses_it():
+    skipped = {
+        "late": {"next_attempt_at": stamp(NOW + timedelta(hours=1))},
+        "never": {"next_attempt_at": None},
+        "early": {"next_attempt_at": stamp(NOW - timedelta(hours=2))},
+        "now": {"next_attempt_at": stamp(NOW)},
+    }
+    index = build_retry_index(skipped)
+
+    assert [article_id for _, article_id in index] == ["early", "now", "late"]
+    assert due_ids(index, NOW) == ["early", "now"]
+    assert due_ids(index, NOW - timedelta(days=1)) == []
+    assert due_ids([], NOW) == []
@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import scheduler
+from article import ArticleRecord
+from scheduler import RunBudget, load_backlog, merge_with_backlog, priority_score, save_backlog, schedule_articles
+
+NOW = datetime(2026, 10, 1, 12, 0, 0)
+
+
+def article(article_id, hours_old=0, relevance=1.0, source=None):
+    published = NOW - timedelta(hours=hours_old)
+    return ArticleRecord(id=article_id, title=f"Story {article_id}", url=f"https://example.com/{article_id}",
+                         published_date=published.strftime("%Y-%m-%d"), published_time=published.strftime("%H:%M:%S"),
+                         rss_source=source, relevance_score=relevance)
+
+
+def test_priority_combines_relevance_weight_and_recency(monkeypatch):
+    monkeypatch.setattr(scheduler, "RECENCY_HALF_LIFE_HOURS", 12)
+    monkeypatch.setattr(scheduler, "FEED_WEIGHTS", {"Israel": 2.0})
+
+    assert priority_score(article("a", relevance=3), NOW) == 4
+    assert priority_score(article("b", hours_old=12, relevance=3), NOW) == 2
+    assert priority_score(article("c", relevance=3, source="Israel"), NOW) == 8
+
+
+def test_schedule_keeps_feed_order_for_ties(monkeypatch):
+    monkeypatch.setattr(scheduler, "RECENCY_HALF_LIFE_HOURS", 0)
+    first, second, best = article("first"), article("second"), article("best", relevance=5)
+
+    assert schedule_articles([first, second, best]) == [best, first, second]
+    assert best.priority == 6
+
+
+class FakeBudget(RunBudget):
+    def __init__(self, wall_used, cpu_used, **limits):
+        super().__init__(**limits)
+        self.used = wall_used, cpu_used
+
+    def wall_used(self):
+        return self.used[0]
+
+    def cpu_used(self):
+        return self.used[1]
+
+
+def test_budget_reports_which_limit_ran_out():
+    assert FakeBudget(10, 5, wall_seconds=60, cpu_seconds=30).exhausted() is None
+    assert FakeBudget(60, 5, wall_seconds=60, cpu_seconds=30).exhausted() == "wall"
+    assert FakeBudget(10, 30, wall_seconds=60, cpu_seconds=30).exhausted() == "cpu"
+    assert FakeBudget(10**6, 10**6, wall_seconds=0, cpu_seconds=0).exhausted() is None  # 0 = no limit
+
+
+def test_budget_since_process_start_counts_the_time_already_spent():
+    assert RunBudget(since_process_start=True).wall_used() > RunBudget().wall_used()
+
+
+def test_save_backlog_replaces_and_merges():
+    save_backlog([article("a"), article("b")])
+    assert [entry.id for entry in load_backlog()] == ["a", "b"]
+
+    save_backlog([article("c")])
+    assert [entry.id for entry in load_backlog()] == ["c"]
+
+    save_backlog([article("d"), article("c")], merge=True)
+    assert [entry.id for entry in load_backlog()] == ["d", "c"]
+
+    save_backlog([], merge=True)  # A push pass with nothing deferred leaves the backlog alone
+    assert [entry.id for entry in load_backlog()] == ["d", "c"]
+
+
+def test_deferred_at_is_kept_and_old_entries_expire(monkeypatch):
+    monkeypatch.setattr(scheduler, "BACKLOG_MAX_AGE_DAYS", 2)
+    stale = article("stale")
+    stale.deferred_at = (datetime.now() - timedelta(days=3)).strftime("%Y-%m-%d %H:%M:%S")
+    save_backlog([stale, article("fresh")])
+
+    stored = {entry["id"]: entry["deferred_at"] for entry in json.load(open(scheduler.BACKLOG_FILE))}
+    assert stored["stale"] == stale.deferred_at
+    assert [entry.id for entry in load_backlog()] == ["fresh"]
+
+
+def test_fresh_feed_copy_wins_over_the_backlog():
+    save_backlog([article("a"), article("b")])
+    fresh = article("a", relevance=9)
+
+    merged = merge_with_backlog([fresh])
+
+    assert [entry.id for entry in merged] == ["a", "b"]
+    assert merged[0] is fresh
+
+
+@pytest.mark.parametrize("content", ["{not json", '{"a": 1}'])
+def test_unreadable_backlog_is_dropped(content):
+    with open(scheduler.BACKLOG_FILE, "w") as file:
+        file.write(content)
+    assert load_backlog() == []
@@ -0,0 +1,91 @@
+import pytest
+
+import json_handler
+import search_index
+from article import ArticleRecord
+from search_index import index_records, search
+
+
+@pytest.fixture(autouse=True)
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_DB", str(tmp_path / "search.db"))
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_ENABLED", True)
+    yield
+    connection = getattr(search_index.thread_state, "connection", None)
+    if connection is not None:
+        connection.close()
+        search_index.thread_state.connection = None
+
+
+def posted(number, title, summary="", date="2026-10-01", **fields):
+    return dict({"title": title, "summary": summary, "url": f"https://example.com/{number}",
+                 "published_date": date, "published_time": "10:00:00"}, **fields)
+
+
+def titles(results):
+    return [result["title"] for result in results]
+
+
+def test_title_matches_rank_above_summary_matches():
+    index_records("posted", [
+        posted(1, "Hospital systems down", "A ransomware gang claimed the attack on the hospital"),
+        posted(2, "Ransomware gang hits hospital", "Systems are down"),
+        posted(3, "Phishing wave targets banks", "Nothing about the other story"),
+    ])
+
+    assert titles(search("ransomware")) == ["Ransomware gang hits hospital", "Hospital systems down"]
+    assert titles(search("title:ransomware")) == ["Ransomware gang hits hospital"]
+    assert titles(search("phish*")) == ["Phishing wave targets banks"]
+
+
+def test_filters_and_newest_first():
+    index_records("posted", [posted(1, "Ransomware in January", date="2026-01-10"),
+                             posted(2, "Ransomware in March", date="2026-03-10")])
+    index_records("skipped", [{"id": "s1", "title": "Ransomware in February", "published_date": "2026-02-10",
+                               "reason": "Irrelevant summary", "fail_count": 1}])
+
+    assert titles(search("ransomware", kind="skipped")) == ["Ransomware in February"]
+    assert search("ransomware", kind="skipped")[0]["reason"] == "Irrelevant summary"
+    assert titles(search("ransomware", since="2026-02-01", newest=True)) == ["Ransomware in March",
+                                                                             "Ransomware in February"]
+
+
+def test_invalid_query_syntax_is_searched_as_plain_terms():
+    index_records("posted", [posted(1, "Patch for CVE-2024-1234 released")])
+    assert titles(search("CVE-2024-1234")) == ["Patch for CVE-2024-1234 released"]
+
+
+def test_unchanged_records_are_not_rewritten():
+    records = [posted(1, "Ransomware gang hits hospital")]
+    index_records("posted", records)
+    connection = search_index.get_connection()
+    changes = connection.total_changes
+
+    index_records("posted", records)
+    assert connection.total_changes == changes
+
+    index_records("posted", [posted(1, "Ransomware gang hits two hospitals")])
+    assert connection.total_changes > changes
+    assert titles(search("ransomware")) == ["Ransomware gang hits two hospitals"]
+
+
+def test_store_writes_update_the_index(monkeypatch):
+    record = ArticleRecord(id="1", title="Botnet takedown in Europe", url="https://example.com/botnet",
+                           published_date="2026-10-01")
+    json_handler.append_posted_news([record])
+    assert [result["url"] for result in search("botnet")] == ["https://example.com/botnet"]
+
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_ENABLED", False)
+    json_handler.append_posted_news([ArticleRecord(id="2", title="Another botnet", url="https://example.com/2",
+                                                   published_date="2026-10-01")])
+    assert len(search("botnet")) == 1
+
+
+def test_rebuild_reindexes_the_stores():
+    json_handler.append_posted_news([ArticleRecord(id="1", title="Botnet takedown in Europe",
+                                                   url="https://example.com/botnet", published_date="2026-10-01")])
+    search_index.get_connection().execute("DELETE FROM documents")
+    assert search("botnet") == []
+
+    assert search_index.rebuild() == 1
+    assert titles(search("botnet")) == ["Botnet takedown in Europe"]
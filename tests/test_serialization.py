@@ -0,0 +1,55 @@
+import pytest
+
+import serialization
+from serialization import AVAILABLE_FORMATS, decode, decode_fields, detect_format, encode
+
+RECORDS = [
+    {"title": "Zero-day in VPN appliance", "url": "https://example.com/a", "text_hash": "a" * 64,
+     "summary": "Attackers exploited – ünïcode – a flaw.", "keywords": ["vpn", "zero-day"], "fail_count": 2},
+    {"title": "Ransomware hits hospital", "url": "https://example.com/b", "text_hash": None, "summary": ""},
+]
+STORE = {"id-1": RECORDS[0], "id-2": RECORDS[1]}
+
+FORMATS = [state_format for state_format, available in AVAILABLE_FORMATS.items() if available]
+COMPRESSIONS = ["none"] + (["zstd"] if serialization.zstandard is not None else [])
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("state_format", FORMATS)
+@pytest.mark.parametrize("data", [RECORDS, STORE, []], ids=["list", "dict", "empty"])
+def test_round_trip(data, state_format, compression):
+    payload = encode(data, state_format, compression)
+
+    assert decode(payload) == data
+    detected, compressed, _ = detect_format(payload)
+    assert detected == ("msgpack" if state_format == "msgpack" else "json")
+    assert compressed == (compression == "zstd")
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("state_format", FORMATS)
+def test_decode_fields_matches_full_decode(state_format, compression):
+    fields = ("title", "url", "text_hash")
+    payload = encode(RECORDS + [{"title": "Only a title"}], state_format, compression)
+
+    assert decode_fields(payload, fields) == [
+        (record.get("title"), record.get("url"), record.get("text_hash")) for record in decode(payload)]
+
+
+def test_decode_fields_of_non_list_store_is_empty():
+    assert decode_fields(encode(STORE, "json", "none"), ("title",)) == []
+
+
+def test_unknown_format_falls_back_to_json():
+    assert decode(encode(RECORDS, "no-such-format", "none")) == RECORDS
+    assert detect_format(encode(RECORDS, "no-such-format", "none"))[0] == "json"
+
+
+@pytest.mark.parametrize("payload", [b"[{\"title\": ", b"{]", b"\x28\xb5\x2f\xfd garbage"])
+def test_invalid_payload_raises_value_error(payload):
+    if payload.startswith(serialization.ZSTD_MAGIC) and serialization.zstandard is None:
+        pytest.skip("zstandard is not installed")
+    with pytest.raises(ValueError):
+        decode(payload)
+    with pytest.raises(ValueError):
+        decode_fields(payload, ("title",))